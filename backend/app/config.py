@@ -10,11 +10,81 @@ class Settings(BaseSettings):
     # Embedding Model Configuration
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # English-only, fast, 384 dimensions
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BACKEND: str = "torch"  # Options: torch (sentence-transformers), onnx (ONNX Runtime, no torch import)
+    EMBEDDING_ONNX_DIR: str = "data/onnx/all-MiniLM-L6-v2"  # Written by python -m app.tools.export_onnx_model
+    EMBEDDING_ONNX_QUANTIZED: bool = False  # int8 dynamic quantization (else the float32 export); opt in per model, after the export's parity check
+    # Cross-request micro-batching of query embeddings (opt-in)
+    EMBEDDING_MICRO_BATCHING: bool = False
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # Flush when this many queries are queued
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # ...or this long after the first one arrived
+    # Persistent query embedding cache (SQLite, shared by all workers on the host)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 50_000  # ~1.5 KB each at 384 dimensions, LRU-evicted
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 5_000  # In-process hot set, warmed at startup with the most hit queries
+    # Ingredient queries pooled from data/ingredient_embeddings.npy (python -m app.tools.build_ingredient_embeddings)
+    EMBEDDING_COMPOSITIONAL_QUERIES: bool = False
+    
+    # Saved fridges and their stored recommendation results (SQLite, shared by all workers on the host)
+    FRIDGE_DB_PATH: str = "data/fridges.sqlite3"
+    FRIDGE_DB_POOL_SIZE: int = 4  # Connections per worker
+    FRIDGE_RESULTS_MAX_ENTRIES: int = 20_000  # Stored recommendation responses, LRU-evicted...
+    FRIDGE_RESULTS_MAX_BYTES: int = 256 * 1024 * 1024  # ...and their total size
+    
+    # Recipe data
+    RECIPE_STORE_ENABLED: bool = True  # Memory-map data/recipes.bin when present (else parse recipes.json)
+    TEXT_SEARCH_TRIGRAM_INDEX: bool = True  # Trigram index over titles / ingredients for the text search fallback
+    TEXT_SEARCH_MIN_SIMILARITY: float = 0.3  # Trigram similarity for a misspelled word to match
+    RESPONSE_FRAGMENTS_ENABLED: bool = True  # Pre-serialize recipe JSON at load time (responses splice it)
+    STREAM_CHUNK_BYTES: int = 64 * 1024  # Write size of streamed (application/x-ndjson) responses
+    LIST_DEFAULT_FIELDS: str = "summary"  # Fields of GET /api/recipes/ without fields= ("summary", "all" or field names)
     
     # FAISS Index Configuration
-    FAISS_INDEX_TYPE: str = "IndexFlatL2"  # Options: IndexFlatL2, IndexIVFFlat, IndexHNSW
-    FAISS_METRIC: str = "L2"  # Options: L2 (Euclidean), IP (Inner Product)
+    # Options: IndexFlatL2, IndexFlatIP (exact), IndexIVFFlat, IndexHNSW, IndexIVFPQ (approximate).
+    # The approximate types (and FAISS_OPQ) are unvalidated: their recall has only been measured on
+    # synthetic vectors. Keep a Flat index unless python -m app.tools.bench_faiss_index on the real
+    # recipe embeddings shows acceptable recall for the chosen parameters.
+    FAISS_INDEX_TYPE: str = "IndexFlatL2"
+    FAISS_METRIC: str = "L2"  # Options: L2 (Euclidean), IP (Inner Product), cosine (normalized vectors + inner product)
     FAISS_INDEX_PATH: str = "data/recipe_index.faiss"
+    # Memory-map the index file (shared across workers) instead of reading it into each. The pinned
+    # faiss-cpu 1.7.4 has no IO_FLAG_MMAP_IFC: it maps IVF inverted lists only, so Flat/HNSW indexes
+    # are still copied into every worker and cross-worker sharing covers recipes.bin alone.
+    FAISS_MMAP: bool = True
+    # IVF (IndexIVFFlat, IndexIVFPQ)
+    FAISS_NLIST: int = 0  # Number of clusters, 0 = auto (~4 * sqrt(num_vectors))
+    FAISS_NPROBE: int = 16  # Clusters visited per query (search time)
+    # HNSW (IndexHNSW)
+    FAISS_HNSW_M: int = 32  # Graph neighbours per node
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_HNSW_EF_SEARCH: int = 64  # Search time
+    # Product quantization (IndexIVFPQ)
+    FAISS_PQ_M: int = 48  # Sub-quantizers, must divide EMBEDDING_DIMENSION
+    FAISS_PQ_NBITS: int = 8
+    FAISS_OPQ: bool = False  # Learn an OPQ rotation before IVF-PQ
+    # Thresholded search (min_score / max_distance)
+    FAISS_RANGE_SEARCH: bool = True  # Use index.range_search where supported, else k-NN with a cutoff
+    FAISS_ADAPTIVE_INITIAL_K: int = 10  # First k of adaptive searches, doubled until the threshold cuts the results
+    # "More like this": precomputed neighbours next to the index (python -m app.tools.build_knn_graph)
+    FAISS_KNN_GRAPH_ENABLED: bool = True
+    
+    # Executors (blocking work runs off the event loop)
+    INFERENCE_POOL_SIZE: int = 2  # Concurrent embedding forward passes
+    SEARCH_POOL_SIZE: int = 4  # Concurrent search / scoring requests
+    EXECUTOR_MAX_QUEUE_DEPTH: int = 64  # Queued tasks per pool before returning 503
+    INFERENCE_THREADS: int = 0  # torch threads per inference worker, 0 = cpu_count / INFERENCE_POOL_SIZE
+    SEARCH_THREADS: int = 0  # FAISS OpenMP threads, 0 = 1
+    
+    # In-memory result cache
+    CACHE_MAX_ENTRIES: int = 100_000  # Entries are compact rankings; CACHE_MAX_BYTES is the real bound
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_TTL_SECONDS: float = 300
+    CACHE_NEGATIVE_TTL_SECONDS: float = 60  # Queries with no results
+    
+    # Hot reload of recipes / index (app.services.reload_service)
+    ADMIN_TOKEN: Optional[str] = None  # Enables POST /api/admin/reload with this X-Admin-Token header
+    RELOAD_WATCH_INTERVAL_SECONDS: float = 0  # Poll the data files and reload on change, 0 = off
+    RELOAD_MIN_FREE_MB: int = 256  # Memory that must stay available while two generations coexist
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,22 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
+import asyncio
 import time
 import logging
 from app.config import settings
-from app.routes import recipes, fridge
+from app.utils.executors import configure_thread_limits, inference_executor, limit_native_threads, search_executor
+
+# Before the imports below load numpy and FAISS (and with them BLAS / OpenMP)
+limit_native_threads()
+
+from app.routes import recipes, fridge, admin
 from app.services.faiss_service import faiss_service
+from app.services.fridge_service import fridge_service
+from app.services.recipe_service import recipe_service
+from app.services.reload_service import reload_service
+from app.utils.cache import cache
+from app.utils.embedding_cache import embedding_cache
 
 # Setup logger
 logger = logging.getLogger(__name__)
@@ -33,7 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Process-Time"],  # Frontend'in görebilmesi için
+    expose_headers=["X-Process-Time", "X-Fridge-Cache"],  # Frontend'in görebilmesi için
 )
 
 
@@ -46,12 +57,29 @@ async def startup_event():
     """
     logger.info("🚀 Starting Smart Fridge Chef API...")
     
+    configure_thread_limits()
+    
+    # Load recipes up front so the first search request doesn't parse the
+    # corpus while holding the GIL
+    logger.info(f"Recipes loaded: {recipe_service.get_total_count()}")
+    
+    # Warm the query embedding cache with the most frequent queries
+    if embedding_cache is not None:
+        warmed = embedding_cache.warm(settings.EMBEDDING_CACHE_MEMORY_ENTRIES)
+        logger.info(f"Embedding cache warmed: {warmed} queries")
+    
     # Load FAISS index
     try:
         logger.info("Loading FAISS index...")
         success = faiss_service.load_index()
         
-        if success:
+        # Index positions must point at the served recipes
+        if success and not faiss_service.check_corpus(
+            recipe_service.corpus_fingerprint(), recipe_service.get_total_count()
+        ):
+            logger.warning("⚠️  Running degraded: FAISS index doesn't match the recipes")
+            logger.warning("   Application will continue with string matching fallback")
+        elif success:
             index_info = faiss_service.get_index_info()
             logger.info("✅ FAISS index loaded successfully")
             logger.info(f"   Index type: {index_info.get('index_type', 'unknown')}")
@@ -67,9 +95,24 @@ async def startup_event():
         logger.warning("   Continuing with string matching fallback")
         logger.warning("   Application will continue to run normally")
     
+    # Later changes to the data files are picked up by hot reload
+    reload_service.mark_loaded()
+    if settings.RELOAD_WATCH_INTERVAL_SECONDS > 0:
+        reload_service.start_watching(settings.RELOAD_WATCH_INTERVAL_SECONDS)
+    
     logger.info("✅ API startup completed")
 
 
+# Shutdown event - Persist buffered cache statistics
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the reload watcher, write buffered embedding cache hit counts, close the fridge database"""
+    reload_service.stop_watching()
+    if embedding_cache is not None:
+        embedding_cache.flush()
+    fridge_service.close()
+
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -77,15 +120,51 @@ async def health_check():
     Health check endpoint to verify the API is running
     """
     return {
-        "status": "ok",
+        # Degraded: the index doesn't match the recipes, vector search is off
+        "status": "degraded" if faiss_service.corpus_status == "mismatch" else "ok",
         "timestamp": datetime.now().isoformat(),
         "environment": settings.NODE_ENV
     }
 
 
+# Runtime statistics endpoint
+def _database_stats() -> dict:
+    """Statistics that count rows in SQLite (embedding cache, fridges)"""
+    return {
+        "embedding_cache": embedding_cache.get_stats() if embedding_cache is not None else {"enabled": False},
+        "fridges": fridge_service.get_stats()
+    }
+
+
+@app.get("/stats")
+async def runtime_stats():
+    """
+    Executor and cache statistics (pool usage, rejected requests, hit rates)
+    """
+    # COUNT(*) over large tables takes a while: keep it off the event loop.
+    # Not on the bounded executors, so /stats still answers when they shed load
+    database_stats = await asyncio.get_running_loop().run_in_executor(None, _database_stats)
+    return {
+        "executors": {
+            "inference": inference_executor.get_stats(),
+            "search": search_executor.get_stats()
+        },
+        "cache": cache.get_stats(),
+        **database_stats,
+        "reload": {
+            "reloads": reload_service.reloads,
+            "deferred": reload_service.deferred,
+            "failures": reload_service.failures,
+            "corpus_generation": recipe_service.corpus.generation,
+            "index_generation": faiss_service.generation
+        }
+    }
+
+
 # Include routers
 app.include_router(recipes.router, prefix="/api")
 app.include_router(fridge.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
 
 
 # Root endpoint
@@ -98,7 +177,8 @@ async def root():
         "message": "Smart Fridge Chef API",
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "stats": "/stats"
     }
 
 
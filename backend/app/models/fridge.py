@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 
@@ -7,11 +7,25 @@ class Ingredient(BaseModel):
 
 
 class FridgeRequest(BaseModel):
+    ingredients: List[str] = Field(..., max_length=500)
+
+
+class FridgeIngredientsResponse(BaseModel):
+    """Response of the legacy POST /fridge/ingredients (the original API's shape)"""
+    success: bool
+    message: str
     ingredients: List[str]
 
 
 class FridgeResponse(BaseModel):
     success: bool
     message: str
+    # Stored form: lowercased, deduplicated and sorted
     ingredients: List[str]
-
+    id: str
+    # Ingredient vocabulary terms found in the fridge (from its stored bitset)
+    recognized: List[str] = []
+    # Changes exactly when the ingredients do
+    content_hash: str
+    created_at: float
+    updated_at: float
@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class Recipe(BaseModel):
+    id: Optional[int] = None  # Stable id: row of the recipe in recipes.json
     Title: str
     Ingredients: str  # Stored as a stringified list in the source data
     Instructions: Optional[str] = ""  # Some recipes might not have instructions
@@ -13,6 +14,9 @@ class Recipe(BaseModel):
 class RecipeWithMatch(Recipe):
     matchingCount: int
     matchingIngredients: List[str]
+    # Vector search similarity (higher is better; cosine similarity with FAISS_METRIC="cosine")
+    # or trigram text search score (2 = whole query in the title, else in (0, 1])
+    score: Optional[float] = None
 
 
 class RecipeSearchParams(BaseModel):
@@ -25,13 +29,36 @@ class RecipeRecommendRequest(BaseModel):
     ingredients: List[str]
     use_vector_search: Optional[bool] = True
     top_k: Optional[int] = 50
+    # "relevance" keeps vector / string matching order; the others rank by fridge coverage
+    sort_by: Optional[Literal["relevance", "matching", "coverage", "fewest_missing"]] = "relevance"
+    # Vector search only (422 otherwise): return just the results above a similarity threshold (at most top_k).
+    # min_score is on the `score` scale; max_distance is the squared L2 distance (L2 indexes)
+    # or the cosine distance 1 - similarity (FAISS_METRIC="cosine")
+    min_score: Optional[float] = None
+    max_distance: Optional[float] = Field(None, ge=0)
+    # Start with a small k and grow it only while every result still passes the threshold
+    adaptive: Optional[bool] = False
 
 
 class RecipeRecommendResponse(BaseModel):
     recommendations: List[RecipeWithMatch]
     count: int
     userIngredients: List[str]
-    search_method: str  # "vector" or "string_matching"
+    search_method: str  # "vector", "string_matching" or "ingredient_matrix"
+
+
+class RecipeBatchRecommendRequest(BaseModel):
+    # One ingredient list per fridge; identical fridges are only ranked once
+    fridges: List[List[str]] = Field(..., max_length=1000)
+    use_vector_search: Optional[bool] = True
+    top_k: Optional[int] = 50
+    sort_by: Optional[Literal["relevance", "matching", "coverage", "fewest_missing"]] = "relevance"
+
+
+class RecipeBatchRecommendResponse(BaseModel):
+    results: List[RecipeRecommendResponse]  # One per fridge, in request order
+    count: int
+    unique_fridges: int
 
 
 class RecipeSearchRequest(BaseModel):
@@ -43,5 +70,21 @@ class RecipeSearchResponse(BaseModel):
     recipes: List[RecipeWithMatch]
     count: int
     query: str
-    search_method: str  # "vector" or "string_matching"
+    search_method: str  # "vector", "trigram" or "string_matching"
+
 
+class RecipeBatchGetRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=1000)
+
+
+class RecipeBatchGetResponse(BaseModel):
+    recipes: List[Recipe]  # In request order, unknown ids left out
+    count: int
+    missing: List[int]
+
+
+class RecipeSimilarResponse(BaseModel):
+    recipes: List[RecipeWithMatch]
+    count: int
+    recipe_id: int
+    search_method: str  # "knn_graph" (precomputed) or "vector" (stored vector search)
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from typing import Optional
+import asyncio
+import hmac
+from app.config import settings
+from app.services.reload_service import reload_service
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+def _authorize(token: Optional[str]):
+    """Check the X-Admin-Token header; the admin API is off without ADMIN_TOKEN"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin API is disabled")
+    if token is None or not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.post("/reload", response_model=dict)
+async def reload_data(
+    force: bool = Query(False, description="Reload even if the data files look unchanged"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Reload changed recipe data / FAISS index files without a restart
+
+    Requests keep being served from the current generation while the new
+    one loads.
+    """
+    _authorize(x_admin_token)
+
+    # Loading takes seconds; keep it off the event loop and the search pool
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(None, reload_service.reload, "manual", force)
+
+    if result["status"] == "in_progress":
+        raise HTTPException(status_code=409, detail="A reload is already in progress")
+    if result["status"] == "deferred":
+        raise HTTPException(
+            status_code=503,
+            detail="Not enough free memory to load the new data next to the current one",
+            headers={"Retry-After": "60"}
+        )
+    if result["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Reload failed: {result.get('error')}")
+    return result
+
+
+@router.get("/reload", response_model=dict)
+async def reload_status(x_admin_token: Optional[str] = Header(None)):
+    """
+    Served generations, reload counters and data files changed since the last load
+    """
+    _authorize(x_admin_token)
+    return reload_service.get_stats()
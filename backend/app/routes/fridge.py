@@ -1,33 +1,150 @@
-from fastapi import APIRouter, HTTPException
-from app.models.fridge import FridgeRequest, FridgeResponse
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Literal, Optional
+import asyncio
+import time
+import logging
+from app.models.fridge import FridgeIngredientsResponse, FridgeRequest, FridgeResponse
+from app.models.recipe import RecipeRecommendResponse
+from app.services.fridge_service import fridge_service
+from app.utils.executors import ExecutorOverloaded, search_executor
+from app.utils.json_fragments import parse_fields
+
+# Setup logger
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/fridge", tags=["fridge"])
 
 
-@router.post("/ingredients", response_model=FridgeResponse)
+async def _run(func, *args):
+    """Run a (short, blocking) fridge store call off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _not_found(fridge_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Fridge '{fridge_id}' not found")
+
+
+@router.post("", response_model=FridgeResponse)
 async def save_ingredients(request: FridgeRequest):
     """
-    Save fridge ingredients (placeholder - will be connected to database later)
+    Save fridge ingredients as a new fridge
+
+    The returned id addresses the fridge from then on.
     """
     try:
-        # TODO: Save to database when implemented
-        return FridgeResponse(
-            success=True,
-            message="Ingredients saved",
-            ingredients=request.ingredients
-        )
+        fridge = await _run(fridge_service.create, request.ingredients)
+        return FridgeResponse(success=True, message="Ingredients saved", **fridge)
     except Exception as e:
+        logger.error(f"Error saving fridge: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to save ingredients: {str(e)}")
 
 
-@router.get("/ingredients", response_model=dict)
-async def get_ingredients():
+# Compatibility: the original API's placeholder pair, kept with its
+# behavior and response shapes for existing clients. Declared before
+# /{fridge_id}; generated fridge ids (16 characters) never collide with
+# "ingredients".
+@router.post("/ingredients", response_model=FridgeIngredientsResponse, deprecated=True)
+async def save_ingredients_legacy(request: FridgeRequest):
+    """
+    Echo fridge ingredients (nothing is stored; use POST /fridge to save a fridge)
     """
-    Get saved fridge ingredients (placeholder - will be connected to database later)
+    return FridgeIngredientsResponse(success=True, message="Ingredients saved", ingredients=request.ingredients)
+
+
+@router.get("/ingredients", response_model=dict, deprecated=True)
+async def get_ingredients_legacy():
+    """
+    Always an empty list (use GET /fridge/{fridge_id} for a saved fridge)
+    """
+    return {"ingredients": []}
+
+
+@router.get("/{fridge_id}", response_model=FridgeResponse)
+async def get_ingredients(fridge_id: str):
+    """
+    Get a saved fridge
     """
     try:
-        # TODO: Retrieve from database when implemented
-        return {"ingredients": []}
+        fridge = await _run(fridge_service.get, fridge_id)
     except Exception as e:
+        logger.error(f"Error fetching fridge: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to fetch ingredients: {str(e)}")
+    if fridge is None:
+        raise _not_found(fridge_id)
+    return FridgeResponse(success=True, message="Fridge found", **fridge)
+
+
+@router.put("/{fridge_id}", response_model=FridgeResponse)
+async def update_ingredients(fridge_id: str, request: FridgeRequest):
+    """
+    Replace the ingredients of a saved fridge
+
+    Stored recommendations of the old contents stop applying to it.
+    """
+    try:
+        fridge = await _run(fridge_service.replace, fridge_id, request.ingredients)
+    except Exception as e:
+        logger.error(f"Error updating fridge: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to update ingredients: {str(e)}")
+    if fridge is None:
+        raise _not_found(fridge_id)
+    return FridgeResponse(success=True, message="Ingredients updated", **fridge)
+
+
+@router.delete("/{fridge_id}", response_model=dict)
+async def delete_fridge(fridge_id: str):
+    """
+    Delete a saved fridge
+    """
+    try:
+        deleted = await _run(fridge_service.delete, fridge_id)
+    except Exception as e:
+        logger.error(f"Error deleting fridge: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to delete fridge: {str(e)}")
+    if not deleted:
+        raise _not_found(fridge_id)
+    return {"success": True, "message": "Fridge deleted"}
+
+
+@router.get("/{fridge_id}/recommendations", response_model=RecipeRecommendResponse)
+async def get_recommendations(
+    fridge_id: str,
+    use_vector_search: bool = Query(True),
+    top_k: int = Query(50, ge=1, le=1000),
+    sort_by: Literal["relevance", "matching", "coverage", "fewest_missing"] = Query("relevance"),
+    fields: Optional[str] = Query(None, description="Recipe fields to return, as for /recipes/recommend")
+):
+    """
+    Recipe recommendations for a saved fridge
+
+    Same response as POST /recipes/recommend with the fridge's ingredients.
+    Results are stored per fridge contents and parameters and served as is
+    until the contents change (or different recipe / index data is loaded);
+    X-Fridge-Cache tells whether they were stored (hit) or computed (miss).
+    """
+    start_time = time.time()
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await search_executor.run(
+            fridge_service.recommendations, fridge_id, use_vector_search, top_k, sort_by, projection
+        )
+    except ExecutorOverloaded as e:
+        logger.warning(f"Rejecting fridge recommendation request: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error generating fridge recommendations: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
+    if result is None:
+        raise _not_found(fridge_id)
 
+    body, stored = result
+    logger.info(f"Fridge recommendations {'served' if stored else 'computed'} in {time.time() - start_time:.3f}s")
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"X-Fridge-Cache": "hit" if stored else "miss"}
+    )
@@ -1,55 +1,351 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Iterator, List, Optional, Tuple, Type
+from pydantic import BaseModel
+import numpy as np
 import time
 import logging
 from app.models.recipe import (
     Recipe,
-    RecipeWithMatch,
     RecipeRecommendRequest,
     RecipeRecommendResponse,
+    RecipeBatchRecommendRequest,
+    RecipeBatchRecommendResponse,
     RecipeSearchRequest,
-    RecipeSearchResponse
+    RecipeSearchResponse,
+    RecipeSimilarResponse,
+    RecipeBatchGetRequest,
+    RecipeBatchGetResponse
 )
-from app.services.recipe_service import recipe_service
+from app.services.recipe_service import Hit, RecipeCorpus, recipe_service
 from app.services.faiss_service import faiss_service
 from app.services.embedding_service import embedding_service
+from app.utils.executors import ExecutorOverloaded, search_executor
+from app.config import settings
+from app.utils.json_fragments import encode, json_object, parse_fields
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+NDJSON = "application/x-ndjson"
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated recipe fields to return (id, Title, Ingredients, Instructions, "
+    "Image_Name, Cleaned_Ingredients) and / or a view: summary (id, Title, Image_Name) or all"
+)
+
+
+def _overloaded(e: ExecutorOverloaded) -> HTTPException:
+    """503 response for a full executor queue"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def _projection(fields: Optional[str], default: str = "all") -> Optional[Tuple[str, ...]]:
+    """Recipe fields selected by a fields= parameter (None = all), 400 if invalid"""
+    try:
+        return parse_fields(fields, default)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _wants_ndjson(accept: Optional[str]) -> bool:
+    """Whether the Accept header asks for a streamed application/x-ndjson response"""
+    return accept is not None and any(
+        media_range.split(';')[0].strip().lower() == NDJSON for media_range in accept.split(',')
+    )
+
+
+def _ndjson_chunks(lines: Iterator[bytes]) -> Iterator[bytes]:
+    """Newline-terminated JSON lines, grouped into writes of about STREAM_CHUNK_BYTES"""
+    chunk, size = [], 0
+    try:
+        for line in lines:
+            chunk.append(line)
+            size += len(line) + 1
+            if size >= settings.STREAM_CHUNK_BYTES:
+                yield b'\n'.join(chunk) + b'\n'
+                chunk, size = [], 0
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+    except Exception as e:
+        # The status line is out already: all the client sees is a cut stream
+        logger.error(f"Error while streaming results: {e}", exc_info=True)
+        raise
+
+
+async def _encoded_query(search_args: dict) -> Optional[np.ndarray]:
+    """
+    With micro-batching, the query embedding of a ranking that has to be computed
+    
+    Awaited on the event loop before the search is queued: a search worker
+    blocking on the batcher would hold its slot, and batches could never
+    hold more queries than SEARCH_POOL_SIZE. None if there is nothing to
+    encode (or encoding failed: the search then encodes, or falls back).
+    """
+    if not settings.EMBEDDING_MICRO_BATCHING:
+        return None
+    text = recipe_service.query_text_to_encode(**search_args)
+    if text is None:
+        return None
+    try:
+        return await embedding_service.encode_text_async(text)
+    except Exception as e:
+        logger.warning(f"Query encoding failed: {e}")
+        return None
+
+
+def _json_response(members: List[Tuple[str, bytes]]) -> Response:
+    """application/json response from (key, encoded value) members"""
+    return Response(content=json_object(members), media_type="application/json")
+
+
+def _results_response(
+    response_model: Type[BaseModel],
+    corpus: RecipeCorpus,
+    hits: List[Hit],
+    projection: Optional[Tuple[str, ...]] = None,
+    **fields
+):
+    """
+    Response listing hits as RecipeWithMatch, in the response model's first field
+    
+    Spliced from the corpus' pre-serialized recipe JSON, byte-identical to
+    what FastAPI makes of the response model; built through the model when
+    RESPONSE_FRAGMENTS_ENABLED is off. With a projection the recipes only
+    have the projected fields (and the match fields).
+    """
+    results_field = next(iter(response_model.model_fields))
+    if corpus.fragments is None:
+        if projection is not None:
+            results = recipe_service.to_projected(corpus, hits, projection)
+            return JSONResponse({
+                name: results if name == results_field else fields[name]
+                for name in response_model.model_fields
+            })
+        return response_model(**{results_field: recipe_service.to_models(corpus, hits)}, **fields)
+    return _json_response([
+        (name, corpus.fragments.matches(hits, projection) if name == results_field else encode(fields[name]))
+        for name in response_model.model_fields
+    ])
+
+
+def _batch_results(
+    corpus: RecipeCorpus,
+    fridges: List[List[str]],
+    results: List[Tuple[int, Iterator[Hit]]],
+    search_method: str,
+    projection: Optional[Tuple[str, ...]]
+) -> Iterator[bytes]:
+    """JSON RecipeRecommendResponse of each fridge of a batch, in order"""
+    for ingredients, (count, hits) in zip(fridges, results):
+        yield json_object([
+            ("recommendations", b'[' + b','.join(recipe_service.iter_json(corpus, hits, projection)) + b']'),
+            ("count", encode(count)),
+            ("userIngredients", encode(ingredients)),
+            ("search_method", encode(search_method))
+        ])
+
+
+def _batch_body(results: Iterator[bytes], count: int, unique: int) -> bytes:
+    """JSON RecipeBatchRecommendResponse around the fridges' results"""
+    return json_object([
+        ("results", b'[' + b','.join(results) + b']'),
+        ("count", encode(count)),
+        ("unique_fridges", encode(unique))
+    ])
+
+
+def _vector_text_search(
+    query: str,
+    top_k: int,
+    query_vector: Optional[np.ndarray] = None
+) -> Tuple[RecipeCorpus, List[Hit]]:
+    """Encode a text query (unless already encoded) and search the FAISS index (blocking)"""
+    # Positions are resolved in the corpus generation the index belongs to
+    corpus = recipe_service.corpus
+    if not recipe_service.vector_search_ready(corpus):
+        raise RuntimeError("FAISS index doesn't match the served recipes")
+    generation = faiss_service.generation
+    
+    distances, indices = faiss_service.search_by_text(
+        text=query,
+        k=min(top_k, len(corpus.recipes)),
+        embedding_service=embedding_service,
+        query_vector=query_vector
+    )
+    if faiss_service.generation != generation:
+        raise RuntimeError("FAISS index was reloaded during the search")
+    
+    # For text search, we don't have ingredient matching, so set empty
+    total = len(corpus.recipes)
+    hits = [
+        (int(idx), [], float(score))
+        for idx, score in zip(indices, faiss_service.scores(distances))
+        if 0 <= idx < total
+    ]
+    return corpus, hits
+
+
+def _similar_search(recipe_id: int, top_k: int) -> Optional[Tuple[RecipeCorpus, List[Hit], str]]:
+    """Recipes most similar to a recipe, from its stored vector (blocking); None if the id is unknown"""
+    corpus = recipe_service.corpus
+    position = corpus.position_by_id.get(recipe_id)
+    if position is None:
+        return None
+    if not recipe_service.vector_search_ready(corpus):
+        raise RuntimeError("FAISS index doesn't match the served recipes")
+    generation = faiss_service.generation
+    
+    scores, indices, method = faiss_service.search_similar(position, top_k)
+    if faiss_service.generation != generation:
+        raise RuntimeError("FAISS index was reloaded during the search")
+    
+    total = len(corpus.recipes)
+    hits = [
+        (int(idx), [], float(score))
+        for idx, score in zip(indices, scores)
+        if 0 <= idx < total
+    ]
+    return corpus, hits, method
+
 
 @router.get("/", response_model=dict)
 async def get_recipes(
     ingredients: Optional[str] = Query(None, description="Comma-separated list of ingredients"),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description=f"{FIELDS_DESCRIPTION}; default: summary")
 ):
     """
     Get all recipes with optional filtering by ingredients
+    
+    Returns the summary view of each recipe unless `fields` asks for more
+    (LIST_DEFAULT_FIELDS).
     """
+    projection = _projection(fields, settings.LIST_DEFAULT_FIELDS)
     try:
         if ingredients:
             # Filter by ingredients
             ingredient_list = [ing.strip() for ing in ingredients.split(',')]
-            filtered_recipes = recipe_service.find_suitable_recipes(ingredient_list)
-            recipes = filtered_recipes[offset:offset + limit]
-            total = len(filtered_recipes)
+            corpus, filtered = await search_executor.run(recipe_service.find_suitable_hits, ingredient_list)
+            hits = filtered[offset:offset + limit]
+            total = len(filtered)
+            if corpus.fragments is not None:
+                recipes_json = corpus.fragments.matches(hits, projection)
+            elif projection is not None:
+                recipes = recipe_service.to_projected(corpus, hits, projection)
+            else:
+                recipes = recipe_service.to_models(corpus, hits)
         else:
             # Get all recipes
-            recipes = recipe_service.get_all_recipes(limit, offset)
-            total = recipe_service.get_total_count()
+            corpus = recipe_service.corpus
+            total = len(corpus.recipes)
+            hits = range(offset, min(offset + limit, total))
+            if corpus.fragments is not None:
+                recipes_json = corpus.fragments.recipes(hits, projection)
+            elif projection is not None:
+                recipes = [corpus.recipes.project(idx, projection) for idx in hits]
+            else:
+                recipes = corpus.recipes[offset:offset + limit]
         
+        if corpus.fragments is not None:
+            return _json_response([
+                ("recipes", recipes_json),
+                ("total", encode(total)),
+                ("count", encode(len(hits)))
+            ])
         return {
             "recipes": recipes,
             "total": total,
             "count": len(recipes)
         }
+    except ExecutorOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch recipes: {str(e)}")
 
 
+@router.get("/by-id/{recipe_id}", response_model=Recipe)
+async def get_recipe_by_id(recipe_id: int):
+    """
+    Get a specific recipe by its stable id
+    """
+    recipe = recipe_service.get_recipe_by_id(recipe_id)
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return recipe
+
+
+@router.post("/batch-get", response_model=RecipeBatchGetResponse)
+async def batch_get_recipes(
+    request: RecipeBatchGetRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Get many recipes by stable id in one request (e.g. a recommendation set)
+    """
+    projection = _projection(fields)
+    corpus = recipe_service.corpus
+    positions = [corpus.position_by_id.get(recipe_id) for recipe_id in request.ids]
+    found = [idx for idx in positions if idx is not None]
+    missing = [recipe_id for recipe_id, idx in zip(request.ids, positions) if idx is None]
+    if corpus.fragments is not None:
+        return _json_response([
+            ("recipes", corpus.fragments.recipes(found, projection)),
+            ("count", encode(len(found))),
+            ("missing", encode(missing))
+        ])
+    if projection is not None:
+        return JSONResponse({
+            "recipes": [corpus.recipes.project(idx, projection) for idx in found],
+            "count": len(found),
+            "missing": missing
+        })
+    return RecipeBatchGetResponse(
+        recipes=[corpus.recipes.get(idx) for idx in found],
+        count=len(found),
+        missing=missing
+    )
+
+
+@router.get("/{recipe_id}/similar", response_model=RecipeSimilarResponse)
+async def get_similar_recipes(
+    recipe_id: int,
+    top_k: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Get recipes similar to a recipe ("more like this")
+    
+    Uses the recipe's stored vector (or the precomputed kNN graph), so the
+    embedding model is not run.
+    """
+    projection = _projection(fields)
+    if not faiss_service.is_loaded():
+        raise HTTPException(status_code=503, detail="Vector index is not available")
+    
+    try:
+        found = await search_executor.run(_similar_search, recipe_id, top_k)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        corpus, hits, method = found
+        return _results_response(
+            RecipeSimilarResponse, corpus, hits, projection,
+            count=len(hits),
+            recipe_id=recipe_id,
+            search_method=method
+        )
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Error finding similar recipes: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to find similar recipes: {str(e)}")
+
+
 @router.get("/{title}", response_model=Recipe)
 async def get_recipe(title: str):
     """
@@ -68,14 +364,28 @@ async def get_recipe(title: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch recipe: {str(e)}")
 
 
-@router.post("/recommend", response_model=RecipeRecommendResponse)
-async def recommend_recipes(request: RecipeRecommendRequest):
+@router.post(
+    "/recommend",
+    response_model=RecipeRecommendResponse,
+    responses={200: {"content": {NDJSON: {"description": "One RecipeWithMatch per line"}}}}
+)
+async def recommend_recipes(
+    request: RecipeRecommendRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    accept: Optional[str] = Header(None)
+):
     """
     Get recipe recommendations based on fridge ingredients using vector search
     
     Uses FAISS vector search if available, falls back to string matching.
+    
+    With `Accept: application/x-ndjson` the recommendations are streamed as
+    one RecipeWithMatch JSON object per line, written as they are
+    materialized; count and search method are in the X-Result-Count and
+    X-Search-Method headers. Good for large top_k values and exports.
     """
     start_time = time.time()
+    projection = _projection(fields)
     
     try:
         if not request.ingredients:
@@ -84,37 +394,161 @@ async def recommend_recipes(request: RecipeRecommendRequest):
         # Determine search method
         use_vector_search = request.use_vector_search if request.use_vector_search is not None else True
         top_k = request.top_k if request.top_k is not None else 50
+        sort_by = request.sort_by if request.sort_by is not None else "relevance"
         
         # Check if vector search is available
-        search_method = "vector" if (use_vector_search and faiss_service.is_loaded()) else "string_matching"
+        if sort_by != "relevance":
+            search_method = "ingredient_matrix"
+        else:
+            search_method = "vector" if (use_vector_search and faiss_service.is_loaded()) else "string_matching"
+        
+        # Similarity thresholds only apply to vector search: rather than
+        # silently returning unthresholded results, reject them otherwise
+        min_score = None
+        if request.min_score is not None or request.max_distance is not None:
+            if search_method != "vector":
+                reason = (
+                    f"sort_by={sort_by!r} ranks by ingredient coverage" if sort_by != "relevance"
+                    else "use_vector_search is false" if not use_vector_search
+                    else "vector search is unavailable"
+                )
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"min_score / max_distance only apply to vector search, but {reason}"
+                )
+            try:
+                min_score = faiss_service.score_threshold(request.min_score, request.max_distance)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
         logger.info(f"Recipe recommendation request: {len(request.ingredients)} ingredients, method: {search_method}")
         
-        # Get recommendations
-        recommendations = recipe_service.find_suitable_recipes(
+        search_args = dict(
             user_ingredients=request.ingredients,
             use_vector_search=use_vector_search,
-            top_k=top_k
+            top_k=top_k,
+            sort_by=sort_by,
+            min_score=min_score,
+            adaptive=bool(request.adaptive)
+        )
+        
+        query_vector = await _encoded_query(search_args)
+        
+        if _wants_ndjson(accept):
+            # Only the ranking is computed here; hits are resolved and
+            # serialized chunk by chunk while the response is written
+            corpus, count, hits = await search_executor.run(
+                recipe_service.stream_suitable_hits, **search_args, query_vector=query_vector
+            )
+            logger.info(f"Ranking computed in {time.time() - start_time:.3f}s: streaming {count} results")
+            return StreamingResponse(
+                _ndjson_chunks(recipe_service.iter_json(corpus, hits, projection)),
+                media_type=NDJSON,
+                headers={"X-Result-Count": str(count), "X-Search-Method": search_method}
+            )
+        
+        # Get recommendations
+        corpus, recommendations = await search_executor.run(
+            recipe_service.find_suitable_hits, **search_args, query_vector=query_vector
         )
         
         process_time = time.time() - start_time
         logger.info(f"Recommendations generated in {process_time:.3f}s: {len(recommendations)} results")
         
-        return RecipeRecommendResponse(
-            recommendations=recommendations,
+        return _results_response(
+            RecipeRecommendResponse, corpus, recommendations, projection,
             count=len(recommendations),
             userIngredients=request.ingredients,
             search_method=search_method
         )
     except HTTPException:
         raise
+    except ExecutorOverloaded as e:
+        logger.warning(f"Rejecting recommendation request: {e}")
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error generating recommendations: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to generate recommendations: {str(e)}")
 
 
+@router.post(
+    "/recommend/batch",
+    response_model=RecipeBatchRecommendResponse,
+    responses={200: {"content": {NDJSON: {"description": "One RecipeRecommendResponse per line"}}}}
+)
+async def recommend_recipes_batch(
+    request: RecipeBatchRecommendRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Get recipe recommendations for many fridges in one call (e.g. nightly jobs)
+    
+    Each fridge gets what POST /recommend returns for it. Identical fridges
+    are ranked once, and all vector searches share one encode call and one
+    index search.
+    
+    With `Accept: application/x-ndjson` the per-fridge results are streamed,
+    one per line in request order; the X-Result-Count and X-Unique-Fridges
+    headers replace `count` and `unique_fridges`.
+    """
+    start_time = time.time()
+    projection = _projection(fields)
+    
+    try:
+        for i, ingredients in enumerate(request.fridges):
+            if not ingredients:
+                raise HTTPException(status_code=400, detail=f"Ingredients list of fridge {i} is empty")
+        
+        use_vector_search = request.use_vector_search if request.use_vector_search is not None else True
+        top_k = request.top_k if request.top_k is not None else 50
+        sort_by = request.sort_by if request.sort_by is not None else "relevance"
+        
+        if sort_by != "relevance":
+            search_method = "ingredient_matrix"
+        else:
+            search_method = "vector" if (use_vector_search and faiss_service.is_loaded()) else "string_matching"
+        
+        logger.info(f"Batch recommendation request: {len(request.fridges)} fridges, method: {search_method}")
+        
+        corpus, unique, results = await search_executor.run(
+            recipe_service.find_suitable_hits_batch,
+            fridges=request.fridges,
+            use_vector_search=use_vector_search,
+            top_k=top_k,
+            sort_by=sort_by
+        )
+        logger.info(
+            f"Batch rankings computed in {time.time() - start_time:.3f}s: "
+            f"{len(request.fridges)} fridges, {unique} distinct"
+        )
+        
+        lines = _batch_results(corpus, request.fridges, results, search_method, projection)
+        if _wants_ndjson(accept):
+            return StreamingResponse(
+                _ndjson_chunks(lines),
+                media_type=NDJSON,
+                headers={"X-Result-Count": str(len(request.fridges)), "X-Unique-Fridges": str(unique)}
+            )
+        
+        # Materializing a large batch takes a while: keep it off the event loop
+        body = await search_executor.run(_batch_body, lines, len(request.fridges), unique)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        logger.warning(f"Rejecting batch recommendation request: {e}")
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Error generating batch recommendations: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to generate batch recommendations: {str(e)}")
+
+
 @router.post("/search", response_model=RecipeSearchResponse)
-async def search_recipes(request: RecipeSearchRequest):
+async def search_recipes(
+    request: RecipeSearchRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """
     Search recipes by text query using vector similarity search
     
@@ -124,6 +558,7 @@ async def search_recipes(request: RecipeSearchRequest):
     - "quick breakfast recipe"
     """
     start_time = time.time()
+    projection = _projection(fields)
     
     try:
         if not request.query or not request.query.strip():
@@ -136,74 +571,49 @@ async def search_recipes(request: RecipeSearchRequest):
             try:
                 logger.info(f"Text search request: '{request.query}', method: vector")
                 
-                # Search using FAISS
-                distances, indices = faiss_service.search_by_text(
-                    text=request.query,
-                    k=min(top_k, recipe_service.get_total_count()),
-                    embedding_service=embedding_service
-                )
+                # With micro-batching the encode is awaited here, not in a search worker
+                query_vector = None
+                if settings.EMBEDDING_MICRO_BATCHING:
+                    query_vector = await embedding_service.encode_text_async(request.query)
                 
-                # Convert results to RecipeWithMatch
-                results = []
-                recipes = recipe_service.get_all_recipes(limit=recipe_service.get_total_count())
-                
-                for idx, dist in zip(indices, distances):
-                    if idx < len(recipes):
-                        recipe = recipes[idx]
-                        # For text search, we don't have ingredient matching, so set empty
-                        results.append(
-                            RecipeWithMatch(
-                                **recipe.dict(),
-                                matchingCount=0,
-                                matchingIngredients=[]
-                            )
-                        )
+                # Search using FAISS
+                corpus, results = await search_executor.run(_vector_text_search, request.query, top_k, query_vector)
                 
                 process_time = time.time() - start_time
                 logger.info(f"Text search completed in {process_time:.3f}s: {len(results)} results")
                 
-                return RecipeSearchResponse(
-                    recipes=results,
+                return _results_response(
+                    RecipeSearchResponse, corpus, results, projection,
                     count=len(results),
                     query=request.query,
                     search_method="vector"
                 )
                 
+            except ExecutorOverloaded:
+                raise
             except Exception as e:
-                logger.warning(f"Vector search failed: {e}, falling back to string matching")
-                # Fall through to string matching
-        
-        # Fallback: Simple string matching in recipe titles
-        logger.info(f"Text search request: '{request.query}', method: string_matching")
-        recipes = recipe_service.get_all_recipes(limit=recipe_service.get_total_count())
-        
-        query_lower = request.query.lower()
-        results = []
-        
-        for recipe in recipes:
-            if query_lower in recipe.Title.lower():
-                results.append(
-                    RecipeWithMatch(
-                        **recipe.dict(),
-                        matchingCount=0,
-                        matchingIngredients=[]
-                    )
-                )
-                if len(results) >= top_k:
-                    break
+                logger.warning(f"Vector search failed: {e}, falling back to the text index")
+                # Fall through to the text index
+        
+        # Fallback: trigram index over titles and ingredients
+        logger.info(f"Text search request: '{request.query}', method: text index")
+        corpus, results, search_method = await search_executor.run(recipe_service.search_text, request.query, top_k)
         
         process_time = time.time() - start_time
         logger.info(f"Text search completed in {process_time:.3f}s: {len(results)} results")
         
-        return RecipeSearchResponse(
-            recipes=results,
+        return _results_response(
+            RecipeSearchResponse, corpus, results, projection,
             count=len(results),
             query=request.query,
-            search_method="string_matching"
+            search_method=search_method
         )
         
     except HTTPException:
         raise
+    except ExecutorOverloaded as e:
+        logger.warning(f"Rejecting search request: {e}")
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"Error in text search: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to search recipes: {str(e)}")
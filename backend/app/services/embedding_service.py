@@ -3,17 +3,27 @@ Embedding Service
 Handles recipe vectorization using sentence-transformers
 """
 
+import asyncio
 import os
 import logging
-from typing import List, Optional
+import threading
+from concurrent.futures import Future
+from typing import Any, List, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.embedding_cache import embedding_cache
+from app.utils.ingredient_vectors import IngredientVectors, ingredient_query_text
+from app.utils.executors import inference_executor, inference_threads
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+INGREDIENT_EMBEDDINGS_PATH = os.path.join(DATA_DIR, 'ingredient_embeddings.npy')
+INGREDIENT_EMBEDDINGS_METADATA_PATH = os.path.join(DATA_DIR, 'ingredient_embeddings_metadata.json')
+
 
 class EmbeddingService:
     """
@@ -22,23 +32,70 @@ class EmbeddingService:
     """
     
     def __init__(self):
-        self.model: Optional[SentenceTransformer] = None
+        # SentenceTransformer (torch backend) or OnnxSentenceEncoder (onnx backend)
+        self.model: Optional[Any] = None
         self.model_name = settings.EMBEDDING_MODEL
+        self.backend = settings.EMBEDDING_BACKEND
+        # Unit-length embeddings for the cosine index metric
+        self.normalize = settings.FAISS_METRIC == "cosine"
         self.dimension = settings.EMBEDDING_DIMENSION
         self._model_loaded = False
+        # Encoding runs on executor and batcher threads: the first callers
+        # may arrive together, only one of them loads the model
+        self._model_lock = threading.Lock()
+        self._ingredient_vectors: Optional[IngredientVectors] = None
+        self._ingredient_vectors_loaded = False
+        self._batcher = MicroBatcher(
+            self.encode_texts,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            name="embedding-batcher"
+        )
     
     def _load_model(self):
         """Lazy load the embedding model (only when needed)"""
-        if not self._model_loaded:
-            logger.info(f"Loading embedding model: {self.model_name}...")
+        if self._model_loaded:
+            return
+        with self._model_lock:
+            if self._model_loaded:
+                return
+            logger.info(f"Loading embedding model: {self.model_name} ({self.backend} backend)...")
             try:
-                self.model = SentenceTransformer(self.model_name)
+                if self.backend == "onnx":
+                    self.model = self._load_onnx_model()
+                else:
+                    self.model = self._load_torch_model()
                 self._model_loaded = True
                 logger.info(f"Embedding model loaded successfully (dimension: {self.dimension})")
             except Exception as e:
                 logger.error(f"Error loading embedding model: {e}", exc_info=True)
                 raise RuntimeError(f"Failed to load embedding model '{self.model_name}': {e}") from e
     
+    def _load_torch_model(self):
+        """sentence-transformers on PyTorch; torch is only imported here"""
+        from sentence_transformers import SentenceTransformer
+        import torch
+        
+        model = SentenceTransformer(self.model_name)
+        # Each inference worker gets its share of the cores
+        torch.set_num_threads(inference_threads())
+        return model
+    
+    def _load_onnx_model(self):
+        """The exported model on ONNX Runtime, from a local directory (no network)"""
+        from app.utils.onnx_encoder import OnnxSentenceEncoder
+        
+        model_dir = os.path.join(os.path.dirname(DATA_DIR), settings.EMBEDDING_ONNX_DIR)
+        model = OnnxSentenceEncoder(
+            model_dir,
+            quantized=settings.EMBEDDING_ONNX_QUANTIZED,
+            threads=inference_threads()
+        )
+        if model.dimension != self.dimension:
+            raise ValueError(f"ONNX model dimension ({model.dimension}) doesn't match expected ({self.dimension})")
+        logger.info(f"ONNX model: {model.model_path}")
+        return model
+    
     def _prepare_recipe_text(self, recipe: Recipe) -> str:
         """
         Combine recipe fields into a single text for embedding
@@ -82,7 +139,7 @@ class EmbeddingService:
             self._load_model()
         
         recipe_text = self._prepare_recipe_text(recipe)
-        embedding = self.model.encode(recipe_text, convert_to_numpy=True)
+        embedding = self.model.encode(recipe_text, convert_to_numpy=True, normalize_embeddings=self.normalize)
         
         return embedding
     
@@ -109,6 +166,7 @@ class EmbeddingService:
             recipe_texts,
             batch_size=batch_size,
             convert_to_numpy=True,
+            normalize_embeddings=self.normalize,
             show_progress_bar=True
         )
         
@@ -124,18 +182,166 @@ class EmbeddingService:
         Returns:
             numpy array of shape (dimension,)
         """
+        if settings.EMBEDDING_MICRO_BATCHING:
+            # Concurrent callers share one forward pass
+            return self._submit(text).result()
+        
+        if embedding_cache is not None:
+            cached = embedding_cache.get(text)
+            if cached is not None:
+                return cached
+        
         if not self._model_loaded:
             self._load_model()
+        embedding = inference_executor.call(
+            self.model.encode, text, convert_to_numpy=True, normalize_embeddings=self.normalize
+        )
         
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        if embedding_cache is not None:
+            embedding_cache.put(text, embedding)
         return embedding
     
+    async def encode_text_async(self, text: str) -> np.ndarray:
+        """
+        encode_text() for the event loop, with EMBEDDING_MICRO_BATCHING on
+        
+        Awaits the micro-batcher instead of blocking a worker thread on it:
+        callers waiting on bounded search workers could never fill a batch
+        beyond the search pool size.
+        
+        Args:
+            text: Input text string
+            
+        Returns:
+            numpy array of shape (dimension,)
+        """
+        return await asyncio.wrap_future(self._submit(text))
+    
+    def _submit(self, text: str) -> Future:
+        """Queue a text for the micro-batcher; an embedding in the in-memory cache is returned right away"""
+        if embedding_cache is not None:
+            cached = embedding_cache.get_memory(text)
+            if cached is not None:
+                future: Future = Future()
+                future.set_result(cached)
+                return future
+        # The batch looks up (on disk) and stores the embeddings of all its texts
+        return self._batcher.submit(text)
+    
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for several query texts in one forward pass
+        
+        Args:
+            texts: List of input text strings
+            
+        Returns:
+            numpy array of shape (len(texts), dimension)
+        """
+        if embedding_cache is None:
+            return self._encode_batch(texts)
+        
+        embeddings = [embedding_cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self._encode_batch([texts[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                embedding_cache.put(texts[i], embedding)
+        
+        if not embeddings:
+            return np.empty((0, self.dimension), dtype='float32')
+        return np.vstack(embeddings)
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """One uncached forward pass over `texts`, shape (len(texts), dimension)"""
+        if not self._model_loaded:
+            self._load_model()
+        
+        embeddings = inference_executor.call(
+            self.model.encode, texts, batch_size=max(len(texts), 1), convert_to_numpy=True,
+            normalize_embeddings=self.normalize
+        )
+        return embeddings.reshape(len(texts), self.dimension)
+    
+    def get_ingredient_vectors(self) -> Optional[IngredientVectors]:
+        """Precomputed vocabulary vectors (lazy loaded), None if not built for the current model"""
+        if not self._ingredient_vectors_loaded:
+            try:
+                self._ingredient_vectors = IngredientVectors.load(
+                    INGREDIENT_EMBEDDINGS_PATH,
+                    INGREDIENT_EMBEDDINGS_METADATA_PATH,
+                    self.model_name,
+                    self.dimension
+                )
+                if self._ingredient_vectors is not None:
+                    logger.info(f"Ingredient embeddings loaded: {len(self._ingredient_vectors)} ingredients")
+            except Exception as e:
+                logger.warning(f"Failed to load ingredient embeddings: {e}")
+            self._ingredient_vectors_loaded = True
+        return self._ingredient_vectors
+    
+    def encode_ingredients(self, ingredients: List[str]) -> np.ndarray:
+        """
+        Generate a query embedding for a list of ingredients
+        
+        Known vocabulary ingredients are pooled from their precomputed
+        vectors; only unknown ones go through the model (one batch). Without
+        precomputed vectors the whole ingredient query text is encoded.
+        
+        Args:
+            ingredients: List of ingredient names
+            
+        Returns:
+            numpy array of shape (dimension,)
+        """
+        vectors = self.get_ingredient_vectors()
+        if vectors is None:
+            return self.encode_text(ingredient_query_text(ingredients))
+        
+        rows, unknown = vectors.split(ingredients)
+        extra = self.encode_texts([ingredient_query_text([name]) for name in unknown]) if unknown else None
+        return vectors.pool(rows, extra)
+    
+    def encode_ingredients_batch(self, fridges: List[List[str]]) -> np.ndarray:
+        """
+        Query embeddings for several ingredient lists, with at most one model call
+        
+        Same vectors as encode_ingredients() for each list; the unknown
+        ingredients of all lists are encoded together.
+        
+        Args:
+            fridges: Ingredient lists
+            
+        Returns:
+            numpy array of shape (len(fridges), dimension)
+        """
+        if not fridges:
+            return np.empty((0, self.dimension), dtype='float32')
+        vectors = self.get_ingredient_vectors()
+        if vectors is None:
+            return self.encode_texts([ingredient_query_text(ingredients) for ingredients in fridges])
+        
+        splits = [vectors.split(ingredients) for ingredients in fridges]
+        unknown = list(dict.fromkeys(name for _, names in splits for name in names))
+        encoded = self.encode_texts([ingredient_query_text([name]) for name in unknown]) if unknown else None
+        row_of = {name: i for i, name in enumerate(unknown)}
+        return np.vstack([
+            vectors.pool(rows, encoded[[row_of[name] for name in names]] if names else None)
+            for rows, names in splits
+        ])
+    
     def get_model_info(self) -> dict:
         """Get information about the loaded model"""
         return {
             "model_name": self.model_name,
+            "backend": self.backend,
             "dimension": self.dimension,
-            "loaded": self._model_loaded
+            "loaded": self._model_loaded,
+            "micro_batching": settings.EMBEDDING_MICRO_BATCHING,
+            "compositional_queries": settings.EMBEDDING_COMPOSITIONAL_QUERIES,
+            "batch_stats": self._batcher.get_stats(),
+            "cache": embedding_cache.get_stats() if embedding_cache is not None else {"enabled": False}
         }
 
 
@@ -12,11 +12,35 @@ from typing import List, Tuple, Optional
 import logging
 from app.config import settings
 from app.models.recipe import Recipe
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.ingredient_vectors import ingredient_query_text
+from app.utils.index_map import IndexMap, write_index_map
+from app.utils.knn_graph import KnnGraph
+from app.utils.recipe_store import corpus_fingerprint
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
 
+def index_type_of(index: faiss.Index) -> str:
+    """
+    FAISS_INDEX_TYPE name of a built index, "+OPQ" with a rotation
+
+    Flat indexes are named by their metric: cosine mode builds an inner
+    product index even when FAISS_INDEX_TYPE is IndexFlatL2.
+    """
+    suffix = ""
+    if isinstance(index, faiss.IndexPreTransform):
+        index, suffix = faiss.downcast_index(index.index), "+OPQ"
+    if isinstance(index, faiss.IndexFlat):
+        name = "IndexFlatIP" if index.metric_type == faiss.METRIC_INNER_PRODUCT else "IndexFlatL2"
+    elif isinstance(index, faiss.IndexHNSW):
+        name = "IndexHNSW"
+    else:
+        name = type(index).__name__
+    return name + suffix
+
+
 class FAISSService:
     """
     Service for FAISS-based similarity search
@@ -25,29 +49,204 @@ class FAISSService:
     
     def __init__(self):
         self.index: Optional[faiss.Index] = None
-        self.embeddings: Optional[np.ndarray] = None
+        self._embeddings: Optional[np.ndarray] = None
         self.recipes: Optional[List[Recipe]] = None
         self.index_path = Path(__file__).parent.parent.parent / settings.FAISS_INDEX_PATH
         self.metadata_path = self.index_path.parent / 'recipe_index_metadata.json'
+        self.embeddings_path = self.index_path.parent / 'recipe_embeddings.npy'
+        self.map_path = self.index_path.parent / 'recipe_index.map'
         self.dimension = settings.EMBEDDING_DIMENSION
+        self.index_params: dict = {}
+        self.index_mmapped = False
+        # Cosine mode: vectors are L2-normalized at build time, queries at search time
+        self.normalized = settings.FAISS_METRIC == "cosine"
+        self._knn_graph: Optional[KnnGraph] = None
+        self._knn_graph_checked = False
+        # Corpus the index was built from (None for indexes built before maps existed)
+        self.index_map: Optional[IndexMap] = None
+        # "unchecked", "ok", "unverified" (no map) or "mismatch" (degraded: no vector search)
+        self.corpus_status = "unchecked"
+        # Incremented whenever a different index is served (load, build, hot reload)
+        self.generation = 0
         self._index_loaded = False
+        # Encodes and searches concurrent text queries together (EMBEDDING_MICRO_BATCHING)
+        self._text_batcher = MicroBatcher(
+            self._search_text_batch,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            name="faiss-text-batcher"
+        )
     
-    def _create_index(self) -> faiss.Index:
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
         """
-        Create a new FAISS index based on configuration
+        Recipe embeddings (for reference, not required for search)
+        
+        Opened read-only memory-mapped on first access, so workers that
+        never touch them don't pay for them.
         """
-        index_type = settings.FAISS_INDEX_TYPE
+        if self._embeddings is None and self.embeddings_path.exists():
+            try:
+                self._embeddings = np.load(self.embeddings_path, mmap_mode='r')
+                logger.debug(f"Embeddings mapped: {self._embeddings.shape}")
+            except Exception as e:
+                logger.debug(f"Failed to load embeddings file (optional): {e}")
+        return self._embeddings
+    
+    @embeddings.setter
+    def embeddings(self, value: Optional[np.ndarray]):
+        self._embeddings = value
+    
+    @property
+    def knn_graph(self) -> Optional[KnnGraph]:
+        """
+        Precomputed neighbour graph of the loaded index (python -m app.tools.build_knn_graph)
         
-        if index_type == "IndexFlatL2":
-            index = faiss.IndexFlatL2(self.dimension)
-        elif index_type == "IndexFlatIP":
-            index = faiss.IndexFlatIP(self.dimension)
-        else:
+        Mapped on first access; None when disabled, missing or built for
+        another index file.
+        """
+        if not self._knn_graph_checked and self.index is not None and settings.FAISS_KNN_GRAPH_ENABLED:
+            self._knn_graph_checked = True
+            try:
+                self._knn_graph = KnnGraph.load(str(self.index_path.parent), str(self.index_path), self.index.ntotal)
+                if self._knn_graph is not None:
+                    logger.info(f"kNN graph mapped: {len(self._knn_graph)} x {self._knn_graph.neighbors}")
+            except Exception as e:
+                logger.warning(f"Failed to load kNN graph (optional): {e}")
+        return self._knn_graph
+    
+    def _metric(self, index_type: str) -> int:
+        """FAISS metric for an index type (flat types pin their own metric; cosine mode is always inner product)"""
+        if index_type == "IndexFlatIP":
+            return faiss.METRIC_INNER_PRODUCT
+        if index_type == "IndexFlatL2" and settings.FAISS_METRIC != "cosine":
+            return faiss.METRIC_L2
+        return faiss.METRIC_INNER_PRODUCT if settings.FAISS_METRIC in ("IP", "cosine") else faiss.METRIC_L2
+    
+    def _prepare_queries(self, query_vectors: np.ndarray) -> np.ndarray:
+        """Float32 C-contiguous copy of (n, d) queries, L2-normalized in cosine mode"""
+        queries = np.array(query_vectors, dtype='float32', order='C', copy=True)
+        if self.normalized:
+            faiss.normalize_L2(queries)
+        return queries
+    
+    def scores(self, distances: np.ndarray) -> np.ndarray:
+        """
+        Similarity scores (higher is better) for FAISS distances
+        
+        Cosine similarity in cosine mode, the inner product for IP indexes and
+        the negated squared L2 distance for L2 indexes.
+        """
+        if self.index is not None and self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return distances
+        return -distances
+    
+    def _index_params(self, index_type: str, num_vectors: int) -> dict:
+        """
+        Build-time and search-time parameters for an index type
+        
+        Args:
+            index_type: One of the FAISS_INDEX_TYPE options
+            num_vectors: Number of vectors the index will hold
+            
+        Returns:
+            Parameter dict (empty for flat indexes)
+        """
+        if index_type in ("IndexIVFFlat", "IndexIVFPQ"):
+            nlist = settings.FAISS_NLIST or int(4 * np.sqrt(num_vectors))
+            params = {
+                "nlist": max(1, min(nlist, num_vectors)),
+                "nprobe": settings.FAISS_NPROBE
+            }
+            if index_type == "IndexIVFPQ":
+                if self.dimension % settings.FAISS_PQ_M != 0:
+                    raise ValueError(
+                        f"FAISS_PQ_M ({settings.FAISS_PQ_M}) must divide the "
+                        f"embedding dimension ({self.dimension})"
+                    )
+                params.update({
+                    "pq_m": settings.FAISS_PQ_M,
+                    "pq_nbits": settings.FAISS_PQ_NBITS,
+                    "opq": settings.FAISS_OPQ
+                })
+            return params
+        
+        if index_type == "IndexHNSW":
+            return {
+                "M": settings.FAISS_HNSW_M,
+                "efConstruction": settings.FAISS_HNSW_EF_CONSTRUCTION,
+                "efSearch": settings.FAISS_HNSW_EF_SEARCH
+            }
+        
+        return {}
+    
+    def _create_index(
+        self,
+        embeddings: np.ndarray,
+        index_type: Optional[str] = None
+    ) -> Tuple[faiss.Index, dict]:
+        """
+        Create a new (trained, empty) FAISS index based on configuration
+        
+        Args:
+            embeddings: Float32 array of shape (num_vectors, dimension), used
+                for training IVF / PQ indexes
+            index_type: Override for settings.FAISS_INDEX_TYPE
+            
+        Returns:
+            Tuple of (index, parameters used to build it)
+        
+        Only the flat types are exact. IVF / HNSW / IVF-PQ trade recall for
+        speed and their recall on real recipe embeddings has not been
+        validated (see app.tools.bench_faiss_index).
+        """
+        index_type = index_type or settings.FAISS_INDEX_TYPE
+        
+        if index_type not in ("IndexFlatL2", "IndexFlatIP", "IndexIVFFlat", "IndexHNSW", "IndexIVFPQ"):
             # Default to IndexFlatL2
             logger.warning(f"Unknown index type '{index_type}', using IndexFlatL2 as default")
-            index = faiss.IndexFlatL2(self.dimension)
+            index_type = "IndexFlatL2"
+        
+        if index_type not in ("IndexFlatL2", "IndexFlatIP"):
+            logger.warning(
+                f"{index_type} is approximate and unvalidated on real embeddings; "
+                f"check its recall with python -m app.tools.bench_faiss_index before serving it"
+            )
         
-        return index
+        metric = self._metric(index_type)
+        params = self._index_params(index_type, embeddings.shape[0])
+        
+        if index_type == "IndexIVFFlat":
+            index = faiss.index_factory(self.dimension, f"IVF{params['nlist']},Flat", metric)
+        elif index_type == "IndexIVFPQ":
+            description = f"IVF{params['nlist']},PQ{params['pq_m']}x{params['pq_nbits']}"
+            if params["opq"]:
+                description = f"OPQ{params['pq_m']},{description}"
+            index = faiss.index_factory(self.dimension, description, metric)
+        elif index_type == "IndexHNSW":
+            index = faiss.index_factory(self.dimension, f"HNSW{params['M']},Flat", metric)
+            index.hnsw.efConstruction = params["efConstruction"]
+        else:
+            index = faiss.index_factory(self.dimension, "Flat", metric)
+        
+        if not index.is_trained:
+            logger.info(f"Training {index_type} on {embeddings.shape[0]} vectors...")
+            index.train(embeddings)
+        
+        self._apply_search_params(index, params)
+        
+        return index, params
+    
+    def _apply_search_params(self, index: faiss.Index, params: dict):
+        """Set search-time parameters (nprobe / efSearch) on an index that supports them"""
+        parameter_space = faiss.ParameterSpace()
+        for name in ("nprobe", "efSearch"):
+            if name not in params:
+                continue
+            try:
+                parameter_space.set_index_parameter(index, name, params[name])
+            except RuntimeError:
+                logger.debug(f"Index {type(index).__name__} has no '{name}' parameter")
     
     def build_index(self, embeddings: np.ndarray, recipes: List[Recipe]) -> bool:
         """
@@ -72,24 +271,35 @@ class FAISSService:
             if embeddings.shape[1] != self.dimension:
                 raise ValueError(f"Embedding dimension ({embeddings.shape[1]}) doesn't match expected ({self.dimension})")
             
-            # Create index
-            index = self._create_index()
+            # Cosine mode normalizes (a copy of) the vectors so inner product
+            # equals cosine similarity; L2 and IP keep them as-is
+            normalized = settings.FAISS_METRIC == "cosine"
+            if normalized:
+                embeddings_normalized = np.array(embeddings, dtype='float32', order='C', copy=True)
+                faiss.normalize_L2(embeddings_normalized)
+            else:
+                embeddings_normalized = np.ascontiguousarray(embeddings, dtype='float32')
             
-            # Normalize embeddings for L2 distance (optional, but recommended)
-            # For cosine similarity, we'd normalize, but for L2 we keep as-is
-            embeddings_normalized = embeddings.astype('float32')
+            # Create (and train, for IVF / PQ) index
+            index, params = self._create_index(embeddings_normalized)
             
             # Add vectors to index
             index.add(embeddings_normalized)
             
             logger.info("FAISS index built successfully")
-            logger.info(f"  Index type: {type(index).__name__}")
+            logger.info(f"  Index type: {index_type_of(index)}")
             logger.info(f"  Total vectors: {index.ntotal}")
+            logger.info(f"  Parameters: {params}")
             
             # Save index
             self.index = index
+            self.index_params = params
+            self.index_mmapped = False
+            self.normalized = normalized
             self.embeddings = embeddings_normalized
             self.recipes = recipes
+            self._knn_graph, self._knn_graph_checked = None, False
+            self.generation += 1
             self._index_loaded = True
             
             # Save to disk
@@ -107,24 +317,36 @@ class FAISSService:
             # Ensure directory exists
             self.index_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Save FAISS index
-            faiss.write_index(self.index, str(self.index_path))
+            # Save FAISS index. Write a new file and rename it into place:
+            # other workers may have the current one memory-mapped
+            tmp_path = self.index_path.with_name(self.index_path.name + '.tmp')
+            faiss.write_index(self.index, str(tmp_path))
+            os.replace(tmp_path, self.index_path)
             logger.info(f"Index saved to: {self.index_path}")
             
-            # Save metadata
+            # Corpus map: fingerprint + stable id per position, checked at startup
+            fingerprint = corpus_fingerprint(
+                (recipe.Title for recipe in self.recipes), (recipe.Image_Name for recipe in self.recipes)
+            )
+            write_index_map(
+                str(self.map_path),
+                fingerprint,
+                [recipe.id if recipe.id is not None else i for i, recipe in enumerate(self.recipes)]
+            )
+            self.index_map = IndexMap.read(str(self.map_path))
+            self.corpus_status = "ok"
+            
+            # Save metadata (per-recipe data lives in the corpus map)
             metadata = {
-                "index_type": settings.FAISS_INDEX_TYPE,
-                "metric": settings.FAISS_METRIC,
+                "index_type": index_type_of(self.index),
+                "metric": "cosine" if self.normalized else (
+                    "IP" if self.index.metric_type == faiss.METRIC_INNER_PRODUCT else "L2"
+                ),
+                "normalized": self.normalized,
                 "dimension": self.dimension,
                 "num_vectors": self.index.ntotal,
-                "recipes": [
-                    {
-                        "index": i,
-                        "title": recipe.Title,
-                        "image_name": recipe.Image_Name
-                    }
-                    for i, recipe in enumerate(self.recipes)
-                ]
+                "index_params": self.index_params,
+                "corpus_fingerprint": fingerprint.hex()
             }
             
             with open(self.metadata_path, 'w', encoding='utf-8') as f:
@@ -136,6 +358,30 @@ class FAISSService:
             logger.error(f"Error saving FAISS index: {e}", exc_info=True)
             raise
     
+    def _read_index(self) -> faiss.Index:
+        """
+        Read the index file, memory-mapped when FAISS_MMAP is enabled
+        
+        IO_FLAG_MMAP_IFC maps the stored vectors / codes (and HNSW graph)
+        in place instead of copying them, so N workers share one copy in
+        the page cache. Older FAISS builds, including the pinned
+        faiss-cpu 1.7.4, only have IO_FLAG_MMAP, which maps IVF inverted
+        lists: Flat and HNSW indexes are read into each worker there.
+        """
+        if settings.FAISS_MMAP:
+            mmap_flag = getattr(faiss, 'IO_FLAG_MMAP_IFC', None)
+            if mmap_flag is None:
+                logger.info("This FAISS build cannot memory-map Flat/HNSW indexes (no IO_FLAG_MMAP_IFC); only IVF lists are shared")
+                mmap_flag = faiss.IO_FLAG_MMAP
+            try:
+                index = faiss.read_index(str(self.index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+                self.index_mmapped = True
+                return index
+            except Exception as e:
+                logger.warning(f"Memory-mapped index loading failed ({e}), reading the index into memory")
+        self.index_mmapped = False
+        return faiss.read_index(str(self.index_path))
+    
     def load_index(self) -> bool:
         """
         Load FAISS index from disk
@@ -160,7 +406,7 @@ class FAISSService:
             
             # Load FAISS index
             try:
-                self.index = faiss.read_index(str(self.index_path))
+                self.index = self._read_index()
             except Exception as e:
                 logger.error(
                     f"Failed to read FAISS index file. The file may be corrupted: {e}",
@@ -201,18 +447,35 @@ class FAISSService:
                         )
                     else:
                         logger.info(f"Metadata loaded: {metadata.get('num_vectors', 'unknown')} vectors")
+                    
+                    self.index_params = metadata.get('index_params', {})
+                    # Queries must be normalized iff the index vectors were
+                    self.normalized = metadata.get('normalized', settings.FAISS_METRIC == "cosine")
                 except Exception as e:
                     logger.warning(f"Failed to load metadata: {e}")
             
-            # Load embeddings (for reference, not required for search)
-            embeddings_path = self.index_path.parent / 'recipe_embeddings.npy'
-            if embeddings_path.exists():
+            # Search-time parameters follow the current settings, so nprobe /
+            # efSearch can be tuned without rebuilding the index
+            self._apply_search_params(
+                self.index,
+                {"nprobe": settings.FAISS_NPROBE, "efSearch": settings.FAISS_HNSW_EF_SEARCH}
+            )
+            
+            # Embeddings and the kNN graph are mapped lazily, see their properties
+            self._embeddings = None
+            self._knn_graph, self._knn_graph_checked = None, False
+            
+            # Corpus map header (the id array is mapped on demand); verified
+            # against the served recipes by check_corpus()
+            self.index_map = None
+            self.corpus_status = "unchecked"
+            if self.map_path.exists():
                 try:
-                    self.embeddings = np.load(embeddings_path)
-                    logger.debug(f"Embeddings loaded: {self.embeddings.shape}")
-                except Exception as e:
-                    logger.debug(f"Failed to load embeddings file (optional): {e}")
+                    self.index_map = IndexMap.read(str(self.map_path))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Failed to read corpus map: {e}")
             
+            self.generation += 1
             self._index_loaded = True
             return True
             
@@ -234,9 +497,74 @@ class FAISSService:
         Check if FAISS index is loaded and ready for search
         
         Returns:
-            True if index is loaded, False otherwise
+            True if index is loaded and not built from another corpus, False otherwise
+        """
+        return self._index_loaded and self.index is not None and self.corpus_status != "mismatch"
+    
+    @property
+    def corpus_fingerprint(self) -> Optional[bytes]:
+        """Fingerprint of the corpus the index was built from (None without a corpus map)"""
+        index_map = self.index_map
+        return index_map.fingerprint if index_map is not None else None
+    
+    def adopt(self, other: "FAISSService"):
+        """
+        Serve the index another instance has loaded (hot reload)
+        
+        The new index is loaded on a separate instance in the background and
+        taken over here in one step; searches already running keep the
+        index object they started with.
         """
-        return self._index_loaded and self.index is not None
+        self.index_map = other.index_map
+        self.corpus_status = other.corpus_status
+        self.index_params = other.index_params
+        self.index_mmapped = other.index_mmapped
+        self.normalized = other.normalized
+        self._embeddings = None
+        self._knn_graph, self._knn_graph_checked = None, False
+        self.index = other.index
+        self._index_loaded = other._index_loaded
+        self.generation += 1
+        logger.info(f"Serving index generation {self.generation}: {other.index.ntotal if other.index else 0} vectors")
+    
+    def check_corpus(self, fingerprint: bytes, num_recipes: int) -> bool:
+        """
+        Verify that the loaded index was built from the served recipes
+        
+        Compares the fingerprint in the corpus map header with the one of
+        the recipes (O(1) with a recipe store). On a mismatch index positions
+        no longer point at the right recipes: the service runs degraded,
+        with vector search disabled, until the index is rebuilt.
+        
+        Args:
+            fingerprint: corpus_fingerprint() of the served recipes
+            num_recipes: Number of served recipes
+            
+        Returns:
+            False if the index belongs to another corpus
+        """
+        if self.index is None:
+            return True
+        
+        if self.index_map is None:
+            self.corpus_status = "unverified"
+            logger.warning(
+                f"{self.map_path} not found: can't verify that the index matches the recipes "
+                "(rebuild it with: python -m app.tools.build_index)"
+            )
+            return True
+        
+        if self.index_map.count != self.index.ntotal or self.index_map.fingerprint != fingerprint:
+            self.corpus_status = "mismatch"
+            logger.error(
+                f"FAISS index was built from another corpus ({self.index.ntotal} vectors, "
+                f"{num_recipes} recipes served, fingerprints differ): vector search disabled. "
+                "Rebuild the index with: python -m app.tools.build_index"
+            )
+            return False
+        
+        self.corpus_status = "ok"
+        return True
     
     def _ensure_index_loaded(self):
         """
@@ -270,7 +598,8 @@ class FAISSService:
             
         Returns:
             Tuple of (distances, indices)
-            - distances: Array of shape (k,) - L2 distances (lower is better)
+            - distances: Array of shape (k,) - distances in the index metric
+              (L2: lower is better, IP / cosine: higher is better; see scores())
             - indices: Array of shape (k,) - Recipe indices
             
         Raises:
@@ -293,19 +622,21 @@ class FAISSService:
         if k <= 0:
             raise ValueError(f"k must be positive, got {k}")
         
-        if k > self.index.ntotal:
+        # One index object for the whole search, even if a reload swaps it meanwhile
+        index = self.index
+        if k > index.ntotal:
             logger.warning(
-                f"Requested k={k} is greater than total vectors ({self.index.ntotal}). "
-                f"Returning {self.index.ntotal} results."
+                f"Requested k={k} is greater than total vectors ({index.ntotal}). "
+                f"Returning {index.ntotal} results."
             )
-            k = self.index.ntotal
+            k = index.ntotal
         
         try:
             # Reshape query to (1, dimension) for FAISS
-            query_reshaped = query_vector.reshape(1, -1).astype('float32')
+            query_reshaped = self._prepare_queries(query_vector.reshape(1, -1))
             
             # Search
-            distances, indices = self.index.search(query_reshaped, k)
+            distances, indices = index.search(query_reshaped, k)
             
             logger.debug(f"FAISS search completed: {len(indices[0])} results")
             
@@ -316,11 +647,234 @@ class FAISSService:
             logger.error(f"Error during FAISS search: {e}", exc_info=True)
             raise RuntimeError(f"FAISS search failed: {e}") from e
     
+    def search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 10
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for similar vectors for several queries in one index call
+        
+        Args:
+            query_vectors: Query embeddings of shape (num_queries, dimension)
+            k: Number of results to return per query
+            
+        Returns:
+            Tuple of (distances, indices), each of shape (num_queries, k)
+            
+        Raises:
+            RuntimeError: If index is not loaded
+            ValueError: If query vectors have wrong shape or dimension
+        """
+        self._ensure_index_loaded()
+        
+        if query_vectors is None or query_vectors.ndim != 2 or query_vectors.shape[0] == 0:
+            raise ValueError("Query vectors must be a non-empty (num_queries, dimension) array")
+        
+        if query_vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query vector dimension mismatch: expected {self.dimension}, "
+                f"got {query_vectors.shape[1]}"
+            )
+        
+        if k <= 0:
+            raise ValueError(f"k must be positive, got {k}")
+        
+        index = self.index
+        k = min(k, index.ntotal)
+        
+        try:
+            distances, indices = index.search(self._prepare_queries(query_vectors), k)
+            logger.debug(f"FAISS batch search completed: {query_vectors.shape[0]} queries")
+            return distances, indices
+            
+        except Exception as e:
+            logger.error(f"Error during FAISS batch search: {e}", exc_info=True)
+            raise RuntimeError(f"FAISS batch search failed: {e}") from e
+    
+    def score_threshold(
+        self,
+        min_score: Optional[float] = None,
+        max_distance: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Combine request thresholds into a single minimum score (see scores())
+        
+        Args:
+            min_score: Minimum similarity score
+            max_distance: Maximum distance: squared L2 distance (as FAISS
+                returns it) for L2 indexes, cosine distance (1 - similarity) in
+                cosine mode
+            
+        Returns:
+            Minimum score, or None if no threshold was given
+            
+        Raises:
+            ValueError: If max_distance is given for a plain inner product index
+        """
+        thresholds = [] if min_score is None else [min_score]
+        if max_distance is not None:
+            self._ensure_index_loaded()
+            if self.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                thresholds.append(-max_distance)
+            elif self.normalized:
+                thresholds.append(1.0 - max_distance)
+            else:
+                raise ValueError("max_distance is undefined for inner product indexes, use min_score")
+        return max(thresholds) if thresholds else None
+    
+    def _passing(self, distances: np.ndarray, indices: np.ndarray, min_score: float) -> int:
+        """Number of leading (best first) results that reach min_score"""
+        passed = (self.scores(distances) >= min_score) & (indices >= 0)
+        return len(passed) if passed.all() else int(np.argmin(passed))
+    
+    def search_threshold(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        min_score: float,
+        adaptive: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for at most k vectors whose score (see scores()) is at least min_score
+        
+        The default strategy is a single range_search (FAISS_RANGE_SEARCH)
+        trimmed to the k best, or a k-NN search cut at the first result
+        below the threshold for index types without range search. The
+        adaptive strategy starts with k=FAISS_ADAPTIVE_INITIAL_K and doubles
+        it only while every result still reaches the threshold, which is
+        cheaper when few recipes are relevant.
+        
+        Args:
+            query_vector: Query embedding of shape (dimension,)
+            k: Maximum number of results
+            min_score: Minimum similarity score
+            adaptive: Grow k until the threshold is reached instead of a single search
+            
+        Returns:
+            Tuple of (distances, indices), best first, possibly shorter than k
+            
+        Raises:
+            RuntimeError: If index is not loaded
+            ValueError: If k is not positive
+        """
+        self._ensure_index_loaded()
+        if k <= 0:
+            raise ValueError(f"k must be positive, got {k}")
+        k = min(k, self.index.ntotal)
+        
+        if adaptive:
+            step = max(1, min(k, settings.FAISS_ADAPTIVE_INITIAL_K))
+            while True:
+                distances, indices = self.search(query_vector, step)
+                passed = self._passing(distances, indices, min_score)
+                if passed < len(indices) or step >= k:
+                    return distances[:passed], indices[:passed]
+                step = min(2 * step, k)
+        
+        if settings.FAISS_RANGE_SEARCH:
+            # range_search keeps IP scores above the radius and L2 distances
+            # below it (strictly): widen it by one float32 step, then filter
+            # exactly on the scores
+            if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                radius = float(np.nextafter(np.float32(min_score), np.float32(-np.inf)))
+            else:
+                radius = float(np.nextafter(np.float32(-min_score), np.float32(np.inf)))
+            try:
+                _, distances, indices = self.index.range_search(
+                    self._prepare_queries(query_vector.reshape(1, -1)), radius
+                )
+            except RuntimeError as e:
+                # Not implemented for this index type
+                logger.debug(f"range_search unavailable ({e}), using k-NN with a cutoff")
+            else:
+                keep = self.scores(distances) >= min_score
+                distances, indices = distances[keep], indices[keep]
+                scores = self.scores(distances)
+                if len(scores) > k:
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    order = top[np.argsort(-scores[top], kind='stable')]
+                else:
+                    order = np.argsort(-scores, kind='stable')
+                return distances[order], indices[order]
+        
+        distances, indices = self.search(query_vector, k)
+        passed = self._passing(distances, indices, min_score)
+        return distances[:passed], indices[:passed]
+    
+    def _stored_vector(self, idx: int) -> np.ndarray:
+        """Vector of recipe `idx`: reconstructed from the index, else read from the embeddings file"""
+        try:
+            return self.index.reconstruct(idx)
+        except RuntimeError:
+            # IVF without a direct map, or codes that can't be decoded
+            pass
+        embeddings = self.embeddings
+        if embeddings is None or idx >= len(embeddings):
+            raise RuntimeError(f"No stored vector for recipe {idx}: index can't reconstruct and embeddings are unavailable")
+        return np.asarray(embeddings[idx], dtype='float32')
+    
+    def search_similar(self, idx: int, k: int = 10) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Find the recipes most similar to recipe `idx`, without running the model
+        
+        Reads the precomputed kNN graph when it has at least k neighbours per
+        recipe (a row lookup), else searches with the recipe's stored vector.
+        
+        Args:
+            idx: Recipe position (FAISS vector id)
+            k: Number of results to return (the recipe itself excluded)
+            
+        Returns:
+            Tuple of (scores, indices, method): scores on the scale of
+            scores(), best first; method is "knn_graph" or "vector"
+            
+        Raises:
+            RuntimeError: If index is not loaded
+            ValueError: If idx is out of range or k is not positive
+        """
+        self._ensure_index_loaded()
+        if not 0 <= idx < self.index.ntotal:
+            raise ValueError(f"Recipe index {idx} out of range")
+        if k <= 0:
+            raise ValueError(f"k must be positive, got {k}")
+        k = min(k, self.index.ntotal - 1)
+        
+        graph = self.knn_graph
+        if graph is not None and k <= graph.neighbors:
+            scores, indices = graph.lookup(idx, k)
+            return scores, indices, "knn_graph"
+        
+        # One extra result: the recipe finds itself (normally first)
+        distances, indices = self.search(self._stored_vector(idx), k + 1)
+        keep = (indices != idx) & (indices >= 0)
+        return self.scores(distances[keep])[:k], indices[keep][:k], "vector"
+    
+    def _search_text_batch(self, items: List[tuple]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Micro-batcher callback: encode all queued texts at once, then run a
+        single (n, d) index search with the largest requested k
+        
+        Args:
+            items: List of (text, k, embedding_service) tuples
+            
+        Returns:
+            List of (distances, indices) per item
+        """
+        embedding_service = items[0][2]
+        query_vectors = embedding_service.encode_texts([text for text, _, _ in items])
+        max_k = max(k for _, k, _ in items)
+        
+        distances, indices = self.search_batch(query_vectors, max_k)
+        
+        return [(distances[i, :k], indices[i, :k]) for i, (_, k, _) in enumerate(items)]
+    
     def search_by_text(
         self, 
         text: str, 
         k: int = 10,
-        embedding_service=None
+        embedding_service=None,
+        query_vector: Optional[np.ndarray] = None
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Search for recipes similar to a text query
@@ -329,6 +883,7 @@ class FAISSService:
             text: Query text (e.g., "chicken pasta recipe")
             k: Number of results to return
             embedding_service: EmbeddingService instance to encode text
+            query_vector: Embedding of the text, if already encoded
             
         Returns:
             Tuple of (distances, indices)
@@ -348,6 +903,15 @@ class FAISSService:
             raise ValueError(error_msg)
         
         try:
+            if query_vector is not None:
+                return self.search(query_vector, k)
+            
+            if settings.EMBEDDING_MICRO_BATCHING:
+                # Share the encode and the index search with concurrent queries
+                if k <= 0:
+                    raise ValueError(f"k must be positive, got {k}")
+                return self._text_batcher.submit((text, k, embedding_service)).result()
+            
             logger.debug(f"Encoding text query: '{text[:50]}...' (truncated)")
             # Encode text to embedding
             query_embedding = embedding_service.encode_text(text)
@@ -363,7 +927,10 @@ class FAISSService:
         self,
         ingredients: List[str],
         k: int = 10,
-        embedding_service=None
+        embedding_service=None,
+        min_score: Optional[float] = None,
+        adaptive: bool = False,
+        query_vector: Optional[np.ndarray] = None
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         Search for recipes similar to a list of ingredients
@@ -372,6 +939,9 @@ class FAISSService:
             ingredients: List of ingredient names
             k: Number of results to return
             embedding_service: EmbeddingService instance to encode text
+            min_score: Only return results scoring at least this much (see search_threshold())
+            adaptive: Adaptive k for thresholded searches
+            query_vector: Query embedding, if already encoded (see ingredient_query_text())
             
         Returns:
             Tuple of (distances, indices)
@@ -386,16 +956,74 @@ class FAISSService:
             raise ValueError(error_msg)
         
         try:
-            # Create query text from ingredients
-            query_text = f"Recipe with ingredients: {', '.join(ingredients)}"
             logger.debug(f"Searching by ingredients: {ingredients}")
             
+            if query_vector is not None:
+                if min_score is not None:
+                    return self.search_threshold(query_vector, k, min_score, adaptive)
+                return self.search(query_vector, k)
+            
+            if settings.EMBEDDING_COMPOSITIONAL_QUERIES and embedding_service is not None:
+                # Pool precomputed per-ingredient vectors, no model call for known ingredients
+                query_embedding = embedding_service.encode_ingredients(ingredients)
+                if min_score is not None:
+                    return self.search_threshold(query_embedding, k, min_score, adaptive)
+                return self.search(query_embedding, k)
+            
+            # Create query text from ingredients
+            query_text = ingredient_query_text(ingredients)
+            if min_score is not None:
+                if embedding_service is None:
+                    raise ValueError("embedding_service is required for ingredient search")
+                return self.search_threshold(embedding_service.encode_text(query_text), k, min_score, adaptive)
             return self.search_by_text(query_text, k, embedding_service)
             
         except Exception as e:
             logger.error(f"Error in ingredient search: {e}", exc_info=True)
             raise RuntimeError(f"Ingredient search failed: {e}") from e
     
+    def search_by_ingredients_batch(
+        self,
+        fridges: List[List[str]],
+        k: int = 10,
+        embedding_service=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for recipes similar to several ingredient lists at once
+        
+        All queries are encoded in one model call and searched with one
+        (n, d) index search.
+        
+        Args:
+            fridges: Non-empty ingredient lists
+            k: Number of results per list
+            embedding_service: EmbeddingService instance to encode the queries
+            
+        Returns:
+            Tuple of (distances, indices), each of shape (len(fridges), k)
+            
+        Raises:
+            ValueError: If an ingredient list is empty or embedding_service is None
+            RuntimeError: If search fails
+        """
+        if embedding_service is None:
+            raise ValueError("embedding_service is required for ingredient search")
+        if any(not ingredients for ingredients in fridges):
+            raise ValueError("Ingredients list cannot be empty")
+        
+        try:
+            if settings.EMBEDDING_COMPOSITIONAL_QUERIES:
+                query_vectors = embedding_service.encode_ingredients_batch(fridges)
+            else:
+                query_vectors = embedding_service.encode_texts(
+                    [ingredient_query_text(ingredients) for ingredients in fridges]
+                )
+            return self.search_batch(query_vectors, k)
+            
+        except Exception as e:
+            logger.error(f"Error in batch ingredient search: {e}", exc_info=True)
+            raise RuntimeError(f"Batch ingredient search failed: {e}") from e
+    
     def get_index_info(self) -> dict:
         """Get information about the loaded index"""
         if not self.index:
@@ -403,9 +1031,16 @@ class FAISSService:
         
         return {
             "loaded": True,
-            "index_type": type(self.index).__name__,
+            "index_type": index_type_of(self.index),
             "num_vectors": self.index.ntotal,
             "dimension": self.dimension,
+            "index_params": self.index_params,
+            "mmapped": self.index_mmapped,
+            "corpus": self.corpus_status,
+            "knn_graph_neighbors": self.knn_graph.neighbors if self.knn_graph is not None else None,
+            "metric": "cosine" if self.normalized else (
+                "IP" if self.index.metric_type == faiss.METRIC_INNER_PRODUCT else "L2"
+            ),
             "index_path": str(self.index_path),
             "metadata_path": str(self.metadata_path)
         }
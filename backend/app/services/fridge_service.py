@@ -0,0 +1,242 @@
+"""
+Fridge service
+Saved fridges with recommendations materialized per fridge contents
+"""
+
+import hashlib
+import json
+import logging
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.faiss_service import faiss_service
+from app.services.recipe_service import recipe_service
+from app.services.reload_service import reload_service
+from app.utils.embedding_cache import normalize_query
+from app.utils.fridge_store import FridgeStore
+from app.utils.json_fragments import encode, json_object
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Settings that change what a recommendation request returns for the same data files
+_RESULT_SETTINGS = (
+    "EMBEDDING_MODEL", "EMBEDDING_BACKEND", "EMBEDDING_ONNX_QUANTIZED", "EMBEDDING_COMPOSITIONAL_QUERIES",
+    "FAISS_METRIC", "FAISS_NPROBE", "FAISS_HNSW_EF_SEARCH"
+)
+
+
+def canonical_ingredients(ingredients: Sequence[str]) -> List[str]:
+    """
+    Fridge contents as stored: normalized, deduplicated and sorted
+
+    Matching, coverage and the (uncased) model ignore case and repeated
+    whitespace, so two lists that only differ there are the same fridge.
+    """
+    return sorted({normalize_query(ingredient) for ingredient in ingredients} - {""})
+
+
+def content_hash(ingredients: List[str]) -> bytes:
+    """Hash of canonical fridge contents"""
+    return hashlib.blake2b(json.dumps(ingredients).encode('utf-8'), digest_size=16).digest()
+
+
+class FridgeService:
+    """
+    Saved fridges (FridgeStore) and their recommendations
+
+    Each fridge keeps, next to its ingredients, a content hash and a bitset
+    of the ingredients found in the coverage vocabulary. Recommendation
+    responses are materialized per (content hash, request parameters) and
+    served as stored bytes until the fridge's contents change; a reload of
+    different recipe or index files (or a change of the settings that shape
+    results) drops them, they are recomputed on their next request. Stored
+    results are capped (FRIDGE_RESULTS_MAX_ENTRIES / _MAX_BYTES), least
+    recently used first out.
+    """
+
+    def __init__(self):
+        self.store = FridgeStore(
+            path=str(Path(__file__).parent.parent.parent / settings.FRIDGE_DB_PATH),
+            pool_size=settings.FRIDGE_DB_POOL_SIZE,
+            max_entries=settings.FRIDGE_RESULTS_MAX_ENTRIES,
+            max_bytes=settings.FRIDGE_RESULTS_MAX_BYTES
+        )
+        self._lock = threading.Lock()
+        # Data version results were last served for; on a change, stale results are dropped
+        self._data_version: Optional[bytes] = None
+        self.result_hits = 0
+        self.result_misses = 0
+
+    def _bitset(self, ingredients: List[str]) -> Tuple[bytes, bytes]:
+        """
+        Bitset of the ingredients' vocabulary terms
+
+        Returns:
+            Tuple of (packed bits, one per vocabulary term, and the vocabulary
+            fingerprint; both empty without a coverage vocabulary)
+        """
+        scorer = recipe_service.coverage_scorer
+        if scorer is None:
+            return b"", b""
+        bits = np.zeros(len(scorer.vocabulary), dtype=bool)
+        bits[scorer.fridge_terms(ingredients)] = True
+        return np.packbits(bits).tobytes(), scorer.fingerprint
+
+    def _fridge(self, row: dict) -> dict:
+        """Fridge as returned by the API; a bitset of an older vocabulary is recomputed"""
+        ingredients = json.loads(row["ingredients"])
+        bitset, vocabulary = row["bitset"], row["vocabulary"]
+        scorer = recipe_service.coverage_scorer
+        if scorer is not None and vocabulary != scorer.fingerprint:
+            bitset, vocabulary = self._bitset(ingredients)
+            self.store.update_bitset(row["id"], row["content_hash"], bitset, vocabulary)
+
+        recognized: List[str] = []
+        if scorer is not None and bitset:
+            bits = np.unpackbits(np.frombuffer(bitset, dtype=np.uint8), count=len(scorer.vocabulary))
+            recognized = [scorer.vocabulary[term_id] for term_id in np.flatnonzero(bits)]
+        return {
+            "id": row["id"],
+            "ingredients": ingredients,
+            "recognized": recognized,
+            "content_hash": row["content_hash"].hex(),
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def create(self, ingredients: Sequence[str]) -> dict:
+        """Save a new fridge"""
+        canonical = canonical_ingredients(ingredients)
+        bitset, vocabulary = self._bitset(canonical)
+        fridge_id = secrets.token_urlsafe(12)
+        self.store.create(
+            fridge_id, json.dumps(canonical), content_hash(canonical), bitset, vocabulary, time.time()
+        )
+        return self.get(fridge_id)
+
+    def get(self, fridge_id: str) -> Optional[dict]:
+        """A saved fridge, None if there is no such fridge"""
+        row = self.store.get(fridge_id)
+        return self._fridge(row) if row is not None else None
+
+    def replace(self, fridge_id: str, ingredients: Sequence[str]) -> Optional[dict]:
+        """Replace a fridge's ingredients, None if there is no such fridge"""
+        canonical = canonical_ingredients(ingredients)
+        bitset, vocabulary = self._bitset(canonical)
+        previous = self.store.update(
+            fridge_id, json.dumps(canonical), content_hash(canonical), bitset, vocabulary, time.time()
+        )
+        if previous is None:
+            return None
+        return self.get(fridge_id)
+
+    def delete(self, fridge_id: str) -> bool:
+        """Delete a fridge (and results no other fridge shares)"""
+        return self.store.delete(fridge_id)
+
+    def _current_data_version(self, vector_ready: bool) -> bytes:
+        """What stored results were computed against: served data files, result settings, vector search state"""
+        return hashlib.blake2b(
+            reload_service.served_signature()
+            + repr(([getattr(settings, name) for name in _RESULT_SETTINGS], vector_ready)).encode(),
+            digest_size=16
+        ).digest()
+
+    def recommendations(
+        self,
+        fridge_id: str,
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        sort_by: str = "relevance",
+        projection: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[bytes, bool]]:
+        """
+        RecipeRecommendResponse JSON for a saved fridge
+
+        Same body as POST /recipes/recommend with the fridge's (canonical)
+        ingredients. Served from the stored result when the fridge's
+        contents and the data are unchanged, computed and stored otherwise.
+
+        Args:
+            fridge_id: Saved fridge id
+            use_vector_search, top_k, sort_by: As for find_suitable_hits()
+            projection: Recipe fields to return, None for all
+
+        Returns:
+            Tuple of (response body, whether it was stored), None if there is
+            no such fridge
+        """
+        variant = hashlib.blake2b(
+            repr((use_vector_search, top_k, sort_by, projection)).encode(), digest_size=16
+        ).digest()
+        # Taken before ranking: a reload while computing makes the result
+        # look stale (recomputed once), never the other way round
+        data_version = self._current_data_version(recipe_service.vector_search_ready(recipe_service.corpus))
+        with self._lock:
+            changed, self._data_version = data_version != self._data_version, data_version
+        if changed:
+            # After a reload (or at startup) no stored result of other data is served again
+            dropped = self.store.delete_stale(data_version)
+            if dropped:
+                logger.info(f"Dropped {dropped} stored fridge results of other recipe / index data")
+
+        row = self.store.get_with_result(fridge_id, variant)
+        if row is None:
+            return None
+        ingredients, fridge_hash, stored_version, body = row
+        if body is not None and stored_version == data_version:
+            with self._lock:
+                self.result_hits += 1
+            self.store.touch(fridge_hash, variant, time.time())
+            return body, True
+        with self._lock:
+            self.result_misses += 1
+
+        ingredients = json.loads(ingredients)
+        if sort_by != "relevance":
+            search_method = "ingredient_matrix"
+        else:
+            search_method = "vector" if (use_vector_search and faiss_service.is_loaded()) else "string_matching"
+
+        if ingredients:
+            corpus, hits = recipe_service.find_suitable_hits(
+                ingredients, use_vector_search=use_vector_search, top_k=top_k, sort_by=sort_by
+            )
+            recommendations = b'[' + b','.join(recipe_service.iter_json(corpus, hits, projection)) + b']'
+        else:
+            hits, recommendations = [], b'[]'
+
+        body = json_object([
+            ("recommendations", recommendations),
+            ("count", encode(len(hits))),
+            ("userIngredients", encode(ingredients)),
+            ("search_method", encode(search_method))
+        ])
+        self.store.put_result(fridge_hash, variant, data_version, body, time.time())
+        return body, False
+
+    def close(self):
+        self.store.close()
+
+    def get_stats(self) -> dict:
+        """Stored fridges and results, connection pool usage, stored result hit rate"""
+        stats = self.store.get_stats()
+        with self._lock:
+            lookups = self.result_hits + self.result_misses
+            return {
+                **stats,
+                "result_hits": self.result_hits,
+                "result_misses": self.result_misses,
+                "hit_rate": round(self.result_hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Singleton instance
+fridge_service = FridgeService()
@@ -1,185 +1,700 @@
 import json
 import os
 import logging
-from typing import List, Optional
+import weakref
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from app.config import settings
 from app.models.recipe import Recipe, RecipeWithMatch
 from app.utils.cache import cache
+from app.utils.ranking import MAX_MASK_INGREDIENTS, CachedRanking
+from app.utils.ingredient_index import IngredientIndex
+from app.utils.coverage_scorer import CoverageScorer
+from app.utils.trigram_index import TrigramIndex
+from app.utils.json_fragments import RecipeFragments
+from app.utils.ingredient_vectors import ingredient_query_text
+from app.utils.memory import resident_memory
+from app.utils.recipe_store import (
+    INGREDIENTS_LOWER,
+    InMemoryRecipeStore,
+    RecipeStore,
+    read_recipes_json,
+    source_stats
+)
 from app.services.faiss_service import faiss_service
 from app.services.embedding_service import embedding_service
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# (recipe position, matching user ingredients, similarity score: vector
+# search only, higher is better; None for string matching / coverage)
+Hit = Tuple[int, List[str], Optional[float]]
+
+
+def _close_store(generation: int, recipes: Union[RecipeStore, InMemoryRecipeStore]):
+    """Finalizer of a replaced corpus generation: unmap its store"""
+    try:
+        recipes.close()
+        logger.info(f"Closed the recipe store of corpus generation {generation}")
+    except Exception as e:
+        logger.error(f"Failed to close the recipe store of corpus generation {generation}: {e}")
+
+
+class RecipeCorpus:
+    """
+    One generation of the recipe data and the indexes derived from it
+    
+    Requests read the service's current corpus once and use it throughout,
+    so a hot reload (see reload_service) swapping in a new generation never
+    mixes recipe positions of two corpora within one request.
+    """
+    
+    def __init__(self, recipes: Union[RecipeStore, InMemoryRecipeStore], generation: int):
+        self.generation = generation
+        self.recipes = recipes
+        self.ingredient_index: Optional[IngredientIndex] = None
+        self.coverage_scorer: Optional[CoverageScorer] = None
+        self.text_index: Optional[TrigramIndex] = None
+        # Pre-serialized recipe JSON for the response fast path
+        self.fragments: Optional[RecipeFragments] = None
+        # Recipe id / title / image name -> position in recipes
+        self.position_by_id: Dict[int, int] = {}
+        self.position_by_title: Dict[str, int] = {}
+        self.position_by_image_name: Dict[str, int] = {}
+        # Resident memory the generation added while it was built (None if unknown)
+        self.memory_bytes: Optional[int] = None
+    
+    @property
+    def fingerprint(self) -> bytes:
+        """corpus_fingerprint() of the recipes, compared with the FAISS index's"""
+        return self.recipes.fingerprint
+
 
 class RecipeService:
     def __init__(self):
-        self.recipes: List[Recipe] = []
-        self._recipes_loaded = False
+        self._corpus: Optional[RecipeCorpus] = None
+    
+    @property
+    def corpus(self) -> RecipeCorpus:
+        """Current corpus generation (loaded on first use)"""
+        self._ensure_loaded()
+        return self._corpus
     
-    def _load_recipes(self):
-        """Load recipes from JSON data file"""
+    @property
+    def recipes(self) -> Union[RecipeStore, InMemoryRecipeStore]:
+        return self.corpus.recipes
+    
+    @property
+    def ingredient_index(self) -> Optional[IngredientIndex]:
+        return self.corpus.ingredient_index
+    
+    @property
+    def coverage_scorer(self) -> Optional[CoverageScorer]:
+        return self.corpus.coverage_scorer
+    
+    def _data_path(self, filename: str) -> str:
+        """Get the path of a file in the backend data directory"""
+        return os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            'data',
+            filename
+        )
+    
+    def _open_store(self) -> Optional[RecipeStore]:
+        """Memory-map data/recipes.bin if present and built from the current recipes.json"""
+        store_path = self._data_path('recipes.bin')
+        if not settings.RECIPE_STORE_ENABLED or not os.path.exists(store_path):
+            return None
+        
         try:
-            # Load from JSON file
-            data_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'data',
-                'recipes.json'
+            store = RecipeStore(store_path)
+        except ValueError as e:
+            # Not a store, or written in an older format
+            logger.warning(f"Can't map data/recipes.bin ({e}), loading the JSON instead; rebuild it with: python -m app.tools.build_recipe_store")
+            return None
+        json_path = self._data_path('recipes.json')
+        if os.path.exists(json_path) and store.source != source_stats(json_path):
+            # Recipe positions must agree with the FAISS index, so never serve a stale store
+            logger.warning(
+                "data/recipes.bin was built from a different recipes.json, loading the JSON instead; "
+                "rebuild it with: python -m app.tools.build_recipe_store"
             )
+            store.close()
+            return None
+        return store
+    
+    def _load_recipes(self) -> Union[RecipeStore, InMemoryRecipeStore]:
+        """Load recipes from the columnar store, or from the JSON data file"""
+        try:
+            store = self._open_store()
+            if store is not None:
+                logger.info(f"Mapped {len(store)} recipes from {store.path} ({store.nbytes} bytes)")
+                return store
             
-            with open(data_path, 'r', encoding='utf-8') as f:
-                recipes_data = json.load(f)
-            
-            # Filter out recipes with None values and convert to Recipe models
-            valid_recipes = []
-            skipped = 0
-            
-            for recipe in recipes_data:
-                try:
-                    # Check if all required fields exist and are not None
-                    if (recipe.get('Title') and 
-                        recipe.get('Ingredients') and 
-                        recipe.get('Image_Name') and 
-                        recipe.get('Cleaned_Ingredients')):
-                        valid_recipes.append(Recipe(**recipe))
-                    else:
-                        skipped += 1
-                except Exception:
-                    skipped += 1
-                    continue
-            
-            self.recipes = valid_recipes
-            logger.info(f"Loaded {len(self.recipes)} recipes")
+            # Load from JSON file
+            valid_recipes, skipped = read_recipes_json(self._data_path('recipes.json'))
+            logger.info(f"Loaded {len(valid_recipes)} recipes")
             if skipped > 0:
                 logger.warning(f"Skipped {skipped} invalid recipes")
+            return InMemoryRecipeStore(valid_recipes)
             
         except Exception as e:
             logger.error(f"Error loading recipes: {e}", exc_info=True)
-            self.recipes = []
+            return InMemoryRecipeStore([])
+    
+    def load_corpus(self, generation: int) -> RecipeCorpus:
+        """
+        Load the recipe data files and build a corpus generation
+        
+        The result is not served until it is passed to install_corpus(), so
+        this can run in the background while requests use the current one.
+        
+        Args:
+            generation: Generation number of the new corpus
+            
+        Returns:
+            RecipeCorpus
+        """
+        rss_before = resident_memory()
+        corpus = RecipeCorpus(self._load_recipes(), generation)
+        
+        self._build_lookup_indexes(corpus)
+        
+        # Build inverted ingredient index once, used by every ingredient query
+        corpus.ingredient_index = IngredientIndex(corpus.recipes.column(INGREDIENTS_LOWER), lowered=True)
+        logger.info(f"Ingredient index built: {corpus.ingredient_index.num_tokens} tokens")
+        
+        self._build_coverage_scorer(corpus)
+        
+        if settings.TEXT_SEARCH_TRIGRAM_INDEX:
+            corpus.text_index = TrigramIndex(
+                corpus.recipes.column('Title'),
+                corpus.recipes.column(INGREDIENTS_LOWER),
+                min_similarity=settings.TEXT_SEARCH_MIN_SIMILARITY,
+                lowered=True
+            )
+            logger.info(
+                f"Text index built: {corpus.text_index.num_words} words, "
+                f"{corpus.text_index.num_trigrams} trigrams ({corpus.text_index.nbytes} bytes)"
+            )
+        
+        if settings.RESPONSE_FRAGMENTS_ENABLED:
+            corpus.fragments = RecipeFragments(corpus.recipes)
+            logger.info(f"Recipe JSON pre-serialized: {corpus.fragments.nbytes} bytes")
+        
+        rss_after = resident_memory()
+        if rss_before is not None and rss_after is not None:
+            corpus.memory_bytes = max(0, rss_after - rss_before)
+        return corpus
+    
+    def install_corpus(self, corpus: RecipeCorpus) -> Optional[RecipeCorpus]:
+        """
+        Serve a corpus generation from now on
+        
+        Requests already running keep the generation they started with. They
+        hold it for as long as they use it, so the previous generation's store
+        is unmapped once the last of them lets go of it (it is never closed
+        under a running request).
+        
+        Returns:
+            The previous generation (None on first load)
+        """
+        previous, self._corpus = self._corpus, corpus
+        if previous is not None and previous.recipes is not corpus.recipes:
+            weakref.finalize(previous, _close_store, previous.generation, previous.recipes)
+        return previous
+    
+    def _build_lookup_indexes(self, corpus: RecipeCorpus):
+        """Hash indexes for lookups by id, title and image name"""
+        corpus.position_by_id = {recipe_id: idx for idx, recipe_id in enumerate(corpus.recipes.ids)}
+        # Titles / image names aren't guaranteed unique: the first recipe wins,
+        # as with the linear scan these replace
+        for idx, title in enumerate(corpus.recipes.column('Title')):
+            corpus.position_by_title.setdefault(title, idx)
+        for idx, image_name in enumerate(corpus.recipes.column('Image_Name')):
+            corpus.position_by_image_name.setdefault(image_name, idx)
+    
+    def _build_coverage_scorer(self, corpus: RecipeCorpus):
+        """Build the recipe x ingredient matrix against the ingredient vocabulary"""
+        try:
+            with open(self._data_path('ingredients.json'), 'r', encoding='utf-8') as f:
+                vocabulary = json.load(f)
+            
+            corpus.coverage_scorer = CoverageScorer(
+                corpus.recipes.column('Cleaned_Ingredients'),
+                vocabulary
+            )
+            logger.info(
+                f"Coverage matrix built: {corpus.coverage_scorer.matrix.shape[0]} recipes x "
+                f"{corpus.coverage_scorer.matrix.shape[1]} ingredients, "
+                f"{corpus.coverage_scorer.matrix.nnz} entries"
+            )
+        except Exception as e:
+            logger.error(f"Error building coverage matrix: {e}", exc_info=True)
+            corpus.coverage_scorer = None
     
     def _ensure_loaded(self):
         """Ensure recipes are loaded (lazy loading)"""
-        if not self._recipes_loaded:
-            self._load_recipes()
-            self._recipes_loaded = True
+        if self._corpus is None:
+            self._corpus = self.load_corpus(generation=1)
+    
+    def vector_search_ready(self, corpus: RecipeCorpus) -> bool:
+        """Whether the FAISS index is loaded and its positions refer to this corpus"""
+        if not faiss_service.is_loaded():
+            return False
+        # None: index without a corpus map, assumed to match
+        fingerprint = faiss_service.corpus_fingerprint
+        return fingerprint is None or fingerprint == corpus.fingerprint
     
-    def _count_matches(self, recipe: Recipe, user_ingredients: List[str]) -> List[str]:
+    def _count_matches(self, corpus: RecipeCorpus, idx: int, user_ingredients: List[str]) -> List[str]:
         """
         Count matching ingredients between recipe and user ingredients
         
         Args:
-            recipe: Recipe object
+            corpus: Corpus generation the position refers to
+            idx: Recipe position in corpus.recipes
             user_ingredients: List of user ingredient names
             
         Returns:
             List of matching ingredient names
         """
-        recipe_ingredients_lower = recipe.Ingredients.lower()
-        matching_ingredients = []
-        
-        for ingredient in user_ingredients:
-            if ingredient.lower() in recipe_ingredients_lower:
-                matching_ingredients.append(ingredient)
-        
-        return matching_ingredients
+        return corpus.ingredient_index.matches_for(idx, user_ingredients)
     
-    def _string_matching_search(self, user_ingredients: List[str]) -> List[RecipeWithMatch]:
+    def _string_matching_search(self, corpus: RecipeCorpus, user_ingredients: List[str]) -> List[Hit]:
         """
         Fallback search method using string matching
         Used when FAISS index is not available
         
         Args:
+            corpus: Corpus generation to search
             user_ingredients: List of ingredient names
             
         Returns:
-            List of RecipeWithMatch objects sorted by matching count
+            List of (recipe position, matching ingredients, None) sorted by matching count
         """
-        self._ensure_loaded()
-        results = []
+        # Only recipes found in the posting lists can match; visit them in
+        # corpus order so the stable sort below keeps the original ordering
+        matches = corpus.ingredient_index.match(user_ingredients)
+        hits = [(idx, matches[idx], None) for idx in sorted(matches)]
+        
+        # Sort by matching count (descending)
+        hits.sort(key=lambda hit: len(hit[1]), reverse=True)
         
-        for recipe in self.recipes:
-            matching_ingredients = self._count_matches(recipe, user_ingredients)
+        return hits
+    
+    def _coverage_search(self, corpus: RecipeCorpus, user_ingredients: List[str], sort_by: str, top_k: int) -> List[Hit]:
+        """
+        Rank recipes by fridge coverage using the recipe x ingredient matrix
+        
+        Args:
+            corpus: Corpus generation to rank
+            user_ingredients: List of ingredient names
+            sort_by: Coverage sort mode ("matching", "coverage", "fewest_missing")
+            top_k: Number of top results to return
             
-            if len(matching_ingredients) > 0:
-                results.append(
-                    RecipeWithMatch(
-                        **recipe.dict(),
-                        matchingCount=len(matching_ingredients),
-                        matchingIngredients=matching_ingredients
-                    )
-                )
+        Returns:
+            List of (recipe position, matching ingredients, None) in sort mode order
+        """
+        if corpus.coverage_scorer is None:
+            raise RuntimeError("Coverage sorting is not available: ingredient matrix was not built")
         
-        # Sort by matching count (descending)
-        results.sort(key=lambda x: x.matchingCount, reverse=True)
+        # Matching ingredients are the vocabulary terms the ranking counted,
+        # not substring matches, so they agree with the sort order
+        positions = corpus.coverage_scorer.rank(user_ingredients, sort_by, top_k)
+        matching = corpus.coverage_scorer.matching_ingredients(user_ingredients, positions)
+        return [(idx, matching_ingredients, None) for idx, matching_ingredients in zip(positions, matching)]
+    
+    def _iter_hits(
+        self,
+        corpus: RecipeCorpus,
+        ranking: CachedRanking,
+        user_ingredients: List[str],
+        key_ingredients: Tuple[str, ...],
+        sort_by: str = "relevance"
+    ) -> Iterator[Hit]:
+        """Hits of a cached ranking with the matching ingredients of this request, one at a time"""
+        for idx, matching_ingredients, score in ranking.hits(user_ingredients, key_ingredients):
+            if matching_ingredients is None:
+                # Rankings without masks (too many ingredients): match as the ranking did
+                if sort_by != "relevance":
+                    matching_ingredients = corpus.coverage_scorer.matching_ingredients(user_ingredients, [idx])[0]
+                else:
+                    matching_ingredients = self._count_matches(corpus, idx, user_ingredients)
+            yield idx, matching_ingredients, score
+    
+    def to_models(self, corpus: RecipeCorpus, hits: Sequence[Hit]) -> List[RecipeWithMatch]:
+        """Build response objects for hits from the shared recipe list"""
+        return [
+            RecipeWithMatch(
+                **corpus.recipes.get(idx).dict(),
+                matchingCount=len(matching_ingredients),
+                matchingIngredients=matching_ingredients,
+                score=score
+            )
+            for idx, matching_ingredients, score in hits
+        ]
+
+    def to_projected(self, corpus: RecipeCorpus, hits: Sequence[Hit], fields: Sequence[str]) -> List[dict]:
+        """Response dicts for hits with only the given recipe fields (see parse_fields)"""
+        return [
+            {
+                **corpus.recipes.project(idx, fields),
+                "matchingCount": len(matching_ingredients),
+                "matchingIngredients": matching_ingredients,
+                "score": score
+            }
+            for idx, matching_ingredients, score in hits
+        ]
+
+    def iter_json(self, corpus: RecipeCorpus, hits: Iterable[Hit], fields: Optional[Sequence[str]] = None) -> Iterator[bytes]:
+        """
+        JSON object of each hit's RecipeWithMatch, as the hits come
         
-        return results
+        Spliced from the pre-serialized recipe JSON when there is some, else
+        built through the model (or the projected store columns).
+        """
+        if corpus.fragments is not None:
+            yield from corpus.fragments.iter_matches(hits, fields)
+            return
+        for hit in hits:
+            if fields is not None:
+                result = self.to_projected(corpus, [hit], fields)[0]
+            else:
+                result = self.to_models(corpus, [hit])[0].model_dump()
+            yield json.dumps(result, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode('utf-8')
     
     def find_suitable_recipes(
         self, 
         user_ingredients: List[str],
         use_vector_search: bool = True,
-        top_k: int = 50
+        top_k: int = 50,
+        sort_by: str = "relevance",
+        min_score: Optional[float] = None,
+        adaptive: bool = False
     ) -> List[RecipeWithMatch]:
         """
         Find recipes that match user ingredients using vector search or string matching
         
+        Same arguments as find_suitable_hits()
+        
+        Returns:
+            List of RecipeWithMatch objects sorted by relevance
+        """
+        return self.to_models(*self.find_suitable_hits(
+            user_ingredients, use_vector_search, top_k, sort_by, min_score, adaptive
+        ))
+    
+    def find_suitable_hits(
+        self, 
+        user_ingredients: List[str],
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        sort_by: str = "relevance",
+        min_score: Optional[float] = None,
+        adaptive: bool = False,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[RecipeCorpus, List[Hit]]:
+        """
+        Find recipes that match user ingredients, as hits to materialize
+        
         Args:
             user_ingredients: List of ingredient names
             use_vector_search: Whether to use FAISS vector search (default: True)
             top_k: Number of top results to return (default: 50)
+            sort_by: "relevance" (vector / string matching order) or one of the
+                coverage sort modes: "matching", "coverage", "fewest_missing"
+            min_score: Vector search only: drop results scoring below this
+                (see faiss_service.score_threshold()), so at most top_k
+            adaptive: Vector search with min_score: grow k from a small start
+                only while the threshold isn't reached
+            query_vector: Vector search query embedding, if already encoded
+                (see query_text_to_encode()); only used on a cache miss
             
         Returns:
-            List of RecipeWithMatch objects sorted by relevance
+            Tuple of (corpus generation the positions refer to, hits sorted by relevance)
         """
-        # Check cache first
-        # Combine all parameters into a single dict for cache key generation
-        cache_data = {
-            "ingredients": sorted(user_ingredients),
-            "use_vector_search": use_vector_search,
-            "top_k": top_k
+        corpus, ranking, key_ingredients = self._ranking(
+            user_ingredients, use_vector_search, top_k, sort_by, min_score, adaptive, query_vector
+        )
+        return corpus, list(self._iter_hits(corpus, ranking, user_ingredients, key_ingredients, sort_by))
+    
+    def stream_suitable_hits(
+        self, 
+        user_ingredients: List[str],
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        sort_by: str = "relevance",
+        min_score: Optional[float] = None,
+        adaptive: bool = False,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[RecipeCorpus, int, Iterator[Hit]]:
+        """
+        Like find_suitable_hits(), with the hits resolved lazily
+        
+        Only the ranking (a few bytes per hit) is computed up front; each hit's
+        matching ingredients are resolved as the iterator reaches it, so a
+        streamed response never holds more than the hits being written.
+        
+        Returns:
+            Tuple of (corpus generation, number of hits, iterator of hits by relevance)
+        """
+        corpus, ranking, key_ingredients = self._ranking(
+            user_ingredients, use_vector_search, top_k, sort_by, min_score, adaptive, query_vector
+        )
+        return corpus, len(ranking), self._iter_hits(corpus, ranking, user_ingredients, key_ingredients, sort_by)
+    
+    def _ranking(
+        self, 
+        user_ingredients: List[str],
+        use_vector_search: bool,
+        top_k: int,
+        sort_by: str,
+        min_score: Optional[float],
+        adaptive: bool,
+        query_vector: Optional[np.ndarray] = None
+    ) -> Tuple[RecipeCorpus, CachedRanking, Tuple[str, ...]]:
+        """Cached ranking of a recommendation query, with its corpus and cache key ingredients"""
+        adaptive = adaptive and min_score is not None
+        corpus = self.corpus
+        # Only relevance rankings can come from the index
+        index_generation = faiss_service.generation if use_vector_search and sort_by == "relevance" else None
+        
+        key_ingredients = tuple(sorted(user_ingredients))
+        cache_key = self._cache_key(
+            corpus, index_generation, key_ingredients, use_vector_search, top_k, sort_by, min_score, adaptive
+        )
+        
+        # The cache holds compact rankings (recipe positions + match bitmasks);
+        # concurrent misses for the same key share a single computation.
+        # Empty results are cached too, as shorter-lived negative entries.
+        ranking = cache.get_or_set(
+            cache_key,
+            lambda: CachedRanking.build(
+                self._search_recipes(
+                    corpus, index_generation, user_ingredients, use_vector_search, top_k, sort_by, min_score,
+                    adaptive, query_vector
+                ),
+                key_ingredients
+            ),
+            ttl_seconds=self._ranking_ttl
+        )
+        return corpus, ranking, key_ingredients
+    
+    def query_text_to_encode(
+        self, 
+        user_ingredients: List[str],
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        sort_by: str = "relevance",
+        min_score: Optional[float] = None,
+        adaptive: bool = False
+    ) -> Optional[str]:
+        """
+        Text a recommendation query would encode, if its ranking has to be computed
+        
+        Lets async callers encode it up front (EmbeddingService.encode_text_async)
+        and pass the vector in as query_vector. None when the ranking is
+        cached, doesn't use vector search or pools compositional vectors.
+        """
+        if sort_by != "relevance" or not use_vector_search or not user_ingredients:
+            return None
+        if settings.EMBEDDING_COMPOSITIONAL_QUERIES:
+            return None
+        corpus = self.corpus
+        cache_key = self._cache_key(
+            corpus, faiss_service.generation, tuple(sorted(user_ingredients)), use_vector_search, top_k, sort_by,
+            min_score, adaptive and min_score is not None
+        )
+        if not self.vector_search_ready(corpus) or cache.contains(cache_key):
+            return None
+        return ingredient_query_text(user_ingredients)
+    
+    @staticmethod
+    def _cache_key(
+        corpus: RecipeCorpus,
+        index_generation: Optional[int],
+        key_ingredients: Tuple[str, ...],
+        use_vector_search: bool,
+        top_k: int,
+        sort_by: str,
+        min_score: Optional[float],
+        adaptive: bool
+    ) -> tuple:
+        """Cache key of a recommendation ranking"""
+        # Tuple key: hashing it is much cheaper than JSON + MD5 on every lookup.
+        # Rankings hold positions, so the key names the corpus (and index)
+        # generation they refer to; a reload drops the stale ones.
+        return (
+            "recipes", corpus.generation, index_generation,
+            key_ingredients, use_vector_search, top_k, sort_by, min_score, adaptive
+        )
+    
+    @staticmethod
+    def _ranking_ttl(ranking: CachedRanking) -> float:
+        return settings.CACHE_TTL_SECONDS if len(ranking) else settings.CACHE_NEGATIVE_TTL_SECONDS
+    
+    def find_suitable_hits_batch(
+        self,
+        fridges: List[List[str]],
+        use_vector_search: bool = True,
+        top_k: int = 50,
+        sort_by: str = "relevance"
+    ) -> Tuple[RecipeCorpus, int, List[Tuple[int, Iterator[Hit]]]]:
+        """
+        Recommendations for many fridges at once
+        
+        Fridges with the same ingredients (in any order) are ranked once, and
+        rankings already cached (or being computed by another request) are
+        reused. The remaining vector searches
+        share one encode call and one index search; their matching
+        ingredients come from one ingredient x recipe match matrix. Each
+        fridge gets the same results as find_suitable_hits().
+        
+        Args:
+            fridges: Non-empty ingredient lists
+            use_vector_search, top_k, sort_by: As for find_suitable_hits()
+            
+        Returns:
+            Tuple of (corpus generation, number of distinct fridges, per
+            fridge in request order: (number of hits, lazy hits iterator))
+        """
+        corpus = self.corpus
+        index_generation = faiss_service.generation if use_vector_search and sort_by == "relevance" else None
+        keys = [tuple(sorted(ingredients)) for ingredients in fridges]
+        # First fridge of each distinct key: the one the ranking is computed for
+        distinct: Dict[Tuple[str, ...], List[str]] = {}
+        for key, ingredients in zip(keys, fridges):
+            distinct.setdefault(key, ingredients)
+        
+        # Misses are ranked together; a ranking another request (single or
+        # batch) is already computing is waited for instead
+        cache_keys = {
+            self._cache_key(corpus, index_generation, key, use_vector_search, top_k, sort_by, None, False): key
+            for key in distinct
         }
-        cache_key = cache._generate_key("recipes", cache_data)
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            logger.debug(f"Cache hit for ingredients: {user_ingredients}")
-            return cached_result
+        computed = cache.get_or_set_many(
+            list(cache_keys),
+            lambda missing: self._rank_batch(
+                corpus, index_generation, [distinct[cache_keys[cache_key]] for cache_key in missing],
+                use_vector_search, top_k, sort_by
+            ),
+            ttl_seconds=self._ranking_ttl
+        )
+        rankings: Dict[Tuple[str, ...], CachedRanking] = dict(zip(cache_keys.values(), computed))
         
-        self._ensure_loaded()
+        return corpus, len(distinct), [
+            (len(rankings[key]), self._iter_hits(corpus, rankings[key], list(ingredients), key, sort_by))
+            for ingredients, key in zip(fridges, keys)
+        ]
+    
+    def _rank_batch(
+        self,
+        corpus: RecipeCorpus,
+        index_generation: Optional[int],
+        fridges: List[List[str]],
+        use_vector_search: bool,
+        top_k: int,
+        sort_by: str
+    ) -> List[CachedRanking]:
+        """Uncached rankings of several fridges (vector search batched, the rest one by one)"""
+        if sort_by == "relevance" and use_vector_search and self.vector_search_ready(corpus):
+            try:
+                distances, indices = faiss_service.search_by_ingredients_batch(
+                    fridges, k=min(top_k, len(corpus.recipes)), embedding_service=embedding_service
+                )
+                if faiss_service.generation != index_generation:
+                    raise RuntimeError("FAISS index was reloaded during the search")
+                return self._vector_rankings(corpus, fridges, indices, faiss_service.scores(distances))
+            except Exception as e:
+                logger.warning(f"Batch vector search failed: {e}, falling back to string matching")
+                use_vector_search = False
+        
+        return [
+            CachedRanking.build(
+                self._search_recipes(corpus, index_generation, ingredients, use_vector_search, top_k, sort_by),
+                tuple(sorted(ingredients))
+            )
+            for ingredients in fridges
+        ]
+    
+    def _vector_rankings(
+        self,
+        corpus: RecipeCorpus,
+        fridges: List[List[str]],
+        indices: np.ndarray,
+        scores: np.ndarray
+    ) -> List[CachedRanking]:
+        """Rankings from (n, k) batch search results, match masks from one match matrix"""
+        valid = (indices >= 0) & (indices < len(corpus.recipes))
+        positions = np.unique(indices[valid])
+        ingredients = list(dict.fromkeys(ingredient for fridge in fridges for ingredient in fridge))
+        row_of = {ingredient: row for row, ingredient in enumerate(ingredients)}
+        matrix = corpus.ingredient_index.match_matrix(ingredients, positions)
+        
+        rankings = []
+        for i, fridge in enumerate(fridges):
+            ids = indices[i][valid[i]]
+            ranking_scores = array('f', scores[i][valid[i]].tolist())
+            key_ingredients = tuple(sorted(fridge))
+            if len(key_ingredients) > MAX_MASK_INGREDIENTS:
+                rankings.append(CachedRanking(array('i', ids.tolist()), None, ranking_scores))
+                continue
+            # Bits as in CachedRanking.build(): a repeated ingredient has the bit of its last copy
+            bit_of = {ingredient: 1 << bit for bit, ingredient in enumerate(key_ingredients)}
+            found = matrix[np.ix_([row_of[ingredient] for ingredient in bit_of], np.searchsorted(positions, ids))]
+            weights = np.array(list(bit_of.values()), dtype=np.uint64)
+            masks = (found * weights[:, None]).sum(axis=0, dtype=np.uint64)
+            rankings.append(CachedRanking(array('i', ids.tolist()), array('Q', masks.tolist()), ranking_scores))
+        return rankings
+    
+    def _search_recipes(
+        self,
+        corpus: RecipeCorpus,
+        index_generation: Optional[int],
+        user_ingredients: List[str],
+        use_vector_search: bool,
+        top_k: int,
+        sort_by: str,
+        min_score: Optional[float] = None,
+        adaptive: bool = False,
+        query_vector: Optional[np.ndarray] = None
+    ) -> List[Hit]:
+        """Uncached body of find_suitable_recipes"""
+        # Coverage sort modes rank the whole corpus with the ingredient matrix
+        if sort_by != "relevance":
+            return self._coverage_search(corpus, user_ingredients, sort_by, top_k)
         
         # Use vector search if available and requested
-        if use_vector_search and faiss_service.is_loaded():
+        if use_vector_search and self.vector_search_ready(corpus):
             try:
                 logger.debug(f"Using vector search for ingredients: {user_ingredients}")
                 
                 # Search using FAISS
                 distances, indices = faiss_service.search_by_ingredients(
                     ingredients=user_ingredients,
-                    k=min(top_k, len(self.recipes)),
-                    embedding_service=embedding_service
+                    k=min(top_k, len(corpus.recipes)),
+                    embedding_service=embedding_service,
+                    min_score=min_score,
+                    adaptive=adaptive,
+                    query_vector=query_vector
                 )
                 
-                # Convert results to RecipeWithMatch
-                results = []
-                for idx, dist in zip(indices, distances):
-                    if idx < len(self.recipes):
-                        recipe = self.recipes[idx]
-                        
-                        # Count actual matching ingredients for display
-                        matching_ingredients = self._count_matches(recipe, user_ingredients)
-                        
-                        results.append(
-                            RecipeWithMatch(
-                                **recipe.dict(),
-                                matchingCount=len(matching_ingredients),
-                                matchingIngredients=matching_ingredients
-                            )
-                        )
+                if faiss_service.generation != index_generation:
+                    raise RuntimeError("FAISS index was reloaded during the search")
                 
-                logger.debug(f"Vector search returned {len(results)} results")
+                # Count actual matching ingredients for display
+                scores = faiss_service.scores(distances)
+                hits = [
+                    (int(idx), self._count_matches(corpus, idx, user_ingredients), float(score))
+                    for idx, score in zip(indices, scores)
+                    if 0 <= idx < len(corpus.recipes)
+                ]
                 
-                # Cache result for 5 minutes
-                cache.set(cache_key, results, ttl_seconds=300)
+                logger.debug(f"Vector search returned {len(hits)} results")
                 
-                return results
+                return hits
                 
             except Exception as e:
                 logger.warning(f"Vector search failed: {e}, falling back to string matching")
@@ -187,33 +702,91 @@ class RecipeService:
         
         # Fallback to string matching
         logger.debug(f"Using string matching for ingredients: {user_ingredients}")
-        results = self._string_matching_search(user_ingredients)
+        hits = self._string_matching_search(corpus, user_ingredients)
         
         # Limit results to top_k
-        results = results[:top_k]
-        
-        # Cache result for 5 minutes
-        cache.set(cache_key, results, ttl_seconds=300)
-        
-        return results
+        return hits[:top_k]
     
     def get_all_recipes(self, limit: int = 50, offset: int = 0) -> List[Recipe]:
         """Get all recipes with pagination"""
-        self._ensure_loaded()
-        return self.recipes[offset:offset + limit]
+        # Holding the corpus keeps its store mapped (see install_corpus())
+        corpus = self.corpus
+        return corpus.recipes[offset:offset + limit]
     
     def get_recipe_by_title(self, title: str) -> Optional[Recipe]:
         """Get a recipe by title"""
-        self._ensure_loaded()
-        for recipe in self.recipes:
-            if recipe.Title == title:
-                return recipe
-        return None
+        corpus = self.corpus
+        idx = corpus.position_by_title.get(title)
+        return corpus.recipes.get(idx) if idx is not None else None
+    
+    def get_recipe_by_image_name(self, image_name: str) -> Optional[Recipe]:
+        """Get a recipe by image name"""
+        corpus = self.corpus
+        idx = corpus.position_by_image_name.get(image_name)
+        return corpus.recipes.get(idx) if idx is not None else None
+    
+    def position_of(self, recipe_id: int) -> Optional[int]:
+        """Position (FAISS vector id) of the recipe with a stable id, None if unknown"""
+        return self.corpus.position_by_id.get(recipe_id)
+    
+    def get_recipe_by_id(self, recipe_id: int) -> Optional[Recipe]:
+        """Get a recipe by its stable id"""
+        corpus = self.corpus
+        idx = corpus.position_by_id.get(recipe_id)
+        return corpus.recipes.get(idx) if idx is not None else None
+    
+    def get_recipes_by_ids(self, recipe_ids: Sequence[int]) -> List[Optional[Recipe]]:
+        """Get recipes by stable id, in request order (None for unknown ids)"""
+        corpus = self.corpus
+        positions = [corpus.position_by_id.get(recipe_id) for recipe_id in recipe_ids]
+        return [corpus.recipes.get(idx) if idx is not None else None for idx in positions]
+    
+    def get_recipe_at(self, idx: int) -> Recipe:
+        """Get a recipe by its position (FAISS vector id)"""
+        corpus = self.corpus
+        return corpus.recipes.get(idx)
+    
+    def _title_positions(self, corpus: RecipeCorpus, query: str, limit: int) -> List[int]:
+        """Positions of the first `limit` recipes whose title contains `query` (case-insensitive)"""
+        query_lower = query.lower()
+        results = []
+        for idx, title in enumerate(corpus.recipes.column('Title')):
+            if query_lower in title.lower():
+                results.append(idx)
+                if len(results) >= limit:
+                    break
+        return results
+    
+    def search_titles(self, query: str, limit: int) -> List[Recipe]:
+        """Get the first `limit` recipes whose title contains `query` (case-insensitive)"""
+        corpus = self.corpus
+        return [corpus.recipes.get(idx) for idx in self._title_positions(corpus, query, limit)]
+    
+    def search_text(self, query: str, limit: int) -> Tuple[RecipeCorpus, List[Hit], str]:
+        """
+        Text search without the FAISS index
+        
+        Ranked substring / typo-tolerant matching over titles and
+        ingredients with the trigram index, else search_titles().
+        
+        Returns:
+            Tuple of (corpus generation, hits, search method: "trigram" or "string_matching")
+        """
+        corpus = self.corpus
+        if corpus.text_index is None:
+            hits = [(idx, [], None) for idx in self._title_positions(corpus, query, limit)]
+            return corpus, hits, "string_matching"
+        
+        positions, scores = corpus.text_index.search(query, limit)
+        return corpus, [(int(idx), [], float(score)) for idx, score in zip(positions, scores)], "trigram"
+    
+    def corpus_fingerprint(self) -> bytes:
+        """Fingerprint of the served recipes, see faiss_service.check_corpus()"""
+        return self.corpus.fingerprint
     
     def get_total_count(self) -> int:
         """Get total number of recipes"""
-        self._ensure_loaded()
-        return len(self.recipes)
+        return len(self.corpus.recipes)
 
 
 # Singleton instance
@@ -0,0 +1,272 @@
+"""
+Hot reload service
+Swaps in new recipe data and a rebuilt FAISS index without restarting the API
+
+The new generation is loaded next to the one being served, then installed
+in one step; in-flight requests finish on the generation they started with.
+Cached rankings of the old generation are dropped, the rest of the cache
+(e.g. coverage rankings after an index-only reload) stays warm.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.faiss_service import FAISSService, faiss_service
+from app.services.recipe_service import recipe_service
+from app.utils.cache import cache
+from app.utils.memory import available_memory
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns) per data file, None if missing
+Signature = Dict[str, Optional[Tuple[int, int]]]
+
+
+def _signature(paths) -> Signature:
+    """Size and mtime of each file, to tell whether it changed since the last load"""
+    signature = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature[str(path)] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature[str(path)] = None
+    return signature
+
+
+class ReloadService:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._corpus_signature: Signature = {}
+        self._index_signature: Signature = {}
+        # (corpus, index) signatures of the files a reload last failed on;
+        # the watcher leaves them alone until they change again
+        self._failed_signatures: Optional[Tuple[Signature, Signature]] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reloads = 0
+        self.deferred = 0
+        self.failures = 0
+        self.last_result: Optional[dict] = None
+
+    def _corpus_files(self):
+        return [recipe_service._data_path(name) for name in ('recipes.json', 'recipes.bin', 'ingredients.json')]
+
+    def _index_files(self):
+        return [faiss_service.index_path, faiss_service.map_path, faiss_service.metadata_path]
+
+    def mark_loaded(self):
+        """Record the data files currently served (call after startup loading)"""
+        self._corpus_signature = _signature(self._corpus_files())
+        self._index_signature = _signature(self._index_files())
+
+    def pending_changes(self) -> Tuple[bool, bool]:
+        """
+        Whether the data files changed since they were loaded
+
+        Returns:
+            Tuple of (corpus changed, index changed)
+        """
+        return (
+            _signature(self._corpus_files()) != self._corpus_signature,
+            _signature(self._index_files()) != self._index_signature
+        )
+
+    def served_signature(self) -> bytes:
+        """
+        Hash of the data files being served, as of startup or the last reload
+
+        Results derived from the data (e.g. stored recommendations) that were
+        computed under another signature are stale.
+        """
+        return hashlib.blake2b(
+            repr((sorted(self._corpus_signature.items()), sorted(self._index_signature.items()))).encode(),
+            digest_size=16
+        ).digest()
+
+    def _estimate_memory(self, reload_corpus: bool, reload_index: bool) -> int:
+        """Bytes the new generation needs while the current one is still served"""
+        needed = 0
+        if reload_corpus:
+            current = recipe_service.corpus.memory_bytes
+            if current is None:
+                # Parsed JSON and its indexes take a few times the file size
+                try:
+                    current = 3 * os.path.getsize(recipe_service._data_path('recipes.json'))
+                except OSError:
+                    current = 0
+            needed += current
+        if reload_index and not settings.FAISS_MMAP:
+            # A memory-mapped index is paged in on demand, a read one is copied
+            try:
+                needed += os.path.getsize(faiss_service.index_path)
+            except OSError:
+                pass
+        return needed
+
+    def reload(self, reason: str = "manual", force: bool = False) -> dict:
+        """
+        Load changed data files and serve them
+
+        Args:
+            reason: Logged with the reload ("manual", "watch", ...)
+            force: Reload corpus and index even if the files look unchanged
+
+        Returns:
+            Result dict; status is "reloaded", "unchanged", "in_progress"
+            (another reload is running), "deferred" (not enough free memory
+            to hold both generations) or "failed"
+        """
+        if not self._lock.acquire(blocking=False):
+            return {"status": "in_progress"}
+        signatures = (_signature(self._corpus_files()), _signature(self._index_files()))
+        try:
+            result = self._reload(reason, force, *signatures)
+        except Exception as e:
+            logger.error(f"Reload failed: {e}", exc_info=True)
+            self.failures += 1
+            self._failed_signatures = signatures
+            result = {"status": "failed", "error": str(e)}
+        finally:
+            self._lock.release()
+
+        result["reason"] = reason
+        result["timestamp"] = datetime.now().isoformat()
+        self.last_result = result
+        return result
+
+    def _reload(self, reason: str, force: bool, corpus_signature: Signature, index_signature: Signature) -> dict:
+        start = time.perf_counter()
+        reload_corpus = force or corpus_signature != self._corpus_signature
+        reload_index = force or index_signature != self._index_signature
+        if not reload_corpus and not reload_index:
+            return {"status": "unchanged"}
+
+        # Both generations are resident until the old one is released
+        needed = self._estimate_memory(reload_corpus, reload_index)
+        available = available_memory()
+        if available is not None and available - needed < settings.RELOAD_MIN_FREE_MB * 1024 * 1024:
+            self.deferred += 1
+            logger.warning(
+                f"Reload deferred: needs ~{needed // (1024 * 1024)} MB, "
+                f"{available // (1024 * 1024)} MB available (RELOAD_MIN_FREE_MB={settings.RELOAD_MIN_FREE_MB})"
+            )
+            return {
+                "status": "deferred",
+                "needed_bytes": needed,
+                "available_bytes": available
+            }
+
+        logger.info(f"Reloading ({reason}): corpus={reload_corpus}, index={reload_index}")
+        current = recipe_service.corpus
+        corpus = recipe_service.load_corpus(current.generation + 1) if reload_corpus else current
+
+        index = None
+        if reload_index:
+            index = FAISSService()
+            if not index.load_index():
+                # Keep serving the current index rather than dropping vector search
+                logger.warning("New FAISS index could not be loaded, keeping the current one")
+                index = None
+
+        # Verify before installing; an unchanged index is checked against a new corpus too
+        checked = index if index is not None else faiss_service
+        if reload_corpus or index is not None:
+            checked.check_corpus(corpus.fingerprint, len(corpus.recipes))
+
+        # Swap: between the two steps vector_search_ready() sees fingerprints
+        # that differ and requests fall back to string matching, they never
+        # resolve index positions in the wrong corpus
+        if index is not None:
+            faiss_service.adopt(index)
+        if corpus is not current:
+            recipe_service.install_corpus(corpus)
+
+        # Drop cached rankings of the replaced generations
+        index_generation = faiss_service.generation
+        evicted = cache.delete_where(
+            lambda key: isinstance(key, tuple) and len(key) > 2 and key[0] == "recipes" and (
+                key[1] != corpus.generation or (key[2] is not None and key[2] != index_generation)
+            )
+        )
+
+        self._corpus_signature = corpus_signature
+        if index is not None:
+            self._index_signature = index_signature
+        # A failed index is retried by a manual reload or once its files change
+        self._failed_signatures = (corpus_signature, index_signature) if reload_index and index is None else None
+        self.reloads += 1
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Reload done in {elapsed:.2f}s: corpus generation {corpus.generation}, "
+            f"index generation {index_generation}, {evicted} cached rankings dropped"
+        )
+        return {
+            "status": "reloaded",
+            "corpus_reloaded": corpus is not current,
+            "index_reloaded": index is not None,
+            "corpus_generation": corpus.generation,
+            "index_generation": index_generation,
+            "corpus_status": faiss_service.corpus_status,
+            "cache_evicted": evicted,
+            "seconds": round(elapsed, 3)
+        }
+
+    def _watch(self, interval: float):
+        """Poll the data files; reload once a change has been stable for one interval"""
+        last_seen = None
+        while not self._stop.wait(interval):
+            try:
+                seen = (_signature(self._corpus_files()), _signature(self._index_files()))
+                changed = seen != (self._corpus_signature, self._index_signature) and seen != self._failed_signatures
+                # Files still being written show a different signature on the next poll
+                if changed and seen == last_seen:
+                    result = self.reload("watch")
+                    if result["status"] != "deferred":
+                        last_seen = None
+                        continue
+                last_seen = seen if changed else None
+            except Exception as e:
+                logger.error(f"Reload watcher error: {e}", exc_info=True)
+
+    def start_watching(self, interval: float):
+        """Start the background watcher thread"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="reload-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching data files for changes every {interval}s")
+
+    def stop_watching(self):
+        """Stop the background watcher thread"""
+        if self._watcher is None:
+            return
+        self._stop.set()
+        self._watcher.join()
+        self._watcher = None
+
+    def get_stats(self) -> dict:
+        """Reload counters, generations and files changed since the last load"""
+        corpus_changed, index_changed = self.pending_changes()
+        return {
+            "reloads": self.reloads,
+            "deferred": self.deferred,
+            "failures": self.failures,
+            "watching": self._watcher is not None,
+            "corpus_generation": recipe_service.corpus.generation,
+            "index_generation": faiss_service.generation,
+            "pending": {"corpus": corpus_changed, "index": index_changed},
+            "last_result": self.last_result
+        }
+
+
+# Singleton instance
+reload_service = ReloadService()
@@ -0,0 +1,190 @@
+"""
+Batch Recommendation Benchmark
+Throughput of POST /api/recipes/recommend/batch against one
+POST /api/recipes/recommend per fridge
+
+Requests go straight through the ASGI app (startup included), so HTTP
+parsing is left out on both sides. Single requests are sent sequentially
+and `--concurrency` at a time. The recommendation cache is cleared before
+every pass, so every fridge is ranked; the fridge list has some repeats
+(`--duplicates`), as users' fridges do.
+
+Batch results are checked against the single ones. FAISS computes large
+query batches through BLAS, which rounds distances differently in the
+last bits, so scores are compared with a tolerance and recipes with
+(nearly) tied scores may swap places; such fridges are counted.
+
+Usage:
+    python -m app.tools.bench_batch_recommend [--fridges 1000] [--batch-size 500] [--k 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import List, Tuple
+
+from app.main import app
+from app.utils.cache import cache
+
+# Largest score difference the BLAS rounding explains
+SCORE_TOLERANCE = 1e-5
+
+
+def _load_vocabulary() -> List[str]:
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'ingredients.json'
+    )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+async def _post(path: str, body: dict) -> Tuple[int, bytes]:
+    """One POST through the app, returning (status, body)"""
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 3001)
+    }
+    received = False
+    status, chunks = 0, []
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def _singles(fridges: List[List[str]], k: int, concurrency: int) -> List[bytes]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(ingredients: List[str]) -> bytes:
+        async with semaphore:
+            status, body = await _post("/api/recipes/recommend", {"ingredients": ingredients, "top_k": k})
+            if status != 200:
+                raise SystemExit(f"/recommend returned HTTP {status}")
+            return body
+
+    return await asyncio.gather(*(one(ingredients) for ingredients in fridges))
+
+
+async def _batches(fridges: List[List[str]], k: int, batch_size: int) -> List[bytes]:
+    bodies = []
+    for start in range(0, len(fridges), batch_size):
+        status, body = await _post(
+            "/api/recipes/recommend/batch", {"fridges": fridges[start:start + batch_size], "top_k": k}
+        )
+        if status != 200:
+            raise SystemExit(f"/recommend/batch returned HTTP {status}")
+        bodies.append(body)
+    return bodies
+
+
+def _compare(singles: List[bytes], batches: List[bytes]) -> int:
+    """
+    Check batch results against single ones
+
+    Returns:
+        Number of fridges whose recipes are in a different order (ties only)
+    """
+    results = [result for body in batches for result in json.loads(body)["results"]]
+    if len(results) != len(singles):
+        raise SystemExit("Batch results differ from the single requests")
+    reordered = 0
+    for single, batch in zip(singles, results):
+        single = json.loads(single)
+        single_hits, batch_hits = single.pop("recommendations"), batch.pop("recommendations")
+        if single != batch or len(single_hits) != len(batch_hits):
+            raise SystemExit("Batch results differ from the single requests")
+        for a, b in zip(single_hits, batch_hits):
+            if a["score"] is not None and abs(a["score"] - b["score"]) > SCORE_TOLERANCE:
+                raise SystemExit("Batch scores differ from the single requests")
+            if a["id"] != b["id"] and a["score"] is None:
+                raise SystemExit("Batch ranking differs from the single requests")
+        by_id = {hit["id"]: hit for hit in batch_hits}
+        if [hit["id"] for hit in single_hits] != [hit["id"] for hit in batch_hits]:
+            reordered += 1
+        for hit in single_hits:
+            # A recipe tied with the last one may be swapped for another
+            if hit["id"] in by_id and hit["matchingIngredients"] != by_id[hit["id"]]["matchingIngredients"]:
+                raise SystemExit("Batch matching ingredients differ from the single requests")
+    return reordered
+
+
+async def _bench(fridges: List[List[str]], k: int, batch_size: int, concurrency: int):
+    await app.router.startup()
+    try:
+        # Warm up the model and the lookup caches outside the timings
+        await _batches(fridges[:10], k, batch_size)
+
+        timings, expected, reordered = {}, None, 0
+        for name, run in (
+            ("single, sequential", lambda: _singles(fridges, k, 1)),
+            (f"single, {concurrency} concurrent", lambda: _singles(fridges, k, concurrency)),
+            (f"batch of {batch_size}", lambda: _batches(fridges, k, batch_size))
+        ):
+            cache.clear()
+            start = time.perf_counter()
+            bodies = await run()
+            timings[name] = time.perf_counter() - start
+            if expected is None:
+                expected = bodies
+            elif name.startswith("batch"):
+                reordered = _compare(expected, bodies)
+
+        print(
+            f"{len(fridges)} fridges ({len(set(map(tuple, map(sorted, fridges))))} distinct), top_k={k}: "
+            f"results match, {reordered} with tied recipes in another order"
+        )
+        baseline = timings["single, sequential"]
+        for name, elapsed in timings.items():
+            print(
+                f"  {name:<24} {elapsed:7.2f} s  {len(fridges) / elapsed:8.1f} fridges/s  "
+                f"{baseline / elapsed:5.1f}x"
+            )
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fridges', type=int, default=1000, help="Number of fridges")
+    parser.add_argument('--duplicates', type=float, default=0.2, help="Share of fridges repeating an earlier one")
+    parser.add_argument('--batch-size', type=int, default=500, help="Fridges per batch request (at most 1000)")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent single requests")
+    parser.add_argument('--k', type=int, default=50, help="Results per fridge")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    vocabulary = _load_vocabulary()
+    rnd = random.Random(args.seed)
+    fridges: List[List[str]] = []
+    for _ in range(args.fridges):
+        if fridges and rnd.random() < args.duplicates:
+            fridges.append(list(rnd.choice(fridges)))
+        else:
+            fridges.append(rnd.sample(vocabulary, rnd.randint(2, 8)))
+
+    asyncio.run(_bench(fridges, args.k, args.batch_size, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compositional Query Benchmark
+Pooled per-ingredient query vectors vs encoding the ingredient query text
+
+Recall@k is the share of the text-encoded query's top-k recipes that the
+pooled query also returns. Latency covers building the query vector only
+(model forward pass vs pooling); the index search is the same for both.
+Requires the FAISS index and python -m app.tools.build_ingredient_embeddings.
+
+Usage:
+    python -m app.tools.bench_compositional_queries [--queries 300] [--k 10 50] [--unknown 0.0]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+from app.utils.ingredient_vectors import ingredient_query_text
+
+
+def _load_vocabulary() -> List[str]:
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'ingredients.json'
+    )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _report(name: str, timings: List[float]):
+    us = np.array(timings) * 1e6
+    print(
+        f"  {name:<10} p50={np.percentile(us, 50):10.1f} us  "
+        f"p99={np.percentile(us, 99):10.1f} us  mean={us.mean():10.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=300, help="Number of fridge queries")
+    parser.add_argument('--k', type=int, nargs='+', default=[10, 50], help="Cutoffs for recall@k")
+    parser.add_argument('--unknown', type=float, default=0.0, help="Share of queries with one out-of-vocabulary ingredient")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not faiss_service.load_index():
+        raise SystemExit("FAISS index is required for this benchmark")
+    vectors = embedding_service.get_ingredient_vectors()
+    if vectors is None:
+        raise SystemExit("Ingredient embeddings missing, run: python -m app.tools.build_ingredient_embeddings")
+
+    vocabulary = _load_vocabulary()
+    rnd = random.Random(args.seed)
+    queries = []
+    for _ in range(args.queries):
+        query = rnd.sample(vocabulary, rnd.randint(2, 8))
+        if rnd.random() < args.unknown:
+            query.append(f"{rnd.choice(vocabulary)} {rnd.choice(['paste', 'powder', 'stock'])}")
+        queries.append(query)
+
+    # Warm up the model so loading isn't measured
+    embedding_service.encode_texts(["warm up"])
+
+    text_timings, pooled_timings = [], []
+    text_vectors, pooled_vectors = [], []
+    for query in queries:
+        start = time.perf_counter()
+        text_vectors.append(embedding_service.encode_text(ingredient_query_text(query)))
+        text_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pooled_vectors.append(embedding_service.encode_ingredients(query))
+        pooled_timings.append(time.perf_counter() - start)
+
+    print(f"Query vector construction, {len(queries)} queries of 2-8 ingredients ({args.unknown:.0%} with an unknown one)")
+    _report("text", text_timings)
+    _report("pooled", pooled_timings)
+
+    k_max = max(args.k)
+    _, text_ids = faiss_service.search_batch(np.vstack(text_vectors).astype('float32'), k_max)
+    _, pooled_ids = faiss_service.search_batch(np.vstack(pooled_vectors).astype('float32'), k_max)
+    print("\nRecall of pooled queries against text-encoded queries")
+    for k in args.k:
+        recall = np.mean([
+            len(set(text_row[:k]) & set(pooled_row[:k])) / k
+            for text_row, pooled_row in zip(text_ids, pooled_ids)
+        ])
+        print(f"  recall@{k:<4} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Coverage Scorer Benchmark
+Measures coverage sort modes at the current corpus size and a scaled-up corpus
+
+Usage:
+    python -m app.tools.bench_coverage_scorer [--queries 500] [--scale 10] [--k 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import List
+
+import numpy as np
+from scipy import sparse
+
+from app.services.recipe_service import recipe_service
+from app.utils.coverage_scorer import SORT_MODES, CoverageScorer
+
+
+def _load_vocabulary() -> List[str]:
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'ingredients.json'
+    )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _scaled(scorer: CoverageScorer, scale: int) -> CoverageScorer:
+    """Tile the recipe matrix `scale` times to simulate a larger corpus"""
+    scaled = CoverageScorer.__new__(CoverageScorer)
+    scaled.__dict__.update(scorer.__dict__)
+    scaled.matrix = sparse.vstack([scorer.matrix] * scale, format='csr')
+    scaled.columns = scaled.matrix.tocsc()
+    scaled.required = np.tile(scorer.required, scale)
+    return scaled
+
+
+def _bench(scorer: CoverageScorer, queries: List[List[str]], k: int):
+    print(f"Recipes: {scorer.matrix.shape[0]}, matrix entries: {scorer.matrix.nnz}")
+    for sort_by in SORT_MODES:
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            scorer.rank(query, sort_by, k)
+            timings.append(time.perf_counter() - start)
+        ms = np.array(timings) * 1000
+        print(
+            f"  {sort_by:<16} p50={np.percentile(ms, 50):7.3f} ms  "
+            f"p99={np.percentile(ms, 99):7.3f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=500, help="Number of fridge queries per sort mode")
+    parser.add_argument('--scale', type=int, default=10, help="Corpus multiplier for the scaled run")
+    parser.add_argument('--k', type=int, default=50, help="Results per query")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for query sampling")
+    args = parser.parse_args()
+
+    recipe_service.get_total_count()
+    scorer = recipe_service.coverage_scorer
+    if scorer is None:
+        raise SystemExit("Coverage matrix is not available")
+
+    vocabulary = _load_vocabulary()
+    rnd = random.Random(args.seed)
+    queries = [rnd.sample(vocabulary, rnd.randint(3, 15)) for _ in range(args.queries)]
+
+    _bench(scorer, queries, args.k)
+    if args.scale > 1:
+        _bench(_scaled(scorer, args.scale), queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
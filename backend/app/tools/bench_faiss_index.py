@@ -0,0 +1,121 @@
+"""
+FAISS Index Benchmark
+Recall@k vs. latency report for each index type against the flat baseline
+
+Run it on the real recipe embeddings (the default) before switching
+FAISS_INDEX_TYPE away from a flat index: --synthetic numbers only show the
+trend, not the recall the approximate types reach on this data.
+
+Usage:
+    python -m app.tools.bench_faiss_index [--k 50] [--queries 500]
+    python -m app.tools.bench_faiss_index --synthetic 300000 --types IndexIVFFlat IndexHNSW
+"""
+
+import argparse
+import time
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.services.faiss_service import faiss_service
+
+INDEX_TYPES = ["IndexIVFFlat", "IndexHNSW", "IndexIVFPQ", "IndexIVFPQ+OPQ"]
+NPROBE_SWEEP = [1, 4, 8, 16, 32, 64]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256]
+
+
+def _load_embeddings(synthetic: int, seed: int) -> np.ndarray:
+    if synthetic:
+        # Clustered vectors behave much more like real embeddings than uniform noise
+        rng = np.random.default_rng(seed)
+        centers = rng.standard_normal((max(synthetic // 200, 1), faiss_service.dimension)).astype('float32')
+        assignment = rng.integers(0, centers.shape[0], synthetic)
+        vectors = centers[assignment] + 0.5 * rng.standard_normal((synthetic, faiss_service.dimension)).astype('float32')
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    embeddings_path = faiss_service.index_path.parent / 'recipe_embeddings.npy'
+    if not embeddings_path.exists():
+        raise SystemExit(f"Embeddings not found at {embeddings_path}; use --synthetic N instead")
+    return np.ascontiguousarray(np.load(embeddings_path), dtype='float32')
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def _measure(index: faiss.Index, queries: np.ndarray, truth: np.ndarray, k: int):
+    timings = []
+    found = np.empty((queries.shape[0], k), dtype=np.int64)
+    for i in range(queries.shape[0]):
+        start = time.perf_counter()
+        _, indices = index.search(queries[i:i + 1], k)
+        timings.append(time.perf_counter() - start)
+        found[i] = indices[0]
+    ms = np.array(timings) * 1000
+    return _recall(found, truth), np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def _row(name: str, setting: str, recall: float, p50: float, p99: float, build_s: float, size_mb: float):
+    print(f"  {name:<16} {setting:<14} recall={recall:6.3f}  p50={p50:7.3f} ms  p99={p99:7.3f} ms  "
+          f"build={build_s:7.1f} s  size={size_mb:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--k', type=int, default=50, help="Neighbours per query")
+    parser.add_argument('--queries', type=int, default=500, help="Number of queries")
+    parser.add_argument('--synthetic', type=int, default=0, help="Use N synthetic vectors instead of recipe_embeddings.npy")
+    parser.add_argument('--types', nargs='+', default=INDEX_TYPES, help="Index types to compare")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    embeddings = _load_embeddings(args.synthetic, args.seed)
+    rng = np.random.default_rng(args.seed)
+    queries = embeddings[rng.choice(embeddings.shape[0], args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype('float32')
+    if settings.FAISS_METRIC == "IP":
+        faiss.normalize_L2(queries)
+
+    print(f"Vectors: {embeddings.shape[0]}, dimension: {embeddings.shape[1]}, "
+          f"queries: {args.queries}, k: {args.k}, metric: {settings.FAISS_METRIC}")
+
+    flat_type = "IndexFlatIP" if settings.FAISS_METRIC == "IP" else "IndexFlatL2"
+    start = time.perf_counter()
+    flat, _ = faiss_service._create_index(embeddings, flat_type)
+    flat.add(embeddings)
+    build_s = time.perf_counter() - start
+    _, truth = flat.search(queries, args.k)
+    _, p50, p99 = _measure(flat, queries, truth, args.k)
+    _row(flat_type, "-", 1.0, p50, p99, build_s, faiss.serialize_index(flat).nbytes / 2**20)
+
+    for name in args.types:
+        index_type = name.split('+')[0]
+        original_opq = settings.FAISS_OPQ
+        settings.FAISS_OPQ = name.endswith('+OPQ')
+        try:
+            start = time.perf_counter()
+            index, params = faiss_service._create_index(embeddings, index_type)
+            index.add(embeddings)
+            build_s = time.perf_counter() - start
+        finally:
+            settings.FAISS_OPQ = original_opq
+        size_mb = faiss.serialize_index(index).nbytes / 2**20
+
+        if "nprobe" in params:
+            sweep_name, sweep = "nprobe", [n for n in NPROBE_SWEEP if n <= params["nlist"]]
+        elif "efSearch" in params:
+            sweep_name, sweep = "efSearch", [e for e in EF_SEARCH_SWEEP if e >= args.k] or [args.k]
+        else:
+            sweep_name, sweep = None, [None]
+
+        for value in sweep:
+            if sweep_name:
+                faiss_service._apply_search_params(index, {sweep_name: value})
+            recall, p50, p99 = _measure(index, queries, truth, args.k)
+            _row(name, f"{sweep_name}={value}" if sweep_name else "-", recall, p50, p99, build_s, size_mb)
+
+
+if __name__ == "__main__":
+    main()
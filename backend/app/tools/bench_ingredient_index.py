@@ -0,0 +1,90 @@
+"""
+Ingredient Index Benchmark
+Compares the inverted ingredient index against the legacy linear scan
+
+Usage:
+    python -m app.tools.bench_ingredient_index [--queries 500] [--seed 42]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.recipe import Recipe
+from app.services.recipe_service import recipe_service
+
+
+def _legacy_scan(recipes: List[Recipe], user_ingredients: List[str]) -> Dict[int, List[str]]:
+    """The pre-index string matching loop, kept here as the baseline"""
+    matches = {}
+    for idx, recipe in enumerate(recipes):
+        recipe_ingredients_lower = recipe.Ingredients.lower()
+        matching = [ing for ing in user_ingredients if ing.lower() in recipe_ingredients_lower]
+        if matching:
+            matches[idx] = matching
+    return matches
+
+
+def _load_vocabulary() -> List[str]:
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'ingredients.json'
+    )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _report(name: str, timings: List[float]):
+    ms = np.array(timings) * 1000
+    print(
+        f"  {name:<16} p50={np.percentile(ms, 50):8.3f} ms  "
+        f"p99={np.percentile(ms, 99):8.3f} ms  mean={ms.mean():8.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=500, help="Number of fridge queries to run")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for query sampling")
+    args = parser.parse_args()
+
+    recipes = recipe_service.get_all_recipes(limit=recipe_service.get_total_count())
+    index = recipe_service.ingredient_index
+    vocabulary = _load_vocabulary()
+
+    rnd = random.Random(args.seed)
+    queries = [rnd.sample(vocabulary, rnd.randint(1, 10)) for _ in range(args.queries)]
+
+    print(f"Recipes: {len(recipes)}, indexed tokens: {index.num_tokens}, queries: {len(queries)}")
+
+    scan_timings, cold_timings, warm_timings = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        expected = _legacy_scan(recipes, query)
+        scan_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        actual = index.match(query)
+        cold_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        index.match(query)
+        warm_timings.append(time.perf_counter() - start)
+
+        if actual != expected:
+            raise SystemExit(f"Result mismatch for query {query}")
+
+    print("All results identical to the linear scan")
+    _report("linear scan", scan_timings)
+    _report("index (cold)", cold_timings)
+    _report("index (warm)", warm_timings)
+
+
+if __name__ == "__main__":
+    main()
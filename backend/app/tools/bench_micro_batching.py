@@ -0,0 +1,187 @@
+"""
+Micro-batching Benchmark
+Throughput and tail latency of text search with and without micro-batching
+
+Two passes:
+- direct: client threads call faiss_service.search_by_ingredients()
+- api: concurrent POST /api/recipes/recommend requests through the ASGI app
+  (startup included), so queries go through the bounded search executor
+  (SEARCH_POOL_SIZE workers) like real traffic. The embedding batcher's
+  batch sizes are reported per client count: with more clients than
+  search workers they must still grow past SEARCH_POOL_SIZE.
+
+Every api request has fresh ingredients (the result cache is cleared too),
+so each one is encoded.
+
+Usage:
+    python -m app.tools.bench_micro_batching [--clients 1 8 32 128] [--requests 20] [--skip-direct]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+
+
+def _load_vocabulary() -> List[str]:
+    path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        'data',
+        'ingredients.json'
+    )
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _run(clients: int, requests_per_client: int, queries: List[List[str]], k: int):
+    timings: List[float] = []
+    lock = threading.Lock()
+
+    def client(client_id: int):
+        local = []
+        for i in range(requests_per_client):
+            query = queries[(client_id * requests_per_client + i) % len(queries)]
+            start = time.perf_counter()
+            faiss_service.search_by_ingredients(query, k=k, embedding_service=embedding_service)
+            local.append(time.perf_counter() - start)
+        with lock:
+            timings.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(timings) * 1000
+    return len(timings) / elapsed, np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+async def _recommend(app, body: dict) -> int:
+    """One POST /api/recipes/recommend through the app, returning the status"""
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/recipes/recommend", "raw_path": b"/api/recipes/recommend",
+        "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 3001)
+    }
+    received = False
+    status = 0
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _run_api(app, clients: int, requests_per_client: int, queries: List[List[str]], k: int):
+    timings: List[float] = []
+
+    async def client(client_id: int):
+        for i in range(requests_per_client):
+            query = queries[client_id * requests_per_client + i]
+            start = time.perf_counter()
+            status = await _recommend(app, {"ingredients": query, "top_k": k})
+            if status != 200:
+                raise SystemExit(f"/recommend returned HTTP {status}")
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(client_id) for client_id in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(timings) * 1000
+    return len(timings) / elapsed, np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+async def _bench_api(clients_list: List[int], requests_per_client: int, vocabulary: List[str], k: int, seed: int):
+    # Imported here: the app module sets up its own services and executors
+    from app.main import app
+    from app.utils.cache import cache
+
+    settings.EMBEDDING_MICRO_BATCHING = True
+    await app.router.startup()
+    try:
+        # Warm up the model and the index outside the timings
+        await _recommend(app, {"ingredients": ["warm", "up"], "top_k": k})
+
+        rnd = random.Random(seed + 1)
+        print(f"api (SEARCH_POOL_SIZE={settings.SEARCH_POOL_SIZE}, batching on):")
+        for clients in clients_list:
+            # Fresh queries: every request is ranked and encoded
+            queries = [
+                rnd.sample(vocabulary, rnd.randint(2, 8)) + [f"extra {rnd.random()}"]
+                for _ in range(clients * requests_per_client)
+            ]
+            cache.clear()
+            embedding_service._batcher.reset_stats()
+            throughput, p50, p99 = await _run_api(app, clients, requests_per_client, queries, k)
+            stats = embedding_service._batcher.get_stats()
+            print(
+                f"  clients={clients:<4} {throughput:8.1f} req/s  p50={p50:8.2f} ms  p99={p99:8.2f} ms  "
+                f"avg batch={stats['avg_batch_size']:6.2f}  largest batch={stats['largest_batch']}"
+            )
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32, 128], help="Concurrent client counts")
+    parser.add_argument('--requests', type=int, default=20, help="Requests per client")
+    parser.add_argument('--k', type=int, default=50, help="Results per query")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-direct', action='store_true', help="Only run the api pass")
+    args = parser.parse_args()
+
+    vocabulary = _load_vocabulary()
+
+    if not args.skip_direct:
+        if not faiss_service.load_index():
+            raise SystemExit("FAISS index is required for this benchmark")
+
+        rnd = random.Random(args.seed)
+        queries = [rnd.sample(vocabulary, rnd.randint(2, 8)) for _ in range(1000)]
+
+        # Warm up the model so loading isn't measured
+        embedding_service.encode_texts(["warm up"])
+
+        print(f"max batch size: {settings.EMBEDDING_BATCH_MAX_SIZE}, max wait: {settings.EMBEDDING_BATCH_MAX_WAIT_MS} ms")
+        for clients in args.clients:
+            for batching in (False, True):
+                settings.EMBEDDING_MICRO_BATCHING = batching
+                throughput, p50, p99 = _run(clients, args.requests, queries, args.k)
+                print(
+                    f"  clients={clients:<4} batching={'on ' if batching else 'off'}  "
+                    f"{throughput:8.1f} req/s  p50={p50:8.2f} ms  p99={p99:8.2f} ms"
+                )
+
+        print(f"Batcher stats: {faiss_service._text_batcher.get_stats()}")
+
+    asyncio.run(_bench_api(args.clients, args.requests, vocabulary, args.k, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+ONNX Backend Benchmark
+Parity, latency and memory of the ONNX Runtime backend against sentence-transformers on torch
+
+Parity is the cosine similarity between each backend's embedding of the
+same text (ingredient queries, recipe titles and full recipe texts); the
+command exits non-zero if any int8 similarity falls below --threshold.
+Cold start and memory are measured in fresh processes: importing the
+runtime, loading the model and encoding one query.
+
+Needs the torch model (EMBEDDING_MODEL) and the export from
+python -m app.tools.export_onnx_model.
+
+Usage:
+    python -m app.tools.bench_onnx_backend [--texts 300] [--threshold 0.99]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.config import settings
+from app.utils.ingredient_vectors import ingredient_query_text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BACKENDS = ("torch", "onnx-fp32", "onnx-int8")
+
+
+def _rss_mb() -> float:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _load(backend: str):
+    """Load one backend's model the way EmbeddingService does"""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(settings.EMBEDDING_MODEL, device='cpu')
+
+    from app.utils.onnx_encoder import OnnxSentenceEncoder
+    return OnnxSentenceEncoder(
+        os.path.join(BACKEND_DIR, settings.EMBEDDING_ONNX_DIR),
+        quantized=backend == "onnx-int8",
+        threads=max(1, os.cpu_count() or 1)
+    )
+
+
+def _child(backend: str):
+    """Cold start of one backend in this (fresh) process, printed as JSON"""
+    before = _rss_mb()
+    start = time.perf_counter()
+    model = _load(backend)
+    model.encode("Recipe with ingredients: eggs, flour, butter", convert_to_numpy=True)
+    print(json.dumps({"cold_start_s": time.perf_counter() - start, "rss_mb": _rss_mb() - before}))
+
+
+def _texts(count: int, seed: int) -> List[str]:
+    from app.services.embedding_service import embedding_service
+    from app.services.recipe_service import recipe_service
+
+    with open(os.path.join(BACKEND_DIR, 'data', 'ingredients.json'), 'r', encoding='utf-8') as f:
+        vocabulary = json.load(f)
+
+    rnd = random.Random(seed)
+    total = recipe_service.get_total_count()
+    texts = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            texts.append(ingredient_query_text(rnd.sample(vocabulary, rnd.randint(1, 8))))
+        elif kind == 1:
+            texts.append(recipe_service.get_recipe_at(rnd.randrange(total)).Title)
+        else:
+            # Long texts exercise truncation at max_seq_length
+            texts.append(embedding_service._prepare_recipe_text(recipe_service.get_recipe_at(rnd.randrange(total))))
+    return texts
+
+
+def _latency(model, texts: List[str]) -> Dict[str, float]:
+    single = []
+    for text in texts:
+        start = time.perf_counter()
+        model.encode(text, convert_to_numpy=True)
+        single.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.encode(texts, batch_size=32, convert_to_numpy=True)
+    batch = time.perf_counter() - start
+
+    ms = np.array(single) * 1000
+    return {"p50": np.percentile(ms, 50), "p99": np.percentile(ms, 99), "batch_tps": len(texts) / batch}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=int, default=300, help="Texts for parity and latency")
+    parser.add_argument('--threshold', type=float, default=0.99, help="Minimum int8 vs torch cosine similarity")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--child', choices=BACKENDS, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child)
+        return
+
+    print("Cold start (import + load + first query) and memory, fresh process each")
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, '-m', 'app.tools.bench_onnx_backend', '--child', backend],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"  {backend:<10} cold start={result['cold_start_s']:6.2f} s  rss=+{result['rss_mb']:7.1f} MB")
+
+    texts = _texts(args.texts, args.seed)
+    models = {backend: _load(backend) for backend in BACKENDS}
+    embeddings = {
+        backend: np.asarray(model.encode(texts, batch_size=32, convert_to_numpy=True), dtype='float32')
+        for backend, model in models.items()
+    }
+
+    def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+    print(f"\nParity with torch, cosine similarity over {len(texts)} texts")
+    failed = False
+    for backend in BACKENDS[1:]:
+        similarity = cosine(embeddings["torch"], embeddings[backend])
+        print(f"  {backend:<10} min={similarity.min():.4f}  mean={similarity.mean():.4f}")
+        failed |= backend == "onnx-int8" and similarity.min() < args.threshold
+
+    print(f"\nEncoding latency, single query (ms) and batch-32 throughput (texts/s)")
+    for backend, model in models.items():
+        latency = _latency(model, texts)
+        print(
+            f"  {backend:<10} p50={latency['p50']:7.2f}  p99={latency['p99']:7.2f}  "
+            f"batch={latency['batch_tps']:8.1f}/s"
+        )
+
+    if failed:
+        raise SystemExit(f"FAIL: int8 embeddings fall below cosine {args.threshold} against torch")
+    print(f"\nOK: int8 embeddings stay above cosine {args.threshold} against torch")
+
+
+if __name__ == "__main__":
+    main()
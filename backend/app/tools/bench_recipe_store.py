@@ -0,0 +1,123 @@
+"""
+Recipe Store Benchmark
+Startup time and memory of loading recipes from recipes.json vs the mapped store
+
+Each measurement runs in a fresh interpreter. RSS is split into anonymous
+(private to the worker) and file-backed memory (the mapped store, shared by
+all workers through the page cache). The --workers run loads N processes at
+once and reports their summed PSS, i.e. what N uvicorn workers really cost.
+
+Usage:
+    python -m app.tools.bench_recipe_store [--runs 3] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+
+def _memory_kb() -> Dict[str, int]:
+    """RSS breakdown of this process from /proc (Linux)"""
+    memory = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                memory[key] = int(value.split()[0])
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                memory['Pss'] = int(line.split()[1])
+    return memory
+
+
+def _child(hold_seconds: float):
+    """Load recipes in this process and print timings as JSON"""
+    from app.services.recipe_service import recipe_service
+
+    before = _memory_kb()
+    start = time.perf_counter()
+    recipe_service.get_total_count()
+    load_seconds = time.perf_counter() - start
+    after = _memory_kb()
+
+    print(json.dumps({
+        "load_s": load_seconds,
+        "recipes": recipe_service.get_total_count(),
+        "store": type(recipe_service.recipes).__name__,
+        "delta": {key: after[key] - before[key] for key in after},
+        "after": after
+    }), flush=True)
+    # Keep the mapping alive while sibling workers are measured
+    time.sleep(hold_seconds)
+
+
+def _spawn(store_enabled: bool, hold_seconds: float = 0.0) -> subprocess.Popen:
+    env = dict(os.environ, RECIPE_STORE_ENABLED=str(store_enabled).lower())
+    return subprocess.Popen(
+        [sys.executable, '-m', 'app.tools.bench_recipe_store', '--child', str(hold_seconds)],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+
+
+def _run(store_enabled: bool) -> dict:
+    process = _spawn(store_enabled)
+    output, _ = process.communicate()
+    return json.loads(output)
+
+
+def _workers(store_enabled: bool, workers: int) -> int:
+    """Summed PSS delta (kB) of `workers` processes holding their recipes at once"""
+    processes = [_spawn(store_enabled, hold_seconds=5.0) for _ in range(workers)]
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.kill()
+        process.wait()
+    return sum(result["delta"]["Pss"] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help="Fresh processes per mode (median is reported)")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent processes for the shared-memory run")
+    parser.add_argument('--child', type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child)
+        return
+
+    print(f"Recipe loading, median of {args.runs} fresh processes (memory = growth during load)")
+    for name, store_enabled in (("recipes.json", False), ("recipes.bin", True)):
+        runs: List[dict] = [_run(store_enabled) for _ in range(args.runs)]
+        if store_enabled and runs[0]["store"] != "RecipeStore":
+            print("  recipes.bin      not used, build it with: python -m app.tools.build_recipe_store")
+            continue
+
+        def median(key: str) -> float:
+            return float(np.median([run["delta"][key] for run in runs])) / 1024
+
+        print(
+            f"  {name:<16} {runs[0]['recipes']} recipes  "
+            f"load={np.median([run['load_s'] for run in runs]) * 1000:8.1f} ms  "
+            f"rss={median('VmRSS'):7.1f} MB  anon={median('RssAnon'):7.1f} MB  "
+            f"file={median('RssFile'):7.1f} MB"
+        )
+
+    if args.workers > 1:
+        print(f"\n{args.workers} concurrent workers, summed PSS growth during load")
+        for name, store_enabled in (("recipes.json", False), ("recipes.bin", True)):
+            print(f"  {name:<16} {_workers(store_enabled, args.workers) / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Response Serialization Benchmark
+Compares building /recommend responses through the response model with
+splicing the pre-serialized recipe JSON (RESPONSE_FRAGMENTS_ENABLED),
+for all fields and for a `fields=` projection
+
+The model path is the one FastAPI took for every result list: a
+RecipeWithMatch per hit (recipe.dict() + validation), response model
+validation and serialization, then JSONResponse rendering. Both bodies
+are compared byte for byte. Projected bodies are checked against the
+full ones, and timed both spliced and built from store columns (the
+path without fragments).
+
+Usage:
+    python -m app.tools.bench_response_serialization [--responses 200] [--sizes 10,50,100] [--fields summary]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.recipe import RecipeRecommendResponse, RecipeWithMatch
+from app.services.recipe_service import recipe_service
+from app.utils.json_fragments import RecipeFragments, encode, json_object, parse_fields
+
+USER_INGREDIENTS = ["chicken", "garlic", "onion", "lemon", "olive oil", "butter"]
+
+
+def _report(name: str, timings: List[float], size: int):
+    ms = np.array(timings) * 1000
+    print(
+        f"  {name:<22} p50={np.percentile(ms, 50):8.3f} ms  "
+        f"p99={np.percentile(ms, 99):8.3f} ms  per recipe={np.median(ms) * 1000 / size:7.2f} us"
+    )
+
+
+def _body(fragments: RecipeFragments, hits, projection: Optional[Tuple[str, ...]]) -> bytes:
+    return json_object([
+        ("recommendations", fragments.matches(hits, projection)),
+        ("count", encode(len(hits))),
+        ("userIngredients", encode(USER_INGREDIENTS)),
+        ("search_method", encode("vector"))
+    ])
+
+
+async def _bench(
+    fragments: RecipeFragments,
+    projection: Tuple[str, ...],
+    size: int,
+    responses: int,
+    rnd: random.Random
+):
+    recipes = recipe_service.recipes
+    field = create_response_field(name="response", type_=RecipeRecommendResponse)
+    model_timings, fragment_timings, model_bytes = [], [], 0
+    columns_timings, projected_timings, projected_bytes = [], [], 0
+
+    for _ in range(responses):
+        hits = [
+            (
+                rnd.randrange(len(recipes)),
+                rnd.sample(USER_INGREDIENTS, rnd.randint(0, 3)),
+                float(np.float32(rnd.uniform(-2, 0)))
+            )
+            for _ in range(size)
+        ]
+
+        start = time.perf_counter()
+        response = RecipeRecommendResponse(
+            recommendations=[
+                RecipeWithMatch(
+                    **recipes.get(idx).dict(),
+                    matchingCount=len(matching),
+                    matchingIngredients=matching,
+                    score=score
+                )
+                for idx, matching, score in hits
+            ],
+            count=len(hits),
+            userIngredients=USER_INGREDIENTS,
+            search_method="vector"
+        )
+        content = await serialize_response(field=field, response_content=response)
+        expected = JSONResponse(content).body
+        model_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        body = _body(fragments, hits, None)
+        fragment_timings.append(time.perf_counter() - start)
+
+        if body != expected:
+            raise SystemExit(f"Body mismatch for {size} results")
+        model_bytes += len(body)
+
+        # Projection without fragments: only the projected columns are read
+        start = time.perf_counter()
+        JSONResponse({
+            "recommendations": [
+                {
+                    **recipes.project(idx, projection),
+                    "matchingCount": len(matching),
+                    "matchingIngredients": matching,
+                    "score": score
+                }
+                for idx, matching, score in hits
+            ],
+            "count": len(hits),
+            "userIngredients": USER_INGREDIENTS,
+            "search_method": "vector"
+        }).body
+        columns_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        projected = _body(fragments, hits, projection)
+        projected_timings.append(time.perf_counter() - start)
+
+        full = json.loads(body)
+        for recipe in full["recommendations"]:
+            for name in set(recipe) - set(projection) - {"matchingCount", "matchingIngredients", "score"}:
+                del recipe[name]
+        if json.loads(projected) != full:
+            raise SystemExit(f"Projected body mismatch for {size} results")
+        projected_bytes += len(projected)
+
+    print(
+        f"{size} results: all fields {model_bytes // responses} bytes, "
+        f"{','.join(projection)} {projected_bytes // responses} bytes per response "
+        f"({1 - projected_bytes / model_bytes:.0%} smaller)"
+    )
+    _report("model", model_timings, size)
+    _report("fragments", fragment_timings, size)
+    _report("projected columns", columns_timings, size)
+    _report("projected fragments", projected_timings, size)
+    print(
+        f"  speedup vs model: fragments {np.median(model_timings) / np.median(fragment_timings):.1f}x, "
+        f"projected columns {np.median(model_timings) / np.median(columns_timings):.1f}x, "
+        f"projected fragments {np.median(model_timings) / np.median(projected_timings):.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=200, help="Responses per result count")
+    parser.add_argument('--sizes', default="10,50,100", help="Comma-separated result counts")
+    parser.add_argument('--fields', default="summary", help="fields= projection to compare")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    projection = parse_fields(args.fields)
+    if projection is None:
+        parser.error("--fields must leave out at least one field")
+
+    recipes = recipe_service.recipes
+    start = time.perf_counter()
+    fragments = RecipeFragments(recipes)
+    print(
+        f"Recipes: {len(recipes)}, pre-serialized {fragments.nbytes / 1024 / 1024:.1f} MB "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    rnd = random.Random(args.seed)
+    for size in (int(size) for size in args.sizes.split(',')):
+        asyncio.run(_bench(fragments, projection, size, args.responses, rnd))
+
+
+if __name__ == "__main__":
+    main()
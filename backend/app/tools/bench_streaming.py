@@ -0,0 +1,111 @@
+"""
+Streaming Recommendation Benchmark
+Compares POST /api/recipes/recommend as one JSON document with the
+`Accept: application/x-ndjson` stream, for growing top_k
+
+Requests go straight through the ASGI app (startup included); the body is
+counted and dropped as it is sent, like a socket would. Time to first
+byte is taken at the first non-empty body write. Peak memory is the
+tracemalloc peak while the request runs, in a separate pass (tracing
+slows everything down). Rankings are warmed first, so the numbers are
+about materializing and writing the results.
+
+Usage:
+    python -m app.tools.bench_streaming [--sizes 50,500,5000,20000] [--runs 5] [--fields all]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.main import app
+from app.routes.recipes import NDJSON
+
+INGREDIENTS = ["chicken", "garlic", "onion", "lemon", "olive oil", "butter"]
+
+
+async def _request(body: dict, fields: str, ndjson: bool) -> Tuple[float, float, int]:
+    """
+    One request through the app
+
+    Returns:
+        Tuple of (seconds to first body byte, total seconds, body bytes)
+    """
+    payload = json.dumps(body).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    if ndjson:
+        headers.append((b"accept", NDJSON.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/recipes/recommend", "raw_path": b"/api/recipes/recommend",
+        "query_string": f"fields={fields}".encode(), "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 3001)
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # The client stays connected until the response is complete
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    start = time.perf_counter()
+    first: Optional[float] = None
+    size = 0
+
+    async def send(message):
+        nonlocal first, size
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise SystemExit(f"HTTP {message['status']}")
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first is None:
+                first = time.perf_counter() - start
+            size += len(message["body"])
+
+    await app(scope, receive, send)
+    return first or 0.0, time.perf_counter() - start, size
+
+
+async def _bench(sizes: List[int], runs: int, fields: str):
+    await app.router.startup()
+    try:
+        print(f"{'top_k':>7} {'mode':<7} {'bytes':>10} {'TTFB p50':>11} {'total p50':>11} {'peak memory':>12}")
+        for top_k in sizes:
+            body = {"ingredients": INGREDIENTS, "top_k": top_k}
+            for ndjson in (False, True):
+                await _request(body, fields, ndjson)
+                timings = [await _request(body, fields, ndjson) for _ in range(runs)]
+
+                tracemalloc.start()
+                await _request(body, fields, ndjson)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                ttfb, total, size = (np.median([t[i] for t in timings]) for i in range(3))
+                print(
+                    f"{top_k:>7} {'ndjson' if ndjson else 'json':<7} {int(size):>10} "
+                    f"{ttfb * 1000:>8.2f} ms {total * 1000:>8.2f} ms {peak / 1024 / 1024:>9.2f} MB"
+                )
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default="50,500,5000,20000", help="Comma-separated top_k values")
+    parser.add_argument('--runs', type=int, default=5, help="Timed requests per top_k and mode")
+    parser.add_argument('--fields', default="all", help="fields= projection of the results")
+    args = parser.parse_args()
+
+    asyncio.run(_bench([int(size) for size in args.sizes.split(',')], args.runs, args.fields))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Text Index Benchmark
+Compares the trigram text index against the linear title scan it replaces
+
+Queries are title fragments (1-3 consecutive words, or a word prefix),
+as is and with one word misspelled. For fragments, the index results
+scoring 2 (whole query in the title) must be exactly the scan's results;
+misspelled fragments are scored on whether the results include a title
+containing the original fragment.
+
+Usage:
+    python -m app.tools.bench_text_index [--queries 500] [--scale 8] [--k 20]
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import List, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.services.recipe_service import recipe_service
+from app.utils.recipe_store import INGREDIENTS_LOWER
+from app.utils.trigram_index import TrigramIndex
+
+
+def _legacy_scan(titles: Sequence[str], query: str, limit: int) -> List[int]:
+    """The pre-index title matching loop, kept here as the baseline"""
+    query_lower = query.lower()
+    results = []
+    for idx, title in enumerate(titles):
+        if query_lower in title.lower():
+            results.append(idx)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def _misspell(word: str, rnd: random.Random) -> str:
+    """One deleted, replaced, inserted or swapped letter"""
+    i = rnd.randrange(1, len(word) - 1)
+    edit = rnd.choice(("delete", "replace", "insert", "swap"))
+    letter = rnd.choice("abcdefghijklmnopqrstuvwxyz")
+    if edit == "delete":
+        return word[:i] + word[i + 1:]
+    if edit == "replace":
+        return word[:i] + letter + word[i + 1:]
+    if edit == "insert":
+        return word[:i] + letter + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def _queries(titles: Sequence[str], count: int, rnd: random.Random):
+    """(fragment queries, [(misspelled fragment, original fragment)])"""
+    fragments, typos = [], []
+    while len(fragments) < count or len(typos) < count:
+        words = re.findall(r"\w+", titles[rnd.randrange(len(titles))])
+        if not words:
+            continue
+        start = rnd.randrange(len(words))
+        if rnd.random() < 0.25:
+            fragment = [words[start][:max(3, len(words[start]) // 2)]]
+        else:
+            fragment = words[start:start + rnd.randint(1, 3)]
+        if len(fragments) < count:
+            fragments.append(" ".join(fragment))
+        long_words = [i for i, word in enumerate(fragment) if len(word) >= 5]
+        if len(typos) < count and long_words:
+            i = rnd.choice(long_words)
+            misspelled = fragment[:i] + [_misspell(fragment[i], rnd)] + fragment[i + 1:]
+            typos.append((" ".join(misspelled), " ".join(fragment).lower()))
+    return fragments, typos
+
+
+def _report(name: str, timings: List[float]):
+    ms = np.array(timings) * 1000
+    print(
+        f"  {name:<16} p50={np.percentile(ms, 50):8.3f} ms  "
+        f"p99={np.percentile(ms, 99):8.3f} ms  mean={ms.mean():8.3f} ms"
+    )
+
+
+def _bench(titles: List[str], ingredients: Sequence[str], fragments: List[str], typos: list, k: int):
+    start = time.perf_counter()
+    index = TrigramIndex(titles, ingredients, min_similarity=settings.TEXT_SEARCH_MIN_SIMILARITY, lowered=True)
+    print(
+        f"Recipes: {len(index)}, words: {index.num_words}, trigrams: {index.num_trigrams}, "
+        f"postings: {index.nbytes / 1024 / 1024:.1f} MB, built in {time.perf_counter() - start:.2f}s"
+    )
+
+    scan_timings, index_timings = [], []
+    for query in fragments:
+        start = time.perf_counter()
+        expected = _legacy_scan(titles, query, k)
+        scan_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        positions, scores = index.search(query, k)
+        index_timings.append(time.perf_counter() - start)
+
+        if positions[scores == 2.0].tolist() != expected:
+            raise SystemExit(f"Result mismatch for query {query!r}")
+    print("Fragment queries: substring matches identical to the linear scan")
+    _report("linear scan", scan_timings)
+    _report("trigram index", index_timings)
+
+    found, scan_found, typo_timings = 0, 0, []
+    for query, fragment in typos:
+        scan_found += bool(_legacy_scan(titles, query, k))
+        start = time.perf_counter()
+        positions, _ = index.search(query, k)
+        typo_timings.append(time.perf_counter() - start)
+        found += any(fragment in titles[position].lower() for position in positions)
+    print(
+        f"Misspelled queries: intended title in top {k}: {found / len(typos):.1%} "
+        f"(linear scan finds anything for {scan_found / len(typos):.1%})"
+    )
+    _report("trigram index", typo_timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=500, help="Number of queries of each kind")
+    parser.add_argument('--scale', type=int, default=8, help="Corpus multiplier for the scaled run")
+    parser.add_argument('--k', type=int, default=20, help="Results per query")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for query sampling")
+    args = parser.parse_args()
+
+    recipes = recipe_service.recipes
+    titles = list(recipes.column('Title'))
+    ingredients = list(recipes.column(INGREDIENTS_LOWER))
+    fragments, typos = _queries(titles, args.queries, random.Random(args.seed))
+
+    _bench(titles, ingredients, fragments, typos, args.k)
+    if args.scale > 1:
+        print()
+        _bench(titles * args.scale, ingredients * args.scale, fragments, typos, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Worker Memory Benchmark
+Resident memory per worker process holding the FAISS index, with and without mmap
+
+For each worker count, that many fresh processes load the index at the same
+time (as uvicorn --workers would) and report how much their memory grew.
+Private (anonymous) memory is what every extra worker adds; file-backed
+pages of a mapped index are shared through the page cache, which PSS
+splits evenly between the processes mapping them.
+
+Usage:
+    python -m app.tools.bench_worker_memory [--workers 1 4 8]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+def _memory_kb() -> Dict[str, int]:
+    """RSS breakdown of this process from /proc (Linux)"""
+    memory = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                memory[key] = int(value.split()[0])
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                memory['Pss'] = int(line.split()[1])
+    return memory
+
+
+def _child(hold_seconds: float):
+    """Load the index in this process, touch every vector page, and print memory growth as JSON"""
+    import numpy as np
+    from app.services.faiss_service import faiss_service
+
+    before = _memory_kb()
+    loaded = faiss_service.load_index()
+    if loaded:
+        # A few brute-force queries read the whole index, like a warm worker
+        queries = np.random.default_rng(0).random((4, faiss_service.dimension), dtype='float32')
+        faiss_service.search_batch(queries, k=10)
+    after = _memory_kb()
+
+    print(json.dumps({
+        "loaded": loaded,
+        "mmapped": faiss_service.index_mmapped,
+        "delta": {key: after[key] - before[key] for key in after}
+    }), flush=True)
+    # Keep the index alive while sibling workers are measured
+    time.sleep(hold_seconds)
+
+
+def _measure(mmap: bool, workers: int) -> List[dict]:
+    env = dict(os.environ, FAISS_MMAP=str(mmap).lower())
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-m', 'app.tools.bench_worker_memory', '--child', str(5.0 + workers)],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True
+        )
+        for _ in range(workers)
+    ]
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.kill()
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help="Worker counts to measure")
+    parser.add_argument('--child', type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child)
+        return
+
+    print("Memory growth from loading the FAISS index, MB")
+    print(f"  {'mode':<10} {'workers':>7} {'private/worker':>15} {'rss/worker':>11} {'pss total':>10}")
+    for mmap in (False, True):
+        for workers in args.workers:
+            results = _measure(mmap, workers)
+            if not results[0]["loaded"]:
+                print("  FAISS index not found, build it first")
+                return
+            mode = "mmap" if results[0]["mmapped"] else "read"
+            private = sum(result["delta"]["RssAnon"] for result in results) / workers / 1024
+            rss = sum(result["delta"]["VmRSS"] for result in results) / workers / 1024
+            pss = sum(result["delta"]["Pss"] for result in results) / 1024
+            print(f"  {mode:<10} {workers:>7} {private:>15.1f} {rss:>11.1f} {pss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Index Build Pipeline
+Embeds every recipe and builds the FAISS index, its metadata and recipe_embeddings.npy
+
+Recipes are embedded chunk by chunk into a preallocated memmap under
+<index dir>/.build, with a checkpoint after every chunk: rerunning an
+interrupted build resumes where it stopped. Recipes whose embedding text
+is unchanged since the previous build (same hash in
+recipe_embeddings_hashes.npy) reuse their old vector instead of being
+encoded again. Encoding runs in a pool of worker processes, each with its
+own model and share of the CPU cores.
+
+Outputs go next to FAISS_INDEX_PATH.
+
+Usage:
+    python -m app.tools.build_index [--chunk-size 512] [--workers 2] [--batch-size 32] [--fresh]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from app.config import settings
+from app.models.recipe import Recipe
+from app.services.embedding_service import embedding_service
+from app.services.faiss_service import faiss_service
+from app.utils.recipe_store import RecipeStore, read_recipes_json, source_stats
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+HASH_DTYPE = 'S16'
+
+# Model of this (worker) process, see _init_worker
+_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    """Load the embedding model once per worker process"""
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name)
+
+
+def _encode_chunk(task: Tuple[int, List[str], int]) -> Tuple[int, np.ndarray]:
+    """Encode one chunk's texts in a worker: (chunk id, texts, batch size) -> (chunk id, vectors)"""
+    chunk_id, texts, batch_size = task
+    embeddings = _model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return chunk_id, np.asarray(embeddings, dtype='float32').reshape(len(texts), -1)
+
+
+def _encode(tasks: Iterator[Tuple[int, List[str], int]], workers: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Encode chunks in `workers` processes (or in this one), keeping two chunks per worker in flight"""
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if workers <= 1:
+        _init_worker(settings.EMBEDDING_MODEL, threads)
+        yield from map(_encode_chunk, tasks)
+        return
+
+    # spawn: forked children would inherit the parent's torch thread pools
+    pool = multiprocessing.get_context('spawn').Pool(
+        workers, initializer=_init_worker, initargs=(settings.EMBEDDING_MODEL, threads)
+    )
+    try:
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.apply_async(_encode_chunk, (task,)))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().get()
+        while in_flight:
+            yield in_flight.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def _text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def _load_recipes() -> Sequence[Recipe]:
+    """Recipes in service order: the mapped store when it is current, else recipes.json"""
+    json_path = os.path.join(DATA_DIR, 'recipes.json')
+    store_path = os.path.join(DATA_DIR, 'recipes.bin')
+    if os.path.exists(store_path):
+        store = RecipeStore(store_path)
+        if not os.path.exists(json_path) or store.source == source_stats(json_path):
+            print(f"Reading recipes from {store_path}")
+            return store
+        store.close()
+
+    print(f"Reading recipes from {json_path}")
+    recipes, skipped = read_recipes_json(json_path)
+    if skipped:
+        print(f"  {skipped} invalid rows skipped")
+    return recipes
+
+
+def _previous_vectors(index_dir: str) -> Tuple[Dict[bytes, int], Optional[np.ndarray]]:
+    """Hash -> row of the previous build's embeddings, if they came from the same model"""
+    embeddings_path = os.path.join(index_dir, 'recipe_embeddings.npy')
+    hashes_path = os.path.join(index_dir, 'recipe_embeddings_hashes.npy')
+    metadata_path = os.path.join(index_dir, 'recipe_embeddings_metadata.json')
+    if not all(os.path.exists(path) for path in (embeddings_path, hashes_path, metadata_path)):
+        return {}, None
+
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    if metadata.get('model_name') != settings.EMBEDDING_MODEL or metadata.get('dimension') != settings.EMBEDDING_DIMENSION:
+        return {}, None
+
+    embeddings = np.load(embeddings_path, mmap_mode='r')
+    hashes = np.load(hashes_path)
+    if len(hashes) != len(embeddings):
+        return {}, None
+    return {bytes(h): row for row, h in enumerate(hashes)}, embeddings
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk-size', type=int, default=512, help="Recipes per chunk (checkpoint granularity)")
+    parser.add_argument('--workers', type=int, default=max(1, min(4, os.cpu_count() or 1)), help="Encoding processes, 1 = encode in this process")
+    parser.add_argument('--batch-size', type=int, default=32, help="Model batch size")
+    parser.add_argument('--fresh', action='store_true', help="Ignore the checkpoint and previous embeddings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    start = time.perf_counter()
+
+    index_dir = str(faiss_service.index_path.parent)
+    build_dir = os.path.join(index_dir, '.build')
+    checkpoint_path = os.path.join(build_dir, 'checkpoint.json')
+    vectors_path = os.path.join(build_dir, 'embeddings.npy')
+    dimension = settings.EMBEDDING_DIMENSION
+
+    recipes = _load_recipes()
+    num_recipes = len(recipes)
+    chunks = [(begin, min(begin + args.chunk_size, num_recipes)) for begin in range(0, num_recipes, args.chunk_size)]
+
+    # Texts are hashed up front (cheap) but only kept per chunk while encoding
+    hashes = np.array(
+        [_text_hash(embedding_service._prepare_recipe_text(recipe)) for recipe in recipes],
+        dtype=HASH_DTYPE
+    )
+    build_key = hashlib.blake2b(
+        hashes.tobytes() + f"{settings.EMBEDDING_MODEL}/{dimension}/{args.chunk_size}".encode(),
+        digest_size=16
+    ).hexdigest()
+
+    # Resume only a build of exactly these texts with the same model and chunking
+    checkpoint = None
+    if not args.fresh and os.path.exists(checkpoint_path) and os.path.exists(vectors_path):
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('build_key') != build_key:
+            checkpoint = None
+
+    if checkpoint is None:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        os.makedirs(build_dir)
+        vectors = open_memmap(vectors_path, mode='w+', dtype='float32', shape=(num_recipes, dimension))
+        checkpoint = {"build_key": build_key, "num_recipes": num_recipes, "done_chunks": []}
+        _write_json(checkpoint_path, checkpoint)
+    else:
+        vectors = open_memmap(vectors_path, mode='r+')
+        print(f"Resuming build: {len(checkpoint['done_chunks'])}/{len(chunks)} chunks already done")
+
+    done = set(checkpoint['done_chunks'])
+    previous, previous_vectors = ({}, None) if args.fresh else _previous_vectors(index_dir)
+
+    # Copy unchanged vectors from the previous build; the rest gets encoded
+    pending: Dict[int, List[int]] = {}
+    reused = 0
+    for chunk_id, (begin, end) in enumerate(chunks):
+        if chunk_id in done:
+            continue
+        rows = []
+        for row in range(begin, end):
+            old_row = previous.get(bytes(hashes[row]))
+            if old_row is not None:
+                vectors[row] = previous_vectors[old_row]
+                reused += 1
+            else:
+                rows.append(row)
+        pending[chunk_id] = rows
+
+    def complete(chunk_id: int):
+        vectors.flush()
+        done.add(chunk_id)
+        checkpoint['done_chunks'] = sorted(done)
+        _write_json(checkpoint_path, checkpoint)
+
+    for chunk_id, rows in pending.items():
+        if not rows:
+            complete(chunk_id)
+
+    # Texts are prepared per chunk, only as far ahead as the pool needs them
+    tasks = (
+        (chunk_id, [embedding_service._prepare_recipe_text(recipes[row]) for row in rows], args.batch_size)
+        for chunk_id, rows in pending.items() if rows
+    )
+    to_encode = sum(len(rows) for rows in pending.values())
+    print(f"{num_recipes} recipes: {reused} reused from the previous build, {to_encode} to encode")
+
+    if to_encode:
+        encoded = 0
+        for chunk_id, embeddings in _encode(tasks, args.workers):
+            rows = pending[chunk_id]
+            if embeddings.shape[1] != dimension:
+                raise ValueError(f"Model returned {embeddings.shape[1]}-d vectors, expected {dimension}")
+            vectors[rows] = embeddings
+            complete(chunk_id)
+            encoded += len(rows)
+            print(f"  encoded {encoded}/{to_encode} ({time.perf_counter() - start:.1f}s)", flush=True)
+
+    # Build and save the index from the finished memmap
+    if not faiss_service.build_index(vectors, recipes):
+        raise SystemExit("Index build failed, the checkpoint is kept for a retry")
+
+    # Publish the embeddings and their text hashes for the next incremental build
+    vectors.flush()
+    del vectors
+    embeddings_path = os.path.join(index_dir, 'recipe_embeddings.npy')
+    os.replace(vectors_path, embeddings_path)
+    np.save(os.path.join(index_dir, 'recipe_embeddings_hashes.npy'), hashes)
+    _write_json(os.path.join(index_dir, 'recipe_embeddings_metadata.json'), {
+        "model_name": settings.EMBEDDING_MODEL,
+        "dimension": dimension,
+        "num_recipes": num_recipes
+    })
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+    print(f"Index built: {num_recipes} recipes in {time.perf_counter() - start:.1f}s -> {index_dir}")
+
+
+if __name__ == "__main__":
+    main()
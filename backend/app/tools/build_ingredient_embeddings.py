@@ -0,0 +1,58 @@
+"""
+Ingredient Embeddings Builder
+Precomputes one embedding per vocabulary ingredient (data/ingredients.json)
+
+Enables EMBEDDING_COMPOSITIONAL_QUERIES: fridge queries are then pooled from
+these vectors instead of being encoded by the model. Rerun it after changing
+EMBEDDING_MODEL or the vocabulary.
+
+Usage:
+    python -m app.tools.build_ingredient_embeddings [--batch-size 64]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.services.embedding_service import (
+    DATA_DIR,
+    INGREDIENT_EMBEDDINGS_METADATA_PATH,
+    INGREDIENT_EMBEDDINGS_PATH,
+    embedding_service
+)
+from app.utils.ingredient_vectors import IngredientVectors, ingredient_query_text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=64, help="Model batch size")
+    args = parser.parse_args()
+
+    with open(os.path.join(DATA_DIR, 'ingredients.json'), 'r', encoding='utf-8') as f:
+        vocabulary = json.load(f)
+
+    start = time.perf_counter()
+    embedding_service._load_model()
+    vectors = embedding_service.model.encode(
+        [ingredient_query_text([ingredient]) for ingredient in vocabulary],
+        batch_size=args.batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=True
+    )
+
+    IngredientVectors(vocabulary, np.asarray(vectors)).save(
+        INGREDIENT_EMBEDDINGS_PATH,
+        INGREDIENT_EMBEDDINGS_METADATA_PATH,
+        embedding_service.model_name
+    )
+    print(
+        f"Wrote {len(vocabulary)} ingredient embeddings to {INGREDIENT_EMBEDDINGS_PATH} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+kNN Graph Builder
+Precomputes the top-N most similar recipes of every recipe for GET /api/recipes/{id}/similar
+
+Exact neighbours from recipe_embeddings.npy, computed in blocks of rows
+(one matrix multiply per block against all embeddings) in the metric of the
+current index. Output is an int32 id array and a float16 score array next
+to the index, both memory-mapped by the API. Rerun it after rebuilding the
+index: a graph built for another index file is ignored.
+
+Usage:
+    python -m app.tools.build_knn_graph [--neighbors 50] [--block-size 1024]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import faiss
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from app.services.faiss_service import faiss_service
+from app.utils.knn_graph import IDS_FILE, METADATA_FILE, SCORES_FILE, index_stamp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--neighbors', type=int, default=50, help="Neighbours stored per recipe")
+    parser.add_argument('--block-size', type=int, default=1024, help="Rows per matrix multiply")
+    args = parser.parse_args()
+
+    if not faiss_service.load_index():
+        raise SystemExit(f"No usable index at {faiss_service.index_path}, run app.tools.build_index first")
+    embeddings = faiss_service.embeddings
+    if embeddings is None or len(embeddings) != faiss_service.index.ntotal:
+        raise SystemExit(f"{faiss_service.embeddings_path} is missing or doesn't match the index")
+
+    start = time.perf_counter()
+    num_vectors = len(embeddings)
+    neighbors = max(1, min(args.neighbors, num_vectors - 1))
+    inner_product = faiss_service.index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def prepare(rows: np.ndarray) -> np.ndarray:
+        rows = np.array(rows, dtype='float32', order='C', copy=True)
+        if faiss_service.normalized:
+            faiss.normalize_L2(rows)
+        return rows
+
+    # Right-hand side of every block multiply; squared norms serve the L2 expansion
+    corpus = prepare(embeddings)
+    corpus_norms = None if inner_product else np.einsum('ij,ij->i', corpus, corpus)
+
+    directory = str(faiss_service.index_path.parent)
+    ids_tmp = os.path.join(directory, IDS_FILE + '.tmp')
+    scores_tmp = os.path.join(directory, SCORES_FILE + '.tmp')
+    ids_out = open_memmap(ids_tmp, mode='w+', dtype='int32', shape=(num_vectors, neighbors))
+    scores_out = open_memmap(scores_tmp, mode='w+', dtype='float16', shape=(num_vectors, neighbors))
+
+    for begin in range(0, num_vectors, args.block_size):
+        end = min(begin + args.block_size, num_vectors)
+        block = corpus[begin:end]
+        # Scores on the FAISSService.scores() scale: inner product, or -squared L2
+        scores = block @ corpus.T
+        if not inner_product:
+            scores = 2 * scores - corpus_norms[begin:end, None] - corpus_norms[None, :]
+        scores[np.arange(end - begin), np.arange(begin, end)] = -np.inf
+
+        top = np.argpartition(-scores, neighbors - 1, axis=1)[:, :neighbors]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        ids_out[begin:end] = np.take_along_axis(top, order, axis=1)
+        scores_out[begin:end] = np.take_along_axis(top_scores, order, axis=1)
+        print(f"  {end}/{num_vectors} ({time.perf_counter() - start:.1f}s)", flush=True)
+
+    ids_out.flush()
+    scores_out.flush()
+    del ids_out, scores_out
+    os.replace(ids_tmp, os.path.join(directory, IDS_FILE))
+    os.replace(scores_tmp, os.path.join(directory, SCORES_FILE))
+    with open(os.path.join(directory, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            "num_vectors": num_vectors,
+            "neighbors": neighbors,
+            "metric": "cosine" if faiss_service.normalized else ("IP" if inner_product else "L2"),
+            **index_stamp(str(faiss_service.index_path))
+        }, f, indent=2)
+
+    size = num_vectors * neighbors * (4 + 2)
+    print(
+        f"kNN graph: {num_vectors} x {neighbors} ({size / 1024 / 1024:.1f} MB) "
+        f"in {time.perf_counter() - start:.1f}s -> {directory}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Recipe Store Builder
+Converts data/recipes.json into the memory-mapped columnar store data/recipes.bin
+
+Rerun it whenever recipes.json changes: the service refuses a store built
+from a different recipes.json and falls back to parsing the JSON.
+
+Usage:
+    python -m app.tools.build_recipe_store [--input data/recipes.json] [--output data/recipes.bin]
+"""
+
+import argparse
+import os
+import time
+
+from app.utils.recipe_store import RecipeStore, read_recipes_json, source_stats, write_recipe_store
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=os.path.join(DATA_DIR, 'recipes.json'), help="Source recipes.json")
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'recipes.bin'), help="Store file to write")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    recipes, skipped = read_recipes_json(args.input)
+    print(f"Read {len(recipes)} recipes from {args.input} ({skipped} invalid rows skipped)")
+
+    write_recipe_store(args.output, recipes, source=source_stats(args.input))
+
+    # Read everything back before declaring success
+    store = RecipeStore(args.output)
+    try:
+        assert len(store) == len(recipes)
+        for position, recipe in enumerate(recipes):
+            assert store.get(position) == recipe, f"Recipe {position} differs after conversion"
+        size = store.nbytes
+    finally:
+        store.close()
+
+    print(
+        f"Wrote {args.output}: {size / 1e6:.1f} MB "
+        f"(source {os.path.getsize(args.input) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+ONNX Model Export
+Exports EMBEDDING_MODEL to ONNX (float32 + int8 dynamic quantization) for EMBEDDING_BACKEND=onnx
+
+Run once where the sentence-transformers model is available (the Hugging
+Face cache or a local path in EMBEDDING_MODEL); the output directory is
+self-contained and is what serving nodes load, without network access or
+torch. Needs the `onnx` package for quantization (export time only).
+
+Both exports are checked against the sentence-transformers model on
+sample ingredient queries and recipe texts: the minimum cosine similarity
+is recorded in onnx_config.json, and an export below --min-cosine is
+removed and the command fails, so serving cannot load it.
+
+Usage:
+    python -m app.tools.export_onnx_model [--output data/onnx/all-MiniLM-L6-v2] [--opset 14] [--min-cosine 0.99]
+"""
+
+import argparse
+import inspect
+import json
+import os
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.utils.ingredient_vectors import ingredient_query_text
+from app.utils.onnx_encoder import CONFIG_FILE, MODEL_FILE, QUANTIZED_MODEL_FILE, OnnxSentenceEncoder
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_PARITY_INGREDIENTS = [
+    "eggs", "flour", "butter", "sugar", "milk", "chicken breast", "garlic", "onion", "tomatoes", "olive oil",
+    "basil", "parmesan cheese", "rice", "soy sauce", "ginger", "lemon", "salmon", "potatoes", "heavy cream",
+    "ground beef", "black beans", "cumin", "cilantro", "yogurt", "cinnamon", "honey", "spinach", "mushrooms"
+]
+_PARITY_RECIPES = [
+    "Chocolate Chip Cookies",
+    "Creamy Garlic Tuscan Salmon",
+    "Spicy Black Bean Soup with Lime",
+    "Classic Beef Lasagna. Ingredients: ground beef, lasagna noodles, ricotta cheese, mozzarella, "
+    "marinara sauce, eggs, parmesan cheese. Instructions: Brown the beef, layer noodles, sauce and "
+    "cheeses in a baking dish, and bake covered for 45 minutes before resting 10 minutes.",
+]
+
+
+def _parity_texts() -> List[str]:
+    """Ingredient queries of 1-8 ingredients, titles, and full recipe texts (one past max_seq_length)"""
+    texts = [ingredient_query_text([ingredient]) for ingredient in _PARITY_INGREDIENTS[:8]]
+    for size in range(2, 9):
+        for start in range(0, len(_PARITY_INGREDIENTS), 7):
+            texts.append(ingredient_query_text(_PARITY_INGREDIENTS[start:start + size]))
+    texts += _PARITY_RECIPES
+    texts.append(" ".join(_PARITY_RECIPES * 20))
+    return texts
+
+
+def _min_cosine(reference: np.ndarray, embeddings: np.ndarray) -> float:
+    similarity = (reference * embeddings).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(embeddings, axis=1)
+    )
+    return float(similarity.min())
+
+
+def _pooling_config(model) -> dict:
+    """Pooling mode and normalization of the sentence-transformers pipeline"""
+    from sentence_transformers import models
+
+    pooling, normalize = 'mean', False
+    for module in model:
+        if isinstance(module, models.Pooling):
+            config = module.get_config_dict()
+            # sentence-transformers 2.x flags, or the single `pooling_mode` of later versions
+            mode = config.get('pooling_mode') or next(
+                (name[len('pooling_mode_'):] for name, enabled in config.items()
+                 if name.startswith('pooling_mode_') and enabled is True),
+                None
+            )
+            if mode in ('cls', 'cls_token'):
+                pooling = 'cls'
+            elif mode not in ('mean', 'mean_tokens'):
+                raise ValueError(f"Unsupported pooling configuration: {config}")
+        elif isinstance(module, models.Normalize):
+            normalize = True
+    return {'pooling': pooling, 'normalize': normalize}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=os.path.join(BACKEND_DIR, settings.EMBEDDING_ONNX_DIR), help="Output directory")
+    parser.add_argument('--opset', type=int, default=14, help="ONNX opset version")
+    parser.add_argument(
+        '--min-cosine', type=float, default=0.99, help="Minimum cosine similarity to the source model, per text"
+    )
+    args = parser.parse_args()
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    start = time.perf_counter()
+    os.makedirs(args.output, exist_ok=True)
+    model = SentenceTransformer(settings.EMBEDDING_MODEL, device='cpu')
+    transformer = model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    # Export the transformer only; pooling and normalization run in numpy
+    sample = tokenizer(["Recipe with ingredients: eggs, flour"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    class _Wrapper(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    # TorchScript-based exporter (newer torch defaults to the dynamo one)
+    export_options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    model_path = os.path.join(args.output, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Wrapper(auto_model),
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=args.opset,
+            **export_options
+        )
+    print(f"Exported {model_path}")
+
+    quantized_path = os.path.join(args.output, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    print(f"Quantized {quantized_path}")
+
+    # Fast tokenizer (tokenizer.json) for the Rust tokenizers fast path
+    tokenizer.save_pretrained(args.output)
+    if not os.path.exists(os.path.join(args.output, 'tokenizer.json')):
+        raise SystemExit("The model's tokenizer has no fast (tokenizer.json) version")
+
+    config = {
+        "source_model": settings.EMBEDDING_MODEL,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        **_pooling_config(model)
+    }
+    config_path = os.path.join(args.output, CONFIG_FILE)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    # Parity with the source model, through the encoder serving uses
+    texts = _parity_texts()
+    reference = model.encode(texts, batch_size=32, convert_to_numpy=True)
+    parity = {}
+    for name, quantized in ((MODEL_FILE, False), (QUANTIZED_MODEL_FILE, True)):
+        encoder = OnnxSentenceEncoder(args.output, quantized=quantized, threads=max(1, os.cpu_count() or 1))
+        parity[name] = _min_cosine(reference, encoder.encode(texts, batch_size=32, convert_to_numpy=True))
+        print(f"Parity {name}: min cosine {parity[name]:.4f} over {len(texts)} texts")
+    config["parity_min_cosine"] = parity
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+
+    failed = [name for name, similarity in parity.items() if similarity < args.min_cosine]
+    if failed:
+        for name in failed:
+            os.remove(os.path.join(args.output, name))
+        raise SystemExit(
+            f"Removed {', '.join(failed)}: cosine similarity to {settings.EMBEDDING_MODEL} below {args.min_cosine}"
+        )
+
+    sizes = {name: os.path.getsize(os.path.join(args.output, name)) / 1e6 for name in (MODEL_FILE, QUANTIZED_MODEL_FILE)}
+    print(
+        f"Wrote {args.output} in {time.perf_counter() - start:.1f}s: "
+        f"{MODEL_FILE} {sizes[MODEL_FILE]:.1f} MB, {QUANTIZED_MODEL_FILE} {sizes[QUANTIZED_MODEL_FILE]:.1f} MB, {config}"
+    )
+
+
+if __name__ == "__main__":
+    main()
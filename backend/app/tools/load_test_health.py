@@ -0,0 +1,101 @@
+"""
+Health Latency Load Test
+Saturates the search endpoints and checks that /health latency stays flat
+
+Start the API first (e.g. `uvicorn app.main:app --port 3001`), then run this
+from another machine (or pinned to other cores) so the load generator doesn't
+compete with the server for CPU:
+    python -m app.tools.load_test_health [--base-url http://127.0.0.1:3001] [--clients 64] [--duration 20]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from typing import List
+from urllib.parse import urlparse
+
+import numpy as np
+
+SEARCH_QUERIES = ["spicy chicken pasta", "vegetarian dessert", "quick breakfast recipe", "lemon fish", "beef stew"]
+FRIDGES = [["chicken", "rice"], ["eggplant", "tomatoes", "basil"], ["bacon", "apples"], ["salmon", "dill", "lemon"]]
+
+
+def _request(base, method: str, path: str, body=None):
+    """Send one request on a fresh connection, return (status, seconds)"""
+    connection = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=60)
+    payload = json.dumps(body) if body is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    start = time.perf_counter()
+    try:
+        connection.request(method, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def _probe_health(base, duration: float, interval: float) -> List[float]:
+    timings = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        _, elapsed = _request(base, "GET", "/health")
+        timings.append(elapsed)
+        time.sleep(interval)
+    return timings
+
+
+def _load_client(base, stop: threading.Event, statuses: List[int], rnd: random.Random):
+    while not stop.is_set():
+        if rnd.random() < 0.5:
+            status, _ = _request(base, "POST", "/api/recipes/search", {"query": rnd.choice(SEARCH_QUERIES)})
+        else:
+            status, _ = _request(base, "POST", "/api/recipes/recommend", {"ingredients": rnd.choice(FRIDGES)})
+        statuses.append(status)
+
+
+def _report(name: str, timings: List[float]):
+    ms = np.array(timings) * 1000
+    print(f"  {name:<22} n={len(ms):<5} p50={np.percentile(ms, 50):8.2f} ms  p99={np.percentile(ms, 99):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default="http://127.0.0.1:3001")
+    parser.add_argument('--clients', type=int, default=64, help="Concurrent clients hitting the search endpoints")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument('--interval', type=float, default=0.05, help="Seconds between /health probes")
+    args = parser.parse_args()
+
+    base = urlparse(args.base_url)
+
+    print("Phase 1: idle")
+    idle = _probe_health(base, args.duration, args.interval)
+
+    print(f"Phase 2: {args.clients} clients saturating /search and /recommend")
+    stop = threading.Event()
+    statuses: List[int] = []
+    clients = [
+        threading.Thread(target=_load_client, args=(base, stop, statuses, random.Random(i)), daemon=True)
+        for i in range(args.clients)
+    ]
+    for client in clients:
+        client.start()
+    loaded = _probe_health(base, args.duration, args.interval)
+    stop.set()
+    for client in clients:
+        client.join()
+
+    print("/health latency:")
+    _report("idle", idle)
+    _report("search saturated", loaded)
+    print(f"Search requests: {len(statuses)} "
+          f"({statuses.count(200)} ok, {statuses.count(503)} rejected with 503, "
+          f"{len(statuses) - statuses.count(200) - statuses.count(503)} other)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,296 @@
 """
-Basit memory cache implementasyonu
-Redis olmadan hafif cache çözümü
+In-memory cache
+Thread-safe LRU cache with TTL, bounded by entries and bytes (no Redis needed)
 """
-from typing import Any, Optional
-from datetime import datetime, timedelta
-import hashlib
-import json
-
-
-class SimpleCache:
-    def __init__(self):
-        self._cache = {}
-        self._expiry = {}
-    
-    def _generate_key(self, prefix: str, data: Any) -> str:
-        """Generate cache key from data"""
-        data_str = json.dumps(data, sort_keys=True)
-        hash_key = hashlib.md5(data_str.encode()).hexdigest()
-        return f"{prefix}:{hash_key}"
-    
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache if not expired"""
-        if key not in self._cache:
-            return None
-        
-        # Check expiry
-        if key in self._expiry and datetime.now() > self._expiry[key]:
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import Future
+from array import array
+import sys
+import threading
+import time
+
+from app.config import settings
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Rough deep size of a cached value in bytes
+
+    Computed once per set(), never on lookups.
+    """
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, array):
+        return sys.getsizeof(value)
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if _depth > 4:
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item, _depth + 1) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value), _depth + 1)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with TTL, bounded by entry count and total bytes
+
+    - O(1) get/set/evict (OrderedDict in recency order)
+    - TTL on the monotonic clock
+    - Hit / miss / eviction counters
+    - get_or_set() collapses concurrent misses for one key into a single
+      computation (singleflight); get_or_set_many() does the same for a
+      batch of keys computed together
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl: float = 300,
+        size_fn: Callable[[Any], int] = estimate_size
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._size_fn = size_fn
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.collapsed = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Get a live entry (caller holds the lock), counting hits and misses"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+
+        value, expires_at, _ = entry
+        if time.monotonic() >= expires_at:
             # Expired, remove from cache
-            del self._cache[key]
-            del self._expiry[key]
-            return None
-        
-        return self._cache[key]
-    
-    def set(self, key: str, value: Any, ttl_seconds: int = 300):
-        """Set value in cache with TTL (default 5 minutes)"""
-        self._cache[key] = value
-        self._expiry[key] = datetime.now() + timedelta(seconds=ttl_seconds)
-    
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get value from cache if not expired"""
+        with self._lock:
+            value = self._lookup(key)
+        return None if value is _MISSING else value
+
+    def contains(self, key: Hashable) -> bool:
+        """Whether a live entry exists (not counted as a lookup, recency unchanged)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Set value in cache with TTL (default: the cache's default_ttl)"""
+        ttl = self.default_ttl if ttl_seconds is None else ttl_seconds
+        size = self._size_fn(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            # Evict least recently used entries until both bounds hold
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl_seconds: Union[None, float, Callable[[Any], float]] = None
+    ) -> Any:
+        """
+        Get a cached value, or compute and cache it
+
+        Concurrent callers missing on the same key wait for the first
+        caller's computation instead of repeating it.
+
+        Args:
+            key: Cache key
+            compute: Called on a miss to produce the value
+            ttl_seconds: TTL, or a function of the computed value returning one
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._in_flight[key] = flight
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            return flight.result()
+
+        try:
+            value = compute()
+            self.set(key, value, ttl_seconds(value) if callable(ttl_seconds) else ttl_seconds)
+            flight.set_result(value)
+            return value
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def get_or_set_many(
+        self,
+        keys: Sequence[Hashable],
+        compute: Callable[[List[Hashable]], Sequence[Any]],
+        ttl_seconds: Union[None, float, Callable[[Any], float]] = None
+    ) -> List[Any]:
+        """
+        get_or_set() for several keys, the missing ones computed in one call
+
+        Repeated keys are looked up once. Keys another caller is already
+        computing (through either method) are waited for, not recomputed,
+        and concurrent callers wait for the keys this call computes.
+
+        Args:
+            keys: Cache keys
+            compute: Called with the missing keys this caller computes,
+                returns their values in the same order
+            ttl_seconds: TTL, or a function of a computed value returning one
+
+        Returns:
+            Values in the order of keys
+        """
+        values: Dict[Hashable, Any] = {}
+        led: Dict[Hashable, Future] = {}
+        followed: Dict[Hashable, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    values[key] = value
+                    continue
+                flight = self._in_flight.get(key)
+                if flight is None:
+                    flight = Future()
+                    self._in_flight[key] = flight
+                    led[key] = flight
+                else:
+                    followed[key] = flight
+                    self.collapsed += 1
+
+        if led:
+            try:
+                computed = compute(list(led))
+                if len(computed) != len(led):
+                    raise ValueError(f"compute returned {len(computed)} values for {len(led)} keys")
+                for (key, flight), value in zip(led.items(), computed):
+                    self.set(key, value, ttl_seconds(value) if callable(ttl_seconds) else ttl_seconds)
+                    flight.set_result(value)
+                    values[key] = value
+            except BaseException as e:
+                for flight in led.values():
+                    if not flight.done():
+                        flight.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._in_flight.pop(key, None)
+
+        # Computed before waiting: two batches waiting on each other's keys
+        # have both finished their own computation by then
+        for key, flight in followed.items():
+            values[key] = flight.result()
+        return [values[key] for key in keys]
+
+    def delete(self, key: Hashable):
+        """Remove a key if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Remove every key matching a predicate
+
+        Returns:
+            Number of removed entries
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
     def clear(self):
         """Clear all cache"""
-        self._cache.clear()
-        self._expiry.clear()
-    
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
     def size(self) -> int:
         """Get cache size"""
-        return len(self._cache)
+        with self._lock:
+            return len(self._entries)
 
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "collapsed": self.collapsed
+            }
 
-# Global cache instance
-cache = SimpleCache()
 
+# Global cache instance
+cache = LRUCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    default_ttl=settings.CACHE_TTL_SECONDS
+)
@@ -0,0 +1,202 @@
+"""
+Fridge coverage scoring engine
+Recipe x ingredient sparse matrix for vectorized fridge coverage ranking
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+_TOKEN_RE = re.compile(r"\w+")
+# Item separators inside the stringified Cleaned_Ingredients lists, so a
+# phrase never spans two different ingredient lines
+_ITEM_SEPARATOR_RE = re.compile(r"""['"]\s*,\s*['"]""")
+
+SORT_MODES = ("matching", "coverage", "fewest_missing")
+
+
+def _singularize(token: str) -> str:
+    """Cheap plural folding so 'apples' and 'apple' map to the same term"""
+    if len(token) <= 3:
+        return token
+    if token.endswith('ies') and len(token) > 4:
+        return token[:-3] + 'y'
+    if token.endswith(('ches', 'shes', 'xes', 'oes', 'sses')):
+        return token[:-2]
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def normalize_phrase(text: str) -> Tuple[str, ...]:
+    """Lowercase, tokenize and singularize an ingredient phrase"""
+    return tuple(_singularize(token) for token in _TOKEN_RE.findall(text.lower()))
+
+
+class CoverageScorer:
+    """
+    Scores every recipe against a fridge with sparse matrix products
+
+    Rows are recipes (same positions as RecipeService.recipes), columns are
+    the ingredient vocabulary. A recipe's row holds the vocabulary terms found
+    in its Cleaned_Ingredients, using longest-phrase-first matching so
+    "black pepper" doesn't also count as "pepper".
+    """
+
+    def __init__(self, cleaned_ingredients: Sequence[str], vocabulary: Sequence[str]):
+        self.vocabulary: List[str] = list(vocabulary)
+        # Identifies the vocabulary that term ids (and bitsets of them) refer to
+        self.fingerprint = hashlib.blake2b('\n'.join(self.vocabulary).encode('utf-8'), digest_size=8).digest()
+        self._term_ids: Dict[Tuple[str, ...], int] = {}
+        for term_id, term in enumerate(self.vocabulary):
+            self._term_ids.setdefault(normalize_phrase(term), term_id)
+        self._max_phrase_len = max((len(phrase) for phrase in self._term_ids), default=1)
+
+        indptr = [0]
+        indices: List[int] = []
+        for text in cleaned_ingredients:
+            row = set()
+            for item in _ITEM_SEPARATOR_RE.split(text):
+                row.update(self._find_terms(normalize_phrase(item)))
+            indices.extend(sorted(row))
+            indptr.append(len(indices))
+
+        self.matrix = sparse.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.float32),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64)
+            ),
+            shape=(len(indptr) - 1, len(self.vocabulary))
+        )
+        # Column-major copy: ranking only touches the fridge's columns
+        self.columns = self.matrix.tocsc()
+        # Number of vocabulary ingredients each recipe needs
+        self.required = np.diff(self.matrix.indptr).astype(np.int32)
+
+    def _find_terms(self, tokens: Tuple[str, ...]) -> List[int]:
+        """Greedy longest-match of vocabulary phrases over a token sequence"""
+        found = []
+        i = 0
+        while i < len(tokens):
+            for length in range(min(self._max_phrase_len, len(tokens) - i), 0, -1):
+                term_id = self._term_ids.get(tokens[i:i + length])
+                if term_id is not None:
+                    found.append(term_id)
+                    i += length
+                    break
+            else:
+                i += 1
+        return found
+
+    def fridge_terms(self, user_ingredients: List[str]) -> List[int]:
+        """
+        Map user ingredients to sorted, unique vocabulary term ids
+
+        Ingredients that aren't in the vocabulary are ignored.
+        """
+        term_ids = {self._term_ids.get(normalize_phrase(ingredient)) for ingredient in user_ingredients}
+        term_ids.discard(None)
+        return sorted(term_ids)
+
+    def matching_ingredients(self, user_ingredients: List[str], positions: Sequence[int]) -> List[List[str]]:
+        """
+        The fridge ingredients each recipe's row matched: what rank() counted
+
+        Args:
+            user_ingredients: List of user ingredient names
+            positions: Recipe positions
+
+        Returns:
+            Per position, the matched user ingredients in request order, one
+            per vocabulary term (the first one naming it)
+        """
+        named: Dict[int, str] = {}
+        for ingredient in user_ingredients:
+            term_id = self._term_ids.get(normalize_phrase(ingredient))
+            if term_id is not None:
+                named.setdefault(term_id, ingredient)
+
+        indptr, indices = self.matrix.indptr, self.matrix.indices
+        result = []
+        for position in positions:
+            row = set(indices[indptr[position]:indptr[position + 1]].tolist())
+            result.append([ingredient for term_id, ingredient in named.items() if term_id in row])
+        return result
+
+    def fridge_vector(self, user_ingredients: List[str]) -> np.ndarray:
+        """Build the binary fridge vector over the vocabulary"""
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        vector[self.fridge_terms(user_ingredients)] = 1.0
+        return vector
+
+    def score(self, user_ingredients: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score every recipe against a fridge
+
+        Args:
+            user_ingredients: List of user ingredient names
+
+        Returns:
+            Tuple of (matching, coverage, missing), each of shape (num_recipes,)
+            - matching: Number of the recipe's ingredients in the fridge
+            - coverage: matching / ingredients needed by the recipe
+            - missing: Ingredients needed by the recipe but not in the fridge
+        """
+        matching = (self.matrix @ self.fridge_vector(user_ingredients)).astype(np.int32)
+        coverage = matching / np.maximum(self.required, 1)
+        missing = self.required - matching
+        return matching, coverage, missing
+
+    def rank(self, user_ingredients: List[str], sort_by: str, k: int) -> List[int]:
+        """
+        Get the top-k recipe positions for a fridge under a sort mode
+
+        Only recipes using at least one fridge ingredient are ranked. Ties
+        fall back to matching count, then to corpus order.
+
+        Args:
+            user_ingredients: List of user ingredient names
+            sort_by: One of SORT_MODES
+            k: Number of results to return
+
+        Returns:
+            List of recipe positions, best first
+        """
+        if sort_by not in SORT_MODES:
+            raise ValueError(f"Unknown sort mode '{sort_by}', expected one of {SORT_MODES}")
+
+        term_ids = self.fridge_terms(user_ingredients)
+        if k <= 0 or not term_ids:
+            return []
+
+        # Same result as the full mat-vec in score(), restricted to the rows
+        # of the fridge's columns: cost follows the posting sizes, not the corpus
+        indptr, indices = self.columns.indptr, self.columns.indices
+        rows = np.concatenate([indices[indptr[t]:indptr[t + 1]] for t in term_ids])
+        candidates, matching = np.unique(rows, return_counts=True)
+        if candidates.size == 0:
+            return []
+        required = self.required[candidates]
+
+        # Primary keys are "lower is better"
+        if sort_by == "matching":
+            primary = -matching.astype(np.float64)
+        elif sort_by == "coverage":
+            primary = -(matching / required)
+        else:
+            primary = (required - matching).astype(np.float64)
+
+        # Cut down to the k best primary keys (keeping boundary ties) before
+        # the exact sort, so cost stays linear in the corpus size
+        if candidates.size > k:
+            threshold = np.partition(primary, k - 1)[k - 1]
+            keep = primary <= threshold
+            candidates, matching, primary = candidates[keep], matching[keep], primary[keep]
+
+        order = np.lexsort((candidates, -matching, primary))
+        return candidates[order][:k].tolist()
+
@@ -0,0 +1,280 @@
+"""
+Persistent query embedding cache
+Query text -> embedding, stored in SQLite and shared by every worker on the host
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.utils.cache import LRUCache
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Hit counts are written back in batches, not on every lookup
+_FLUSH_EVERY = 64
+# The row count is checked against the cap every this many inserts
+_EVICT_EVERY = 256
+
+
+def normalize_query(text: str) -> str:
+    """Case and whitespace don't change what the (uncased) model sees"""
+    return ' '.join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache
+
+    - In-process LRU for the hot set, warmed at startup with the most hit
+      queries
+    - SQLite database in WAL mode (concurrent readers, one writer), capped at
+      `max_entries` rows with least-recently-used eviction
+
+    Keys hash the model name with the normalized text, so changing
+    EMBEDDING_MODEL never serves vectors of another model. A persistent SQLite
+    error (not a busy timeout) disables the disk level; encoding then simply
+    runs uncached.
+    """
+
+    def __init__(self, path: str, model_name: str, dimension: int, max_entries: int, memory_entries: int):
+        self.path = path
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self._memory = LRUCache(max_entries=memory_entries, max_bytes=memory_entries * dimension * 4 * 2, default_ttl=float('inf'))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending_hits: Dict[bytes, int] = {}
+        self._inserts = 0
+        self._disabled = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.model_name}\0{normalize_query(text)}".encode('utf-8'),
+            digest_size=16
+        ).digest()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key BLOB PRIMARY KEY,"
+                " text TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0,"
+                " last_used REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            connection.execute("CREATE INDEX IF NOT EXISTS embeddings_hits ON embeddings (hits)")
+            self._local.connection = connection
+        return connection
+
+    def _disable(self, e: Exception):
+        if isinstance(e, sqlite3.OperationalError) and 'locked' in str(e):
+            # Another worker held the write lock past the busy timeout: skip this write only
+            logger.debug(f"Embedding cache busy: {e}")
+            return
+        if not self._disabled:
+            logger.warning(f"Embedding cache disabled after SQLite error: {e}")
+        self._disabled = True
+
+    def _vector(self, blob: bytes) -> np.ndarray:
+        vector = np.frombuffer(blob, dtype='float32')
+        # Shared between callers: must not be modified in place
+        vector.flags.writeable = False
+        return vector
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Get the cached embedding of a query text"""
+        key = self._key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._count_hit(key, disk=False)
+            return vector
+
+        if not self._disabled:
+            try:
+                row = self._connection().execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                row = None
+            if row is not None:
+                vector = self._vector(row[0])
+                self._memory.set(key, vector)
+                self._count_hit(key, disk=True)
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_memory(self, text: str) -> Optional[np.ndarray]:
+        """Get the embedding of a query text from the in-process level only (never touches the disk)"""
+        key = self._key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._count_hit(key, disk=False)
+        return vector
+
+    def put(self, text: str, vector: np.ndarray):
+        """Store the embedding of a query text"""
+        key = self._key(text)
+        vector = np.ascontiguousarray(vector, dtype='float32').reshape(-1)
+        if vector.shape[0] != self.dimension:
+            return
+        vector.flags.writeable = False
+        self._memory.set(key, vector)
+        if self._disabled:
+            return
+
+        try:
+            self._connection().execute(
+                "INSERT OR IGNORE INTO embeddings (key, text, vector, hits, last_used) VALUES (?, ?, ?, 1, ?)",
+                (key, normalize_query(text), vector.tobytes(), time.time())
+            )
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+
+        with self._lock:
+            self._inserts += 1
+            evict = self._inserts % _EVICT_EVERY == 0
+        if evict:
+            self._evict()
+
+    def _count_hit(self, key: bytes, disk: bool):
+        with self._lock:
+            if disk:
+                self.disk_hits += 1
+            else:
+                self.memory_hits += 1
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            flush = len(self._pending_hits) >= _FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write buffered hit counts (they rank queries for warm-up and eviction)"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+        if not pending or self._disabled:
+            return
+
+        now = time.time()
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    "UPDATE embeddings SET hits = hits + ?, last_used = ? WHERE key = ?",
+                    [(hits, now, key) for key, hits in pending.items()]
+                )
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _evict(self):
+        """Delete least recently used rows above the size cap"""
+        try:
+            connection = self._connection()
+            count, = connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+                logger.debug(f"Embedding cache evicted {excess} entries")
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def warm(self, limit: int) -> int:
+        """
+        Load the most frequently hit queries into memory
+
+        Args:
+            limit: Maximum number of embeddings to load
+
+        Returns:
+            Number of embeddings loaded
+        """
+        if self._disabled or limit <= 0:
+            return 0
+        try:
+            rows = self._connection().execute(
+                "SELECT key, vector FROM embeddings ORDER BY hits DESC LIMIT ?", (limit,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return 0
+
+        # Least frequent first, so the most frequent end up most recently used
+        for key, blob in reversed(rows):
+            if len(blob) == self.dimension * 4:
+                self._memory.set(key, self._vector(blob))
+        return len(rows)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics"""
+        entries: Optional[int] = None
+        if not self._disabled:
+            try:
+                entries, = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": not self._disabled,
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "memory_entries": self._memory.size(),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def _open_cache() -> Optional[EmbeddingCache]:
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    # Backends produce close but not identical vectors: cache them separately
+    model_name = settings.EMBEDDING_MODEL
+    if settings.EMBEDDING_BACKEND != "torch":
+        model_name += f"/{settings.EMBEDDING_BACKEND}{'-int8' if settings.EMBEDDING_ONNX_QUANTIZED else ''}"
+    if settings.FAISS_METRIC == "cosine":
+        model_name += "/normalized"
+    return EmbeddingCache(
+        path=str(Path(__file__).parent.parent.parent / settings.EMBEDDING_CACHE_PATH),
+        model_name=model_name,
+        dimension=settings.EMBEDDING_DIMENSION,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        memory_entries=settings.EMBEDDING_CACHE_MEMORY_ENTRIES
+    )
+
+
+# Global embedding cache instance (None when disabled)
+embedding_cache = _open_cache()
@@ -0,0 +1,155 @@
+"""
+Bounded executors
+Thread pools that keep CPU-bound model inference and index search off the
+asyncio event loop, with a queue-depth limit for load shedding
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.config import settings
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when an executor's queue is full; routes map it to 503"""
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor that rejects work instead of queueing without limit
+
+    At most `max_workers` tasks run and `max_queue_depth` more wait; any
+    further submission raises ExecutorOverloaded immediately.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue_depth: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue_depth)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a task
+
+        Raises:
+            ExecutorOverloaded: If running + queued tasks are at the limit
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ExecutorOverloaded(f"{self.name} executor is overloaded, try again later")
+
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking function in the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking function in the pool from synchronous code
+
+        Calls made from one of this pool's own threads run inline, so nested
+        calls can't deadlock waiting for a free worker.
+        """
+        if threading.current_thread().name.startswith(self.name):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def get_stats(self) -> dict:
+        """Get executor statistics"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+
+def inference_threads() -> int:
+    """Intra-op threads per inference worker (torch), so the pool never oversubscribes cores"""
+    if settings.INFERENCE_THREADS > 0:
+        return settings.INFERENCE_THREADS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.INFERENCE_POOL_SIZE))
+
+
+def search_threads() -> int:
+    """OpenMP threads per search worker (FAISS); search parallelism comes from the pool itself"""
+    return settings.SEARCH_THREADS if settings.SEARCH_THREADS > 0 else 1
+
+
+# Read by OpenMP and the BLAS libraries when they are first loaded
+_NATIVE_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def limit_native_threads():
+    """
+    Default the OpenMP / BLAS thread counts to search_threads()
+
+    numpy's BLAS sizes its pool when numpy is imported, one thread per core
+    unless told otherwise, and every search worker calling into it would
+    start that many: call this before numpy is imported. Variables already
+    set in the environment are kept.
+    """
+    for name in _NATIVE_THREAD_VARIABLES:
+        os.environ.setdefault(name, str(search_threads()))
+
+
+def configure_thread_limits():
+    """Apply the FAISS OpenMP and BLAS thread limits (torch is limited when the model loads)"""
+    import faiss
+
+    faiss.omp_set_num_threads(search_threads())
+    # BLAS pools loaded before limit_native_threads() ran are resized at runtime
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=search_threads(), user_api="blas")
+    except ImportError:
+        logger.debug("threadpoolctl not installed, BLAS threads follow the environment")
+    logger.info(
+        f"Thread limits: inference {settings.INFERENCE_POOL_SIZE} workers x {inference_threads()} threads, "
+        f"search {settings.SEARCH_POOL_SIZE} workers x {search_threads()} threads (FAISS and BLAS)"
+    )
+
+
+# Global executor instances
+inference_executor = BoundedExecutor(
+    "inference",
+    max_workers=settings.INFERENCE_POOL_SIZE,
+    max_queue_depth=settings.EXECUTOR_MAX_QUEUE_DEPTH
+)
+search_executor = BoundedExecutor(
+    "search",
+    max_workers=settings.SEARCH_POOL_SIZE,
+    max_queue_depth=settings.EXECUTOR_MAX_QUEUE_DEPTH
+)
@@ -0,0 +1,390 @@
+"""
+Saved fridges
+Fridge contents and their materialized recommendation results, stored in SQLite
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Result hits are written back (last_used) in batches, not on every lookup
+_FLUSH_EVERY = 64
+# The result cap is checked every this many stored results
+_EVICT_EVERY = 64
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS fridges ("
+    " id TEXT PRIMARY KEY,"
+    " ingredients TEXT NOT NULL,"
+    " content_hash BLOB NOT NULL,"
+    " bitset BLOB NOT NULL,"
+    " vocabulary BLOB NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS fridges_content_hash ON fridges (content_hash)",
+    "CREATE TABLE IF NOT EXISTS fridge_results ("
+    " content_hash BLOB NOT NULL,"
+    " variant BLOB NOT NULL,"
+    " data_version BLOB NOT NULL,"
+    " body BLOB NOT NULL,"
+    " size INTEGER NOT NULL,"
+    " computed_at REAL NOT NULL,"
+    " last_used REAL NOT NULL,"
+    " PRIMARY KEY (content_hash, variant)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS fridge_results_last_used ON fridge_results (last_used)"
+)
+
+# Statements are module constants: sqlite3 keeps the compiled statement of
+# each distinct SQL string per connection, so pooled connections prepare
+# every one of them once
+_SELECT_FRIDGE = (
+    "SELECT id, ingredients, content_hash, bitset, vocabulary, created_at, updated_at FROM fridges WHERE id = ?"
+)
+_SELECT_FRIDGE_RESULT = (
+    "SELECT f.ingredients, f.content_hash, r.data_version, r.body FROM fridges f"
+    " LEFT JOIN fridge_results r ON r.content_hash = f.content_hash AND r.variant = ?"
+    " WHERE f.id = ?"
+)
+_INSERT_FRIDGE = (
+    "INSERT INTO fridges (id, ingredients, content_hash, bitset, vocabulary, created_at, updated_at)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_SELECT_HASH = "SELECT content_hash FROM fridges WHERE id = ?"
+_UPDATE_FRIDGE = (
+    "UPDATE fridges SET ingredients = ?, content_hash = ?, bitset = ?, vocabulary = ?, updated_at = ? WHERE id = ?"
+)
+_UPDATE_BITSET = "UPDATE fridges SET bitset = ?, vocabulary = ? WHERE id = ? AND content_hash = ?"
+_DELETE_FRIDGE = "DELETE FROM fridges WHERE id = ?"
+# Results nobody's fridge holds any more
+_DELETE_ORPHAN_RESULTS = (
+    "DELETE FROM fridge_results WHERE content_hash = ?"
+    " AND NOT EXISTS (SELECT 1 FROM fridges WHERE content_hash = ?)"
+)
+# Only while some fridge still holds the contents: a result computed while
+# the fridge was changed or deleted would otherwise be stored as an orphan
+_UPSERT_RESULT = (
+    "INSERT OR REPLACE INTO fridge_results (content_hash, variant, data_version, body, size, computed_at, last_used)"
+    " SELECT ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM fridges WHERE content_hash = ?)"
+)
+_TOUCH_RESULT = "UPDATE fridge_results SET last_used = ? WHERE content_hash = ? AND variant = ?"
+_DELETE_RESULT = "DELETE FROM fridge_results WHERE content_hash = ? AND variant = ?"
+_DELETE_STALE_RESULTS = "DELETE FROM fridge_results WHERE data_version != ?"
+_RESULTS_BY_AGE = "SELECT content_hash, variant, size FROM fridge_results ORDER BY last_used"
+_COUNT_FRIDGES = "SELECT COUNT(*) FROM fridges"
+_COUNT_RESULTS = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fridge_results"
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections to one database
+
+    Connections are opened on demand, up to `size`, in WAL mode (readers
+    never wait for the writer) and handed out most recently used first.
+    When all of them are in use, callers wait for one to come back.
+    """
+
+    def __init__(self, path: str, size: int, timeout: float = 5.0):
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self.waits = 0
+
+    def _open(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; multi-statement writes open their own transaction
+        connection = sqlite3.connect(
+            self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False, cached_statements=64
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(fridge_results)")}
+        if columns and "last_used" not in columns:
+            # Stored results are only a cache: a table of an older layout is dropped
+            connection.execute("DROP TABLE fridge_results")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a with block"""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._opened < self.size
+                if grow:
+                    self._opened += 1
+                else:
+                    self.waits += 1
+            if grow:
+                try:
+                    connection = self._open()
+                except BaseException:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    connection = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError("database is locked: no pooled connection became free")
+
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+
+    def close(self):
+        """Close the idle connections (borrowed ones are closed when the pool is garbage collected)"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._opened -= 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"size": self.size, "opened": self._opened, "idle": self._idle.qsize(), "waits": self.waits}
+
+
+class FridgeStore:
+    """
+    Fridges and materialized recommendation results
+
+    - fridges: id -> canonical ingredient list (JSON), content hash, and the
+      ingredient bitset over a vocabulary (with that vocabulary's fingerprint)
+    - fridge_results: (content hash, request variant) -> response body, with
+      the data version it was computed against
+
+    Results are keyed by content, not by fridge: fridges with the same
+    ingredients share them, and a fridge whose contents change simply maps
+    to other rows. Results no fridge points at are deleted with the change.
+    The store only moves bytes; hashing and versioning are up to the caller.
+
+    Results are capped at `max_entries` rows and `max_bytes` of bodies,
+    evicting the least recently used ones (hits update last_used in
+    batches).
+    """
+
+    def __init__(self, path: str, pool_size: int, max_entries: int, max_bytes: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._pool = ConnectionPool(path, pool_size)
+        self._lock = threading.Lock()
+        self._pending_touches: Dict[Tuple[bytes, bytes], float] = {}
+        self._puts = 0
+        self.evictions = 0
+
+    def get(self, fridge_id: str) -> Optional[dict]:
+        """Stored fridge row, None if there is no such fridge"""
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_FRIDGE, (fridge_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("id", "ingredients", "content_hash", "bitset", "vocabulary", "created_at", "updated_at"), row))
+
+    def get_with_result(
+        self,
+        fridge_id: str,
+        variant: bytes
+    ) -> Optional[Tuple[str, bytes, Optional[bytes], Optional[bytes]]]:
+        """
+        A fridge and its stored result for a request variant, in one query
+
+        Returns:
+            Tuple of (ingredients JSON, content hash, result data version or
+            None, result body or None), None if there is no such fridge
+        """
+        with self._pool.connection() as connection:
+            return connection.execute(_SELECT_FRIDGE_RESULT, (variant, fridge_id)).fetchone()
+
+    def create(
+        self,
+        fridge_id: str,
+        ingredients: str,
+        content_hash: bytes,
+        bitset: bytes,
+        vocabulary: bytes,
+        now: float
+    ):
+        """Insert a fridge (sqlite3.IntegrityError if the id is taken)"""
+        with self._pool.connection() as connection:
+            connection.execute(_INSERT_FRIDGE, (fridge_id, ingredients, content_hash, bitset, vocabulary, now, now))
+
+    def update(
+        self,
+        fridge_id: str,
+        ingredients: str,
+        content_hash: bytes,
+        bitset: bytes,
+        vocabulary: bytes,
+        now: float
+    ) -> Optional[bytes]:
+        """
+        Replace a fridge's contents
+
+        Returns:
+            The previous content hash, None if there is no such fridge
+        """
+        with self._pool.connection() as connection:
+            with connection:
+                # Take the write lock up front: the read below decides what to delete
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute(_SELECT_HASH, (fridge_id,)).fetchone()
+                if row is None:
+                    return None
+                previous = row[0]
+                connection.execute(_UPDATE_FRIDGE, (ingredients, content_hash, bitset, vocabulary, now, fridge_id))
+                if previous != content_hash:
+                    connection.execute(_DELETE_ORPHAN_RESULTS, (previous, previous))
+        return previous
+
+    def update_bitset(self, fridge_id: str, content_hash: bytes, bitset: bytes, vocabulary: bytes):
+        """Store a bitset recomputed for another vocabulary, unless the contents changed meanwhile"""
+        with self._pool.connection() as connection:
+            connection.execute(_UPDATE_BITSET, (bitset, vocabulary, fridge_id, content_hash))
+
+    def delete(self, fridge_id: str) -> bool:
+        """Delete a fridge; False if there was none"""
+        with self._pool.connection() as connection:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute(_SELECT_HASH, (fridge_id,)).fetchone()
+                if row is None:
+                    return False
+                connection.execute(_DELETE_FRIDGE, (fridge_id,))
+                connection.execute(_DELETE_ORPHAN_RESULTS, (row[0], row[0]))
+        return True
+
+    def put_result(self, content_hash: bytes, variant: bytes, data_version: bytes, body: bytes, now: float) -> bool:
+        """
+        Store (or replace) the result of a request variant for some contents
+
+        Returns:
+            Whether it was stored: not if no fridge holds the contents (any more)
+            or the body alone exceeds the byte cap
+        """
+        if len(body) > self.max_bytes:
+            return False
+        with self._pool.connection() as connection:
+            stored = connection.execute(
+                _UPSERT_RESULT, (content_hash, variant, data_version, body, len(body), now, now, content_hash)
+            ).rowcount > 0
+        if not stored:
+            return False
+
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % _EVICT_EVERY == 0
+        if evict:
+            self.evict()
+        return True
+
+    def touch(self, content_hash: bytes, variant: bytes, now: float):
+        """Record a hit on a stored result (written back in batches)"""
+        with self._lock:
+            self._pending_touches[(content_hash, variant)] = now
+            flush = len(self._pending_touches) >= _FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write buffered result hits (they order eviction)"""
+        with self._lock:
+            pending, self._pending_touches = self._pending_touches, {}
+        if not pending:
+            return
+        try:
+            with self._pool.connection() as connection:
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(
+                        _TOUCH_RESULT, [(now, content_hash, variant) for (content_hash, variant), now in pending.items()]
+                    )
+        except sqlite3.Error as e:
+            # Only costs eviction accuracy
+            logger.warning(f"Failed to record stored fridge result hits: {e}")
+
+    def evict(self) -> int:
+        """
+        Delete least recently used results above the entry / byte caps
+
+        Returns:
+            Number of deleted results
+        """
+        self.flush()
+        try:
+            with self._pool.connection() as connection:
+                count, total = connection.execute(_COUNT_RESULTS).fetchone()
+                excess_entries, excess_bytes = count - self.max_entries, total - self.max_bytes
+                if excess_entries <= 0 and excess_bytes <= 0:
+                    return 0
+
+                victims = []
+                cursor = connection.execute(_RESULTS_BY_AGE)
+                for content_hash, variant, size in cursor:
+                    if excess_entries <= 0 and excess_bytes <= 0:
+                        break
+                    victims.append((content_hash, variant))
+                    excess_entries -= 1
+                    excess_bytes -= size
+                cursor.close()
+                with connection:
+                    connection.execute("BEGIN")
+                    connection.executemany(_DELETE_RESULT, victims)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to evict stored fridge results: {e}")
+            return 0
+
+        with self._lock:
+            self.evictions += len(victims)
+        logger.debug(f"Evicted {len(victims)} stored fridge results")
+        return len(victims)
+
+    def delete_stale(self, data_version: bytes) -> int:
+        """
+        Delete results computed against another data version
+
+        Returns:
+            Number of deleted results
+        """
+        with self._pool.connection() as connection:
+            return connection.execute(_DELETE_STALE_RESULTS, (data_version,)).rowcount
+
+    def close(self):
+        self.flush()
+        self._pool.close()
+
+    def get_stats(self) -> dict:
+        with self._pool.connection() as connection:
+            fridges, = connection.execute(_COUNT_FRIDGES).fetchone()
+            results, result_bytes = connection.execute(_COUNT_RESULTS).fetchone()
+        with self._lock:
+            evictions = self.evictions
+        return {
+            "path": self.path,
+            "fridges": fridges,
+            "results": results,
+            "result_bytes": result_bytes,
+            "max_results": self.max_entries,
+            "max_result_bytes": self.max_bytes,
+            "evictions": evictions,
+            "pool": self._pool.get_stats()
+        }
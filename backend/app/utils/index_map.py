@@ -0,0 +1,68 @@
+"""
+Index corpus map
+Small binary file next to the FAISS index: which corpus the index was built from
+
+File layout (little-endian):
+    magic        8 bytes, b"SFCIDX01"
+    count        uint64, number of index vectors
+    fingerprint  16 bytes, corpus_fingerprint() of the recipes, in index order
+    ids          int32[count], stable recipe id of each index position
+
+The header is read at startup in O(1); the id array is memory-mapped and
+only touched when a caller needs it.
+"""
+
+import os
+import struct
+from typing import Sequence
+
+import numpy as np
+
+MAGIC = b"SFCIDX01"
+_HEADER = struct.Struct('<8sQ16s')
+
+
+class IndexMap:
+    """Header and (lazily mapped) id array of an index map file"""
+
+    def __init__(self, path: str, count: int, fingerprint: bytes):
+        self.path = path
+        self.count = count
+        self.fingerprint = fingerprint
+        self._ids = None
+
+    @classmethod
+    def read(cls, path: str) -> "IndexMap":
+        """
+        Read the header of a map file
+
+        Raises:
+            ValueError: If the file is not an index map
+        """
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, count, fingerprint = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an index map file")
+        if os.path.getsize(path) != _HEADER.size + 4 * count:
+            raise ValueError(f"{path} is truncated")
+        return cls(path, count, fingerprint)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Stable recipe id per index position (int32, memory-mapped)"""
+        if self._ids is None:
+            self._ids = np.memmap(self.path, dtype='<i4', mode='r', offset=_HEADER.size, shape=(self.count,))
+        return self._ids
+
+
+def write_index_map(path: str, fingerprint: bytes, ids: Sequence[int]):
+    """Write a map file (to a temporary name, then renamed into place)"""
+    ids = np.asarray(ids, dtype='<i4')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(ids), fingerprint))
+        f.write(ids.tobytes())
+    os.replace(tmp_path, path)
@@ -0,0 +1,166 @@
+"""
+Inverted ingredient index
+Replaces the per-request linear scan over every recipe's ingredient text
+"""
+
+import re
+from array import array
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Sequence
+
+import numpy as np
+
+# Word characters are the unit of indexing. Any substring query is made of
+# word runs that each sit inside a single indexed token, which is what makes
+# the candidate lookup below exact.
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class IngredientIndex:
+    """
+    Maps lowercased ingredient tokens to posting lists of recipe positions
+
+    Lookups keep the original `ingredient.lower() in recipe.Ingredients.lower()`
+    semantics: posting lists only prune the candidate set, and every
+    candidate is confirmed with the same substring check against text that
+    was lowercased once at build time.
+    """
+
+    def __init__(self, ingredient_texts: Sequence[str], cache_size: int = 4096, lowered: bool = False):
+        """
+        Args:
+            ingredient_texts: Ingredient text of every recipe, by position
+            cache_size: Size of the per-token and per-ingredient lookup caches
+            lowered: Texts are already lowercased; the sequence is then kept
+                as-is instead of copied (e.g. a memory-mapped store column)
+        """
+        self._texts: Sequence[str] = (
+            ingredient_texts if lowered else [text.lower() for text in ingredient_texts]
+        )
+
+        postings: Dict[str, List[int]] = {}
+        for position, text in enumerate(self._texts):
+            for token in set(_TOKEN_RE.findall(text)):
+                postings.setdefault(token, []).append(position)
+
+        # Posting lists are built in position order, so they are already sorted
+        self._postings: Dict[str, array] = {
+            token: array('i', positions) for token, positions in postings.items()
+        }
+        self._vocabulary: List[str] = list(self._postings)
+
+        # Per-instance caches so a rebuilt index never serves stale lookups
+        self._token_positions = lru_cache(maxsize=cache_size)(self._positions_containing)
+        self._lookup = lru_cache(maxsize=cache_size)(self._lookup_uncached)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @property
+    def num_tokens(self) -> int:
+        """Number of distinct indexed tokens"""
+        return len(self._postings)
+
+    def _positions_containing(self, token: str) -> FrozenSet[int]:
+        """All recipe positions having an indexed token that contains `token`"""
+        exact = self._postings.get(token)
+        positions = set(exact) if exact is not None else set()
+
+        for candidate in self._vocabulary:
+            if candidate != token and token in candidate:
+                positions.update(self._postings[candidate])
+
+        return frozenset(positions)
+
+    def _lookup_uncached(self, ingredient_lower: str) -> FrozenSet[int]:
+        tokens = set(_TOKEN_RE.findall(ingredient_lower))
+
+        if not tokens:
+            # Punctuation-only (or empty) queries can't use the index
+            return frozenset(
+                position for position, text in enumerate(self._texts)
+                if ingredient_lower in text
+            )
+
+        candidates = None
+        # Longest tokens first: they are the most selective
+        for token in sorted(tokens, key=len, reverse=True):
+            positions = self._token_positions(token)
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return frozenset()
+
+        return frozenset(
+            position for position in candidates
+            if ingredient_lower in self._texts[position]
+        )
+
+    def lookup(self, ingredient: str) -> FrozenSet[int]:
+        """
+        Get positions of recipes whose ingredient text contains `ingredient`
+
+        Args:
+            ingredient: Ingredient name (case-insensitive)
+
+        Returns:
+            Frozen set of recipe positions
+        """
+        return self._lookup(ingredient.lower())
+
+    def match(self, user_ingredients: List[str]) -> Dict[int, List[str]]:
+        """
+        Find matching user ingredients for every recipe that matches at least one
+
+        Args:
+            user_ingredients: List of user ingredient names
+
+        Returns:
+            Dict of recipe position -> matching ingredient names, in the
+            order (and with the repetitions) of `user_ingredients`
+        """
+        matches: Dict[int, List[str]] = {}
+
+        for ingredient in user_ingredients:
+            for position in self.lookup(ingredient):
+                matches.setdefault(position, []).append(ingredient)
+
+        return matches
+
+    def matches_for(self, position: int, user_ingredients: List[str]) -> List[str]:
+        """
+        Get the user ingredients contained in a single recipe
+
+        Args:
+            position: Recipe position
+            user_ingredients: List of user ingredient names
+
+        Returns:
+            List of matching ingredient names
+        """
+        text = self._texts[position]
+        return [ingredient for ingredient in user_ingredients if ingredient.lower() in text]
+
+    def match_matrix(self, ingredients: Sequence[str], positions: np.ndarray) -> np.ndarray:
+        """
+        Which of several ingredients each of several recipes contains
+
+        One lookup per ingredient instead of a substring check per
+        (ingredient, recipe) pair; same matches as matches_for().
+
+        Args:
+            ingredients: Ingredient names
+            positions: Recipe positions
+
+        Returns:
+            Boolean array of shape (len(ingredients), len(positions))
+        """
+        matrix = np.zeros((len(ingredients), len(positions)), dtype=bool)
+        # Column of each recipe position, -1 for positions not asked about
+        column_of = np.full(len(self._texts), -1, dtype=np.int64)
+        column_of[positions] = np.arange(len(positions))
+        for row, ingredient in enumerate(ingredients):
+            found = self.lookup(ingredient)
+            if found:
+                columns = column_of[np.fromiter(found, dtype=np.int64, count=len(found))]
+                matrix[row, columns[columns >= 0]] = True
+        return matrix
@@ -0,0 +1,113 @@
+"""
+Per-ingredient embeddings
+Builds fridge query vectors by pooling precomputed vectors instead of running the model
+"""
+
+import json
+import logging
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+def ingredient_query_text(ingredients: Sequence[str]) -> str:
+    """Text the model encodes for an ingredient query (and for each vocabulary entry)"""
+    return f"Recipe with ingredients: {', '.join(ingredients)}"
+
+
+def _key(ingredient: str) -> str:
+    return ingredient.strip().lower()
+
+
+class IngredientVectors:
+    """
+    One embedding per vocabulary ingredient
+
+    Each vector is the model's encoding of the single-ingredient query text,
+    so a query for one known ingredient gets exactly the model's vector. A
+    multi-ingredient query vector is the L2-normalized mean of its
+    ingredients' vectors: a few microseconds of numpy instead of a
+    transformer forward pass.
+    """
+
+    def __init__(self, names: Sequence[str], vectors: np.ndarray):
+        self.names = list(names)
+        self.vectors = np.ascontiguousarray(vectors, dtype='float32')
+        self._rows = {_key(name): row for row, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def load(cls, embeddings_path: str, metadata_path: str, model_name: str, dimension: int) -> Optional["IngredientVectors"]:
+        """
+        Load vectors saved by save(), if they were computed with the current model
+
+        Returns:
+            IngredientVectors, or None if the files are missing or stale
+        """
+        if not (os.path.exists(embeddings_path) and os.path.exists(metadata_path)):
+            return None
+
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        if metadata.get('model_name') != model_name or metadata.get('dimension') != dimension:
+            logger.warning(
+                f"Ingredient embeddings were computed with {metadata.get('model_name')} "
+                f"({metadata.get('dimension')}d), not {model_name}; ignoring them"
+            )
+            return None
+
+        vectors = np.load(embeddings_path)
+        if vectors.shape != (len(metadata['ingredients']), dimension):
+            logger.warning(f"Ingredient embeddings shape {vectors.shape} doesn't match metadata; ignoring them")
+            return None
+        return cls(metadata['ingredients'], vectors)
+
+    def save(self, embeddings_path: str, metadata_path: str, model_name: str):
+        """Persist the vectors and the ingredient names they belong to"""
+        np.save(embeddings_path, self.vectors)
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model_name": model_name,
+                "dimension": self.vectors.shape[1],
+                "ingredients": self.names
+            }, f, indent=2, ensure_ascii=False)
+
+    def split(self, ingredients: Sequence[str]) -> Tuple[List[int], List[str]]:
+        """
+        Separate known ingredients from unknown ones
+
+        Returns:
+            (vector rows of the known ingredients, unknown ingredient names)
+        """
+        rows, unknown = [], []
+        for ingredient in ingredients:
+            row = self._rows.get(_key(ingredient))
+            if row is None:
+                unknown.append(ingredient)
+            else:
+                rows.append(row)
+        return rows, unknown
+
+    def pool(self, rows: List[int], extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Normalized mean of the vectors at `rows` plus any `extra` vectors
+
+        Args:
+            rows: Vector rows of known ingredients
+            extra: (m, dimension) vectors of ingredients encoded by the model
+
+        Returns:
+            Query vector of shape (dimension,)
+        """
+        parts = self.vectors[rows]
+        if extra is not None and len(extra):
+            parts = np.concatenate([parts, np.asarray(extra, dtype='float32')])
+        query = parts.mean(axis=0)
+        norm = np.linalg.norm(query)
+        return query / norm if norm > 0 else query
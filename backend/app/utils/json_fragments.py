@@ -0,0 +1,189 @@
+"""
+Pre-serialized recipe JSON
+Static recipe fields are encoded once per corpus; responses splice them
+
+The output is byte-identical to FastAPI's default path (response model
+validation, then json.dumps with ensure_ascii=False and compact
+separators): strings and lists go through orjson, which escapes strings
+exactly like json.dumps, and floats through float.__repr__ as json.dumps
+does (orjson writes 1e-05 as 0.00001).
+"""
+
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+
+from app.utils.recipe_store import FIELDS
+
+# Members of a serialized Recipe, in model field order
+RECIPE_FIELDS = ("id",) + FIELDS
+_FIELD_INDEX = {name: i for i, name in enumerate(RECIPE_FIELDS)}
+# A RecipeWithMatch: recipe members, then the match fields
+_MATCH = b'{%b,"matchingCount":%d,"matchingIngredients":%b,"score":%b}'
+
+# Named field projections; "summary" is what a card grid shows
+FIELD_VIEWS = {
+    "summary": ("id", "Title", "Image_Name"),
+    "all": RECIPE_FIELDS
+}
+
+
+def parse_fields(spec: Optional[str], default: str = "all") -> Optional[Tuple[str, ...]]:
+    """
+    Resolve a `fields=` parameter to the Recipe fields to return
+
+    Args:
+        spec: Comma-separated field names and / or view names ("summary",
+            "all"); empty or None for the default view
+        default: View used without a spec
+
+    Returns:
+        Field names in model order, or None for every field
+
+    Raises:
+        ValueError: Unknown field or view name
+    """
+    names = [name.strip() for name in (spec or "").split(',') if name.strip()] or [default]
+    selected = set()
+    for name in names:
+        if name in FIELD_VIEWS:
+            selected.update(FIELD_VIEWS[name])
+        elif name in _FIELD_INDEX:
+            selected.add(name)
+        else:
+            raise ValueError(
+                f"Unknown field '{name}', expected one of: {', '.join(tuple(FIELD_VIEWS) + RECIPE_FIELDS)}"
+            )
+    if len(selected) == len(RECIPE_FIELDS):
+        return None
+    return tuple(name for name in RECIPE_FIELDS if name in selected)
+
+
+def encode(value) -> bytes:
+    """JSON of a response value, as json.dumps would write it"""
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            # Starlette's JSONResponse refuses these too (allow_nan=False)
+            raise ValueError(f"Out of range float values are not JSON compliant: {value!r}")
+        return float.__repr__(value).encode()
+    return orjson.dumps(value)
+
+
+def json_object(members: Iterable[Tuple[str, bytes]]) -> bytes:
+    """JSON object from (key, encoded value) pairs, in order"""
+    return b'{' + b','.join(orjson.dumps(key) + b':' + value for key, value in members) + b'}'
+
+
+class RecipeFragments:
+    """
+    JSON members of every recipe (`"id":…,"Title":…,…`, no braces)
+
+    All recipes are encoded into one bytes blob at corpus load time. Row i
+    of the bounds holds where each field of recipe i starts (fields after
+    the first with their leading comma), then where the recipe ends.
+    Members are spliced into responses as memoryview slices, not copied;
+    a field projection splices just the byte ranges of its fields.
+    """
+
+    def __init__(self, recipes):
+        """
+        Args:
+            recipes: RecipeStore or InMemoryRecipeStore
+        """
+        keys = [orjson.dumps(name) + b':' for name in RECIPE_FIELDS]
+        keys[1:] = [b',' + key for key in keys[1:]]
+        columns = [recipes.ids] + [recipes.column(name) for name in FIELDS]
+
+        parts = []
+        lengths = np.empty((len(recipes), len(RECIPE_FIELDS)), dtype=np.int64)
+        for i, values in enumerate(zip(*columns)):
+            for f, (key, value) in enumerate(zip(keys, values)):
+                part = key + orjson.dumps(value)
+                parts.append(part)
+                lengths[i, f] = len(part)
+
+        self._blob = memoryview(b''.join(parts))
+        del parts
+        bounds = np.zeros((len(recipes), len(RECIPE_FIELDS) + 1), dtype=np.int64)
+        bounds[:, 1:] = lengths.cumsum().reshape(lengths.shape)
+        bounds[1:, 0] = bounds[:-1, -1]
+        # Flat array('q'): indexing it is several times cheaper than numpy's
+        self._stride = bounds.shape[1]
+        self._bounds = array('q', bounds.ravel().tolist())
+
+    def __len__(self) -> int:
+        return len(self._bounds) // self._stride
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blob) + len(self._bounds) * self._bounds.itemsize
+
+    def _runs(self, fields: Optional[Sequence[str]]) -> Optional[List[Tuple[int, int]]]:
+        """(first, end) field index ranges of a projection, adjacent fields merged"""
+        if fields is None:
+            return None
+        runs: List[Tuple[int, int]] = []
+        for i in sorted(_FIELD_INDEX[name] for name in fields):
+            if runs and runs[-1][1] == i:
+                runs[-1] = (runs[-1][0], i + 1)
+            else:
+                runs.append((i, i + 1))
+        return runs
+
+    def _members(self, position: int, runs: Optional[List[Tuple[int, int]]]):
+        row = position * self._stride
+        if runs is None:
+            return self._blob[self._bounds[row]:self._bounds[row + self._stride - 1]]
+        bounds = self._bounds
+        parts = [self._blob[bounds[row + first]:bounds[row + end]] for first, end in runs]
+        if runs[0][0]:
+            # Only the first field is stored without its leading comma
+            parts[0] = parts[0][1:]
+        return b''.join(parts)
+
+    def members(self, position: int, fields: Optional[Sequence[str]] = None):
+        """Serialized fields of the recipe at a position (all of them, or a projection)"""
+        return self._members(position, self._runs(fields))
+
+    def recipe(self, position: int, fields: Optional[Sequence[str]] = None) -> bytes:
+        """JSON object of a Recipe"""
+        return b'{' + self.members(position, fields) + b'}'
+
+    def recipes(self, positions: Iterable[int], fields: Optional[Sequence[str]] = None) -> bytes:
+        """JSON array of Recipes"""
+        runs = self._runs(fields)
+        return b'[' + b','.join(b'{' + self._members(position, runs) + b'}' for position in positions) + b']'
+
+    def matches(
+        self,
+        hits: Sequence[Tuple[int, List[str], Optional[float]]],
+        fields: Optional[Sequence[str]] = None
+    ) -> bytes:
+        """JSON array of RecipeWithMatch from (position, matching ingredients, score) hits"""
+        runs = self._runs(fields)
+        return b'[' + b','.join(
+            _MATCH % (
+                self._members(position, runs),
+                len(matching),
+                orjson.dumps(matching),
+                b'null' if score is None else encode(score)
+            )
+            for position, matching, score in hits
+        ) + b']'
+
+    def iter_matches(
+        self,
+        hits: Iterable[Tuple[int, List[str], Optional[float]]],
+        fields: Optional[Sequence[str]] = None
+    ) -> Iterator[bytes]:
+        """JSON object of each hit's RecipeWithMatch, as the hits come"""
+        runs = self._runs(fields)
+        for position, matching, score in hits:
+            yield _MATCH % (
+                self._members(position, runs),
+                len(matching),
+                orjson.dumps(matching),
+                b'null' if score is None else encode(score)
+            )
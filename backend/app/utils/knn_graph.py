@@ -0,0 +1,84 @@
+"""
+Precomputed nearest-neighbour graph
+Top-N similar recipes per recipe, built offline by python -m app.tools.build_knn_graph
+"""
+
+import json
+import logging
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+IDS_FILE = 'recipe_knn_ids.npy'
+SCORES_FILE = 'recipe_knn_scores.npy'
+METADATA_FILE = 'recipe_knn_metadata.json'
+
+
+def index_stamp(index_path: str) -> dict:
+    """Size and mtime of the index file, to tell whether a graph belongs to it"""
+    stat = os.stat(index_path)
+    return {"index_size": stat.st_size, "index_mtime_ns": stat.st_mtime_ns}
+
+
+class KnnGraph:
+    """
+    Row i holds the N most similar recipes to recipe i, best first
+
+    Neighbour positions are int32 and scores float16 (on the scale of
+    FAISSService.scores()), about 6 bytes per edge. Both arrays are
+    memory-mapped, so a lookup is a row slice.
+    """
+
+    def __init__(self, ids: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.scores = scores
+
+    @property
+    def neighbors(self) -> int:
+        return self.ids.shape[1]
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    @classmethod
+    def load(cls, directory: str, index_path: str, num_vectors: int) -> Optional["KnnGraph"]:
+        """
+        Map the graph files in `directory` if they were built for the current index
+
+        Returns:
+            KnnGraph, or None if the files are missing or stale
+        """
+        paths = [os.path.join(directory, name) for name in (IDS_FILE, SCORES_FILE, METADATA_FILE)]
+        if not all(os.path.exists(path) for path in paths):
+            return None
+
+        with open(paths[2], 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        if os.path.exists(index_path) and {
+            key: metadata.get(key) for key in ("index_size", "index_mtime_ns")
+        } != index_stamp(index_path):
+            logger.warning("kNN graph was built for another index file; ignoring it (rebuild with app.tools.build_knn_graph)")
+            return None
+
+        ids = np.load(paths[0], mmap_mode='r')
+        scores = np.load(paths[1], mmap_mode='r')
+        if ids.shape != scores.shape or ids.shape[0] != num_vectors:
+            logger.warning(f"kNN graph shape {ids.shape} doesn't match the index ({num_vectors} vectors); ignoring it")
+            return None
+        return cls(ids, scores)
+
+    def lookup(self, idx: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Up to k neighbours of recipe `idx`
+
+        Returns:
+            Tuple of (scores, indices), best first
+        """
+        return (
+            np.asarray(self.scores[idx, :k], dtype='float32'),
+            np.asarray(self.ids[idx, :k], dtype='int64')
+        )
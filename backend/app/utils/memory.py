@@ -0,0 +1,28 @@
+"""
+Process and host memory readings
+From /proc on Linux; None elsewhere, so callers must treat memory as unknown
+"""
+
+import os
+from typing import Optional
+
+
+def resident_memory() -> Optional[int]:
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def available_memory() -> Optional[int]:
+    """Memory available to new allocations without swapping (MemAvailable) in bytes"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
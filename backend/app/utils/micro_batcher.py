@@ -0,0 +1,134 @@
+"""
+Micro-batcher
+Groups work items from concurrent callers into batches for a single call
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and processes them together
+
+    A background worker takes the first queued item, then keeps collecting
+    until `max_batch_size` items are queued or `max_wait_ms` has passed, and
+    calls `process_batch` once for the whole batch. Each caller gets a
+    Future resolved with its own result.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher"
+    ):
+        """
+        Args:
+            process_batch: Called with a list of items, must return one result per item
+            max_batch_size: Flush as soon as this many items are queued
+            max_wait_ms: Flush at most this long after the first item of a batch arrived
+            name: Worker thread name
+        """
+        self._process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Guards the counters below (written by the worker, read by get_stats())
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_started(self):
+        """Start the worker thread on first use"""
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue an item for the next batch
+
+        Args:
+            item: Work item passed to process_batch
+
+        Returns:
+            Future resolved with the item's result (or the batch's exception)
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self) -> list:
+        """Block for one item, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Wait is over, but still take whatever is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+
+            try:
+                results = self._process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batch function returned {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                logger.error(f"{self.name}: batch of {len(items)} failed: {e}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(items)
+                self.largest_batch = max(self.largest_batch, len(items))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def reset_stats(self):
+        """Zero the batching statistics (e.g. between benchmark runs)"""
+        with self._stats_lock:
+            self.batches = self.items = self.largest_batch = 0
+
+    def get_stats(self) -> dict:
+        """Get batching statistics"""
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000
+            }
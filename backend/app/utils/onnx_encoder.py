@@ -0,0 +1,114 @@
+"""
+ONNX Runtime sentence encoder
+Runs the exported sentence-transformers model without importing torch
+
+The model directory is written by python -m app.tools.export_onnx_model and
+holds the transformer as ONNX (float32 and int8 dynamically quantized), the
+fast tokenizer (tokenizer.json) and onnx_config.json with the pooling setup
+of the source model, so embeddings land in the same vector space.
+"""
+
+import json
+import os
+from typing import List, Union
+
+import numpy as np
+
+CONFIG_FILE = 'onnx_config.json'
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model_int8.onnx'
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in for the SentenceTransformer.encode() calls EmbeddingService makes
+
+    Tokenization uses the Rust `tokenizers` library directly (no
+    transformers import); pooling and normalization follow the source
+    model's configuration.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, threads: int = 1):
+        """
+        Args:
+            model_dir: Directory written by the export tool
+            quantized: Use the int8 model instead of the float32 one
+            threads: ONNX Runtime intra-op threads
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.max_seq_length: int = self.config['max_seq_length']
+        self.pooling: str = self.config['pooling']
+        self.normalize: bool = self.config['normalize']
+        self.dimension: int = self.config['dimension']
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        pad_token = self.config.get('pad_token', '[PAD]')
+        pad_id = self.tokenizer.token_to_id(pad_token)
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0, pad_token=pad_token)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.model_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        self.session = onnxruntime.InferenceSession(
+            self.model_path,
+            sess_options=options,
+            providers=['CPUExecutionProvider']
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str], normalize: bool) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feed = {
+            'input_ids': np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            'attention_mask': attention_mask,
+            'token_type_ids': np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        token_embeddings = self.session.run(None, {name: value for name, value in feed.items() if name in self._input_names})[0]
+
+        if self.pooling == 'cls':
+            embeddings = token_embeddings[:, 0]
+        else:
+            # Mean over real (non-padding) tokens
+            mask = attention_mask[:, :, None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if normalize:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode one text (shape (dimension,)) or a list of texts (shape (n, dimension))
+
+        Texts are batched by length, like sentence-transformers does, to keep
+        padding small.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch], self.normalize or normalize_embeddings)
+
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,98 @@
+"""
+Compact ranked results
+What the recipe cache stores instead of full RecipeWithMatch lists
+"""
+
+from array import array
+from itertools import repeat
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Bitmasks are stored as unsigned 64-bit integers
+MAX_MASK_INGREDIENTS = 64
+
+
+class CachedRanking:
+    """
+    Ranked recipe positions plus, per hit, a bitmask of matching ingredients
+    and (for vector search) the similarity score
+
+    Bit i of a mask refers to the i-th entry of the (sorted) ingredient list
+    the ranking was computed for, i.e. the one in the cache key. Responses are
+    materialized from the shared recipe store on demand, so an entry costs a
+    few bytes per hit instead of full recipe copies. An empty ranking is a
+    negative entry.
+    """
+
+    __slots__ = ("ids", "masks", "scores")
+
+    def __init__(self, ids: array, masks: Optional[array], scores: Optional[array] = None):
+        self.ids = ids
+        # None when there are too many ingredients to fit a 64-bit mask;
+        # matches are then recomputed at materialization
+        self.masks = masks
+        # None for rankings without scores (string matching, coverage)
+        self.scores = scores
+
+    @classmethod
+    def build(
+        cls,
+        hits: Sequence[Tuple[int, List[str], Optional[float]]],
+        key_ingredients: Sequence[str]
+    ) -> "CachedRanking":
+        """
+        Args:
+            hits: Ranked (recipe position, matching ingredient names, score or None)
+            key_ingredients: Sorted user ingredients the ranking was computed for
+        """
+        ids = array('i', (idx for idx, _, _ in hits))
+        scores = None
+        if any(score is not None for _, _, score in hits):
+            scores = array('f', (float('nan') if score is None else score for _, _, score in hits))
+        if len(key_ingredients) > MAX_MASK_INGREDIENTS:
+            return cls(ids, None, scores)
+
+        bit_of = {ingredient: 1 << i for i, ingredient in enumerate(key_ingredients)}
+        masks = array('Q', (
+            sum({bit_of[ingredient] for ingredient in matching}) for _, matching, _ in hits
+        ))
+        return cls(ids, masks, scores)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint, used by the cache's byte bound"""
+        size = 64 + len(self.ids) * self.ids.itemsize
+        if self.masks is not None:
+            size += len(self.masks) * self.masks.itemsize
+        if self.scores is not None:
+            size += len(self.scores) * self.scores.itemsize
+        return size
+
+    def hits(
+        self,
+        user_ingredients: List[str],
+        key_ingredients: Sequence[str]
+    ) -> Iterator[Tuple[int, Optional[List[str]], Optional[float]]]:
+        """
+        Iterate ranked hits with their matching ingredients
+
+        Args:
+            user_ingredients: Ingredients of the current request (any order)
+            key_ingredients: Sorted ingredients the ranking was computed for
+
+        Yields:
+            (recipe position, matching ingredient names in the order of
+            `user_ingredients` or None if no masks are stored, score or None)
+        """
+        scores = self.scores if self.scores is not None else repeat(None)
+        if self.masks is None:
+            for idx, score in zip(self.ids, scores):
+                yield idx, None, score
+            return
+
+        bit_of = {ingredient: i for i, ingredient in enumerate(key_ingredients)}
+        user_bits = [(ingredient, bit_of[ingredient]) for ingredient in user_ingredients]
+        for idx, mask, score in zip(self.ids, self.masks, scores):
+            yield idx, [ingredient for ingredient, bit in user_bits if mask >> bit & 1], score
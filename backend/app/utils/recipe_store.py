@@ -0,0 +1,366 @@
+"""
+Columnar recipe store
+Recipes as one memory-mapped file instead of a list of pydantic models per worker
+
+File layout (all integers little-endian):
+    magic       8 bytes, b"SFCRCP02" (01 files had no id section)
+    header_len  uint64
+    header      UTF-8 JSON, padded with spaces to 8 bytes:
+                    count        number of recipes
+                    source       stats of the source file (see source_stats)
+                    fingerprint  hex corpus_fingerprint() of the recipes
+                    ids          absolute position of the id section
+                    columns      per column: absolute positions of its
+                                 offsets, nulls (or null) and data, and
+                                 the data length
+    ids         uint32[count], stable recipe ids, padded to 8 bytes
+    per column, in FIELDS order, then Ingredients_lower:
+        offsets uint64[count + 1], relative to the column's data section
+        nulls   uint8[count] (nullable columns only), 1 = None
+        data    concatenated UTF-8 values, padded to 8 bytes
+
+Nothing is decoded at open time; a string is decoded when it is read, and
+the pages behind the file are shared by every process mapping it.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.models.recipe import Recipe
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SFCRCP02"
+
+# Recipe fields in storage order, plus the lowercased ingredient text the
+# ingredient index matches against
+FIELDS = ("Title", "Ingredients", "Instructions", "Image_Name", "Cleaned_Ingredients")
+INGREDIENTS_LOWER = "Ingredients_lower"
+NULLABLE = ("Instructions",)
+
+
+def read_recipes_json(path: str) -> Tuple[List[Recipe], int]:
+    """
+    Load and validate recipes from the JSON source file
+
+    Args:
+        path: Path of recipes.json
+
+    Returns:
+        (valid recipes, number of skipped rows); a recipe's id is its row
+        in the file, so ids stay stable when other rows are fixed or removed
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        recipes_data = json.load(f)
+
+    # Filter out recipes with None values and convert to Recipe models
+    valid_recipes = []
+    skipped = 0
+
+    for row, recipe in enumerate(recipes_data):
+        try:
+            # Check if all required fields exist and are not None
+            if (recipe.get('Title') and
+                recipe.get('Ingredients') and
+                recipe.get('Image_Name') and
+                recipe.get('Cleaned_Ingredients')):
+                valid_recipes.append(Recipe(**{**recipe, 'id': row}))
+            else:
+                skipped += 1
+        except Exception:
+            skipped += 1
+            continue
+
+    return valid_recipes, skipped
+
+
+def corpus_fingerprint(titles: Iterable[str], image_names: Iterable[str]) -> bytes:
+    """
+    Hash of the ordered (title, image name) pairs of a corpus
+
+    The FAISS index records the fingerprint of the recipes it was built
+    from: equal fingerprints mean index positions and recipe positions agree.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for title, image_name in zip(titles, image_names):
+        digest.update(f"{title}\0{image_name}\n".encode('utf-8'))
+    return digest.digest()
+
+
+def source_stats(path: str) -> dict:
+    """Size and mtime of a source file, recorded in the store header"""
+    stat = os.stat(path)
+    return {"file": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _pad(length: int) -> bytes:
+    return b"\0" * (-length % 8)
+
+
+def write_recipe_store(path: str, recipes: Sequence[Recipe], source: Optional[dict] = None):
+    """
+    Write recipes to a columnar store file
+
+    The file is written next to `path` and renamed into place, so processes
+    still mapping an older version keep reading it unchanged.
+
+    Args:
+        path: Output path
+        recipes: Validated recipes (with ids), in corpus order
+        source: Stats of the file the recipes were read from (see source_stats)
+    """
+    columns = {}
+    for name in FIELDS + (INGREDIENTS_LOWER,):
+        if name == INGREDIENTS_LOWER:
+            values = [recipe.Ingredients.lower() for recipe in recipes]
+        else:
+            values = [getattr(recipe, name) for recipe in recipes]
+
+        offsets = array('Q', [0])
+        chunks = []
+        for value in values:
+            encoded = value.encode('utf-8') if value is not None else b""
+            chunks.append(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+
+        nulls = bytes(value is None for value in values) if name in NULLABLE else None
+        columns[name] = (offsets.tobytes(), nulls, b"".join(chunks))
+
+    ids = array('I', (recipe.id for recipe in recipes))
+    if sys.byteorder != 'little':
+        ids.byteswap()
+    ids = ids.tobytes()
+    fingerprint = corpus_fingerprint(
+        (recipe.Title for recipe in recipes), (recipe.Image_Name for recipe in recipes)
+    ).hex()
+
+    def header_bytes(positions: dict) -> bytes:
+        header = json.dumps({
+            "count": len(recipes),
+            "source": source,
+            "fingerprint": fingerprint,
+            "ids": ids_position,
+            "columns": positions
+        }).encode('utf-8')
+        return header + b" " * (-len(header) % 8)
+
+    # Section positions depend on the header length, which depends on the
+    # positions: lay out with placeholders until the header size is stable
+    ids_position = 0
+    positions = {name: {"offsets": 0, "nulls": None, "data": 0, "length": 0} for name in columns}
+    while True:
+        header = header_bytes(positions)
+        position = len(MAGIC) + 8 + len(header)
+        ids_position = position
+        position += len(ids) + len(_pad(len(ids)))
+        layout = {}
+        for name, (offsets, nulls, data) in columns.items():
+            entry = {"offsets": position, "nulls": None, "data": 0, "length": len(data)}
+            position += len(offsets)
+            if nulls is not None:
+                entry["nulls"] = position
+                position += len(nulls) + len(_pad(len(nulls)))
+            entry["data"] = position
+            position += len(data) + len(_pad(len(data)))
+            layout[name] = entry
+        if len(header_bytes(layout)) == len(header):
+            header = header_bytes(layout)
+            break
+        positions = layout
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(ids + _pad(len(ids)))
+        for offsets, nulls, data in columns.values():
+            f.write(offsets)
+            if nulls is not None:
+                f.write(nulls + _pad(len(nulls)))
+            f.write(data + _pad(len(data)))
+    os.replace(tmp_path, path)
+
+
+class StoreColumn(Sequence):
+    """Read-only view of one column; values are decoded on access"""
+
+    def __init__(self, buffer: mmap.mmap, count: int, entry: dict):
+        self._buffer = buffer
+        self._count = count
+        self._data = entry["data"]
+        self._offsets = memoryview(buffer)[entry["offsets"]:entry["offsets"] + 8 * (count + 1)].cast('Q')
+        nulls = entry.get("nulls")
+        self._nulls = memoryview(buffer)[nulls:nulls + count] if nulls is not None else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _value(self, position: int) -> Optional[str]:
+        if self._nulls is not None and self._nulls[position]:
+            return None
+        start = self._data + self._offsets[position]
+        end = self._data + self._offsets[position + 1]
+        return self._buffer[start:end].decode('utf-8')
+
+    def __getitem__(self, position: Union[int, slice]):
+        if isinstance(position, slice):
+            return [self._value(i) for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("column index out of range")
+        return self._value(position)
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        for position in range(self._count):
+            yield self._value(position)
+
+    def release(self):
+        """Drop the views into the mapping so it can be closed"""
+        self._offsets.release()
+        if self._nulls is not None:
+            self._nulls.release()
+
+
+class RecipeStore(Sequence):
+    """
+    Memory-mapped columnar recipe file
+
+    Behaves like the list of recipes it was written from: indexing and
+    slicing build `Recipe` objects on demand (without re-validation, the
+    converter validated them), and `column()` / `ids` read single fields
+    without building models at all.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a recipe store file")
+        if sys.byteorder != 'little':
+            self._buffer.close()
+            raise ValueError("Recipe store files can only be mapped on little-endian hosts")
+
+        header_len, = struct.unpack_from('<Q', self._buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._buffer[start:start + header_len].decode('utf-8'))
+
+        self.count: int = header["count"]
+        self.source: Optional[dict] = header.get("source")
+        # Computed by the converter, so checking the index costs nothing here
+        fingerprint = header.get("fingerprint")
+        self._fingerprint: Optional[bytes] = bytes.fromhex(fingerprint) if fingerprint else None
+        self._columns = {
+            name: StoreColumn(self._buffer, self.count, entry)
+            for name, entry in header["columns"].items()
+        }
+        self._fields = [self._columns[name] for name in FIELDS]
+        self.ids = memoryview(self._buffer)[header["ids"]:header["ids"] + 4 * self.count].cast('I')
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped file"""
+        return len(self._buffer)
+
+    @property
+    def fingerprint(self) -> bytes:
+        """corpus_fingerprint() of the recipes (from the header, computed for older files)"""
+        if self._fingerprint is None:
+            self._fingerprint = corpus_fingerprint(self.column('Title'), self.column('Image_Name'))
+        return self._fingerprint
+
+    def column(self, name: str) -> StoreColumn:
+        """Get a single column (a Recipe field name or "Ingredients_lower")"""
+        return self._columns[name]
+
+    def get(self, position: int) -> Recipe:
+        """Build the recipe at a position"""
+        values = [column[position] for column in self._fields]
+        return Recipe.model_construct(id=self.ids[position], **dict(zip(FIELDS, values)))
+
+    def project(self, position: int, fields: Sequence[str]) -> dict:
+        """Only the given fields ("id" or Recipe fields) of the recipe at a position; other columns aren't read"""
+        return {
+            name: self.ids[position] if name == "id" else self._columns[name][position]
+            for name in fields
+        }
+
+    def __getitem__(self, position: Union[int, slice]):
+        if isinstance(position, slice):
+            return [self.get(i) for i in range(*position.indices(self.count))]
+        return self.get(position)
+
+    def __iter__(self) -> Iterator[Recipe]:
+        for position in range(self.count):
+            yield self.get(position)
+
+    def close(self):
+        """Unmap the file"""
+        for column in self._columns.values():
+            column.release()
+        self.ids.release()
+        self._buffer.close()
+
+
+class InMemoryRecipeStore(Sequence):
+    """RecipeStore interface over a plain list of recipes (the recipes.json fallback)"""
+
+    def __init__(self, recipes: List[Recipe]):
+        self._recipes = recipes
+        self._columns = {}
+        self.ids = array('I', (recipe.id for recipe in recipes))
+        self._fingerprint: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self._recipes)
+
+    def column(self, name: str) -> List[Optional[str]]:
+        """Get a single column (a Recipe field name or "Ingredients_lower")"""
+        if name not in self._columns:
+            if name == INGREDIENTS_LOWER:
+                self._columns[name] = [recipe.Ingredients.lower() for recipe in self._recipes]
+            else:
+                self._columns[name] = [getattr(recipe, name) for recipe in self._recipes]
+        return self._columns[name]
+
+    @property
+    def fingerprint(self) -> bytes:
+        """corpus_fingerprint() of the recipes"""
+        if self._fingerprint is None:
+            self._fingerprint = corpus_fingerprint(self.column('Title'), self.column('Image_Name'))
+        return self._fingerprint
+
+    def get(self, position: int) -> Recipe:
+        """Get the recipe at a position"""
+        return self._recipes[position]
+
+    def project(self, position: int, fields: Sequence[str]) -> dict:
+        """Only the given fields of the recipe at a position"""
+        recipe = self._recipes[position]
+        return {name: getattr(recipe, name) for name in fields}
+
+    def __getitem__(self, position: Union[int, slice]):
+        return self._recipes[position]
+
+    def __iter__(self) -> Iterator[Recipe]:
+        return iter(self._recipes)
+
+    def close(self):
+        pass
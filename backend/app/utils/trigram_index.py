@@ -0,0 +1,280 @@
+"""
+Trigram text index
+Substring and typo-tolerant search over recipe titles and ingredients,
+replacing the linear title scan of the text search fallback
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Ingredient matches count for less than title matches
+INGREDIENT_WEIGHT = 0.5
+# A misspelled word expands to at most this many vocabulary words, and so
+# does a very short one ("a" is in most words); closest / shortest first
+MAX_EXPANSIONS = 64
+# Ranking resolution: scores closer than 1 / SCORE_LEVELS rank as ties
+SCORE_LEVELS = 1 << 14
+
+
+def _trigrams(word: str, padded: bool = True) -> List[str]:
+    """
+    Distinct trigrams of a word
+
+    Padded as in PostgreSQL's pg_trgm ("  word "), so word starts weigh in
+    and two-letter words still have trigrams; unpadded trigrams are the
+    ones every word containing `word` must have.
+    """
+    text = f"  {word} " if padded else word
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+def _csr(lists: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack lists of ints into (offsets, values) arrays"""
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(values) for values in lists])
+    values = np.fromiter((v for values in lists for v in values), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, values
+
+
+class TrigramIndex:
+    """
+    Two-level index: trigram -> vocabulary words -> recipe positions
+
+    Query words are resolved against the (small) vocabulary of distinct
+    words: words containing the query word match with score 1; if no word
+    contains it (a typo), words with a trigram similarity of at least
+    `min_similarity` match with that similarity. Only words sharing
+    trigrams with the query word are ever compared. Their posting lists then give every recipe's best
+    score per query word, in the title and in the ingredients.
+
+    Recipe score: mean over query words of max(title score,
+    INGREDIENT_WEIGHT * ingredient score), in (0, 1]. Recipes whose title
+    contains the whole query score 2, so the matches of the former
+    `query in title` scan still come first, in the same order.
+    """
+
+    def __init__(
+        self,
+        titles: Sequence[str],
+        ingredient_texts: Sequence[str],
+        min_similarity: float = 0.3,
+        cache_size: int = 4096,
+        lowered: bool = False
+    ):
+        """
+        Args:
+            titles: Title of every recipe, by position
+            ingredient_texts: Ingredient text of every recipe, by position
+            min_similarity: Trigram similarity for a misspelled word to match
+            cache_size: Size of the per-word expansion cache
+            lowered: Ingredient texts are already lowercased
+        """
+        self.min_similarity = min_similarity
+        self._titles: List[str] = [title.lower() for title in titles]
+        self._size = len(self._titles)
+
+        word_ids: Dict[str, int] = {}
+        title_postings: List[List[int]] = []
+        ingredient_postings: List[List[int]] = []
+
+        def postings_of(word: str, postings: List[List[int]]) -> List[int]:
+            word_id = word_ids.setdefault(word, len(word_ids))
+            if word_id == len(title_postings):
+                title_postings.append([])
+                ingredient_postings.append([])
+            return postings[word_id]
+
+        for position, title in enumerate(self._titles):
+            for word in set(_TOKEN_RE.findall(title)):
+                postings_of(word, title_postings).append(position)
+        for position, text in enumerate(ingredient_texts):
+            for word in set(_TOKEN_RE.findall(text if lowered else text.lower())):
+                postings_of(word, ingredient_postings).append(position)
+
+        # Positions are appended in order, so every posting list is sorted
+        self._vocabulary: List[str] = list(word_ids)
+        self._title_offsets, self._title_positions = _csr(title_postings)
+        self._ingredient_offsets, self._ingredient_positions = _csr(ingredient_postings)
+        del title_postings, ingredient_postings
+
+        trigram_words: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self._vocabulary):
+            for trigram in _trigrams(word):
+                trigram_words.setdefault(trigram, []).append(word_id)
+        self._trigram_ids: Dict[str, int] = {trigram: i for i, trigram in enumerate(trigram_words)}
+        self._trigram_offsets, self._trigram_words = _csr(list(trigram_words.values()))
+        self._word_trigrams = np.array([len(_trigrams(word)) for word in self._vocabulary], dtype=np.int32)
+        self._word_lengths = np.array([len(word) for word in self._vocabulary], dtype=np.int32)
+
+        # Per-instance caches so a rebuilt index never serves stale expansions
+        self._containing = lru_cache(maxsize=cache_size)(self._containing_uncached)
+        self._expand = lru_cache(maxsize=cache_size)(self._expand_uncached)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def num_words(self) -> int:
+        """Number of distinct indexed words"""
+        return len(self._vocabulary)
+
+    @property
+    def num_trigrams(self) -> int:
+        """Number of distinct vocabulary trigrams"""
+        return len(self._trigram_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the posting arrays"""
+        return sum(array.nbytes for array in (
+            self._title_offsets, self._title_positions,
+            self._ingredient_offsets, self._ingredient_positions,
+            self._trigram_offsets, self._trigram_words,
+            self._word_trigrams, self._word_lengths
+        ))
+
+    def _words_with(self, trigrams: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vocabulary words having at least one of `trigrams`
+
+        Returns:
+            Tuple of (word ids, number of the trigrams each one has)
+        """
+        slices = [
+            self._trigram_words[self._trigram_offsets[i]:self._trigram_offsets[i + 1]]
+            for i in (self._trigram_ids.get(trigram) for trigram in trigrams) if i is not None
+        ]
+        if not slices:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        counts = np.bincount(np.concatenate(slices), minlength=len(self._vocabulary))
+        word_ids = np.flatnonzero(counts)
+        return word_ids, counts[word_ids]
+
+    def _containing_uncached(self, word: str) -> np.ndarray:
+        """Ids of all vocabulary words containing `word`"""
+        inner = _trigrams(word, padded=False)
+        if inner:
+            # A word containing `word` has all of its inner trigrams
+            candidates, counts = self._words_with(inner)
+            candidates = candidates[counts == len(inner)]
+        else:
+            # One or two letters: no inner trigram to prune with
+            candidates = range(len(self._vocabulary))
+        return np.array(
+            [word_id for word_id in candidates if word in self._vocabulary[word_id]], dtype=np.int32
+        )
+
+    def _expand_uncached(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vocabulary words matching a query word
+
+        Returns:
+            Tuple of (word ids, scores): 1 for words containing `word`; if
+            there are none, similar words with their trigram similarity
+        """
+        contained = self._containing(word)
+        if len(contained) > MAX_EXPANSIONS:
+            # Shortest first: closest to the query word
+            order = np.argsort(self._word_lengths[contained], kind='stable')
+            contained = contained[order[:MAX_EXPANSIONS]]
+
+        if len(contained):
+            return contained, np.ones(len(contained), dtype=np.float32)
+
+        # Nothing contains it: a misspelling, matched by trigram similarity
+        padded = _trigrams(word)
+        candidates, shared = self._words_with(padded)
+        similarity = (shared / (len(padded) + self._word_trigrams[candidates] - shared)).astype(np.float32)
+        keep = similarity >= self.min_similarity
+        similar, similarity = candidates[keep], similarity[keep]
+        if len(similar) > MAX_EXPANSIONS:
+            order = np.argsort(-similarity, kind='stable')[:MAX_EXPANSIONS]
+            similar, similarity = similar[order], similarity[order]
+        return similar, similarity
+
+    def _best_scores(self, word_ids: np.ndarray, scores: np.ndarray, offsets: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Best score of the matched words in every recipe (dense, 0 = no match)"""
+        best = np.zeros(self._size, dtype=np.float32)
+        slices = [positions[offsets[word_id]:offsets[word_id + 1]] for word_id in word_ids]
+        lengths = [len(s) for s in slices]
+        if not sum(lengths):
+            return best
+        # Ascending scores: for a recipe with several matched words the last
+        # (highest) assignment wins
+        order = np.argsort(scores, kind='stable')
+        best[np.concatenate([slices[i] for i in order])] = np.repeat(scores[order], [lengths[i] for i in order])
+        return best
+
+    def search(self, query: str, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best matching recipes for a text query
+
+        Args:
+            query: Free text (case-insensitive)
+            limit: Maximum number of results
+
+        Returns:
+            Tuple of (positions, scores), best first; ties in position order
+        """
+        query_lower = query.lower()
+        words = list(dict.fromkeys(_TOKEN_RE.findall(query_lower)))
+        # The former scan's matches come first and in position order, so
+        # with `limit` of them the ranking below can't change the result;
+        # punctuation-only queries can't use the index at all
+        phrase = self._title_matches(query_lower, words, limit)
+        if len(phrase) >= limit or not words:
+            return np.array(phrase, dtype=np.int64), np.full(len(phrase), 2.0, dtype=np.float32)
+
+        total = np.zeros(self._size, dtype=np.float32)
+        for word in words:
+            word_ids, scores = self._expand(word)
+            if not len(word_ids):
+                continue
+            title = self._best_scores(word_ids, scores, self._title_offsets, self._title_positions)
+            ingredients = self._best_scores(word_ids, scores, self._ingredient_offsets, self._ingredient_positions)
+            total += np.maximum(title, INGREDIENT_WEIGHT * ingredients)
+        total /= len(words)
+        total[phrase] = 2.0
+
+        # Select through a histogram of quantized scores: many recipes share
+        # a score (one common word matched), which makes partitioning slow.
+        # Recipes above the k-th best level are sorted, the ones on it taken
+        # in position order
+        levels = np.rint(total * SCORE_LEVELS).astype(np.int32)
+        from_top = np.cumsum(np.bincount(levels, minlength=2 * SCORE_LEVELS + 1)[:0:-1])
+        cutoff = max(0, 2 * SCORE_LEVELS - int(np.searchsorted(from_top, limit)))
+        above = np.flatnonzero(levels > cutoff)
+        positions = above[np.lexsort((above, -levels[above]))]
+        if cutoff > 0:
+            positions = np.concatenate([positions, np.flatnonzero(levels == cutoff)[:limit - len(positions)]])
+        return positions, total[positions]
+
+    def _title_matches(self, query_lower: str, words: List[str], limit: int) -> List[int]:
+        """First `limit` positions whose title contains `query_lower`, as the former scan"""
+        # Every query word lies inside a title word of a matching title; words
+        # of three letters or more prune the titles to check through the index
+        mask = None
+        for word in words:
+            if len(word) < 3:
+                continue
+            word_ids = self._containing(word)
+            word_mask = np.zeros(self._size, dtype=bool)
+            if len(word_ids):
+                word_mask[np.concatenate([
+                    self._title_positions[self._title_offsets[i]:self._title_offsets[i + 1]] for i in word_ids
+                ])] = True
+            mask = word_mask if mask is None else mask & word_mask
+        candidates = np.flatnonzero(mask) if mask is not None else range(self._size)
+
+        matches = []
+        for position in candidates:
+            if query_lower in self._titles[position]:
+                matches.append(int(position))
+                if len(matches) >= limit:
+                    break
+        return matches
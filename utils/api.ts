@@ -96,7 +96,8 @@ export const getRecipeByTitle = async (title: string) => {
  */
 export const getRecommendations = async (ingredients: string[]) => {
     try {
-        const response = await fetch(`${API_BASE_URL}/recipes/recommend`, {
+        // Only what the recipe cards and the dietary filters read
+        const response = await fetch(`${API_BASE_URL}/recipes/recommend?fields=summary,Cleaned_Ingredients`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',